@@ -0,0 +1,132 @@
+"""Drive the real SeleniumWorker against the local mock dashboard.
+
+    python -m bench.e2e_bench --minutes 5 --rate 12 --competitor-ms 8000
+
+Starts bench.mock_dashboard on a free local port and points BASE_URL at it.
+Then it runs a SeleniumWorker (Firefox; HEADLESS and the other worker
+switches come from the environment as usual) with the benchmark's amount
+range. Orders start arriving once the worker has finished its first poll
+cycle.
+
+Reported from the dashboard's side:
+  listed      injection → first served to the table (refresh cadence)
+  detection   injection → the worker opened the order modal
+  take        injection → the take request arrived
+  orders/min  confirmed takes per minute
+It also reports orders lost to the simulated competitor and the worker's
+own take-path percentiles. --json prints everything as one JSON object, for
+comparing runs.
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+
+def _format(stats: Dict[str, Any]) -> str:
+    if not stats["count"]:
+        return "—"
+    return f"p50 {stats['p50']:7.0f} ms   p95 {stats['p95']:7.0f} ms   max {stats['max']:7.0f} ms"
+
+
+def start_worker(dashboard, amount_min: float, amount_max: float) -> Tuple[Any, List[str], float]:
+    """Start a SeleniumWorker on a running MockDashboard and wait for its first poll cycle.
+
+    Returns the worker, the list its on_order_taken callback appends slugs to,
+    and the startup time in seconds.
+    """
+    # config is read at import time: point it at the mock before importing the worker
+    workdir = tempfile.mkdtemp(prefix="c2c_bench_")
+    os.environ["BASE_URL"] = dashboard.base_url
+    os.environ["LEAN_ALLOWED_HOSTS"] = "127.0.0.1"
+    os.environ["SESSION_FILE"] = os.path.join(workdir, "session.json")
+    os.environ["LEDGER_DIR"] = os.path.join(workdir, "ledger")
+    os.environ.setdefault("BOT_TOKEN", "0:bench")
+    from config import HEADLESS
+    from core.selenium_worker import SeleniumWorker
+
+    reported: List[str] = []
+    worker = SeleniumWorker(
+        on_order_taken=lambda slug, amount: reported.append(slug),
+        on_order_failed=lambda slug, amount: None,
+        headless=HEADLESS,
+    )
+    worker.start(dashboard.login, dashboard.password, amount_min, amount_max)
+    deadline = time.monotonic() + 180
+    while not worker.last_heartbeat:
+        if time.monotonic() > deadline or not worker.is_running():
+            worker.stop()
+            raise SystemExit("Worker did not reach its first poll cycle against the mock dashboard")
+        time.sleep(0.2)
+    return worker, reported, time.monotonic() - worker.launched_at
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    from bench.mock_dashboard.server import MockDashboard
+
+    dashboard = MockDashboard(
+        rate=args.rate,
+        amount_min=args.amount_min,
+        amount_max=args.amount_max,
+        competitor_ms=args.competitor_ms,
+        backlog=args.backlog,
+        seed=args.seed,
+        inject_on_start=False,
+    )
+    dashboard.start_in_thread()
+    try:
+        worker, reported, startup_s = start_worker(dashboard, args.amount_min, args.amount_max)
+        try:
+            dashboard.call(dashboard.start_injecting)
+            time.sleep(args.minutes * 60)
+            result = dashboard.call(dashboard.stats)
+        finally:
+            worker.stop()
+    finally:
+        dashboard.stop()
+
+    result["startup_s"] = startup_s
+    result["worker_reported_takes"] = len(reported)
+    result["take_path"] = worker.take_stats.summary()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--minutes", type=float, default=3.0)
+    parser.add_argument("--rate", type=float, default=12.0, help="new orders per minute")
+    parser.add_argument("--amount-min", type=float, default=1000.0)
+    parser.add_argument("--amount-max", type=float, default=50000.0)
+    parser.add_argument("--competitor-ms", type=float, default=0.0,
+                        help="mean time until a competitor takes an order (0 = never)")
+    parser.add_argument("--backlog", type=int, default=200, help="out-of-range orders in the list")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    result = run(args)
+    if args.json:
+        print(json.dumps(result))
+        return
+    print(f"startup       {result['startup_s']:.1f} s")
+    print(f"injected      {result['injected']}  taken {result['taken']}  "
+          f"lost to competitor {result['lost']}  still open {result['pending']}")
+    print(f"orders/min    {result['orders_per_min']:.2f}")
+    print(f"listed        {_format(result['listed_ms'])}")
+    print(f"detection     {_format(result['detection_ms'])}")
+    print(f"take          {_format(result['take_ms'])}")
+    if result["worker_reported_takes"] != result["taken"]:
+        print(f"note: worker reported {result['worker_reported_takes']} takes, "
+              f"dashboard confirmed {result['taken']}")
+    print("worker take path (ms since first seen, p50 / p90):")
+    for stage, stats in result["take_path"]["stages"].items():
+        if stats["count"]:
+            print(f"  {stage:<16}{stats['p50']:8.0f} {stats['p90']:8.0f}")
+
+
+if __name__ == "__main__":
+    main()
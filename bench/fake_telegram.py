@@ -0,0 +1,241 @@
+"""Callback-to-handler latency of polling vs. webhook mode against a fake Bot API.
+
+    python -m bench.fake_telegram --updates 200 --rtt-ms 40
+
+Starts a local stand-in for the Telegram Bot API, launches main.py pointed at
+it (TELEGRAM_API_URL) once per BOT_MODE and presses the "bot:no_settings"
+button N times, one press at a time. Latency runs from the moment the fake
+server has the update (queued for getUpdates, or about to be POSTed to the
+webhook) to the bot's answerCallbackQuery for it. --rtt-ms delays every hop
+between the fake server and the bot by half the round trip, like the real
+network path to Telegram. Webhook mode also checks that a POST with a wrong
+secret token is rejected.
+
+No browser or dashboard credentials are needed; the bot runs against a
+throwaway database.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import aiohttp
+from aiohttp import web
+
+_PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_TOKEN = "123456:BENCH-fake-token"
+_CHAT = {"id": 1, "type": "private", "first_name": "Bench"}
+_USER = {"id": 1, "is_bot": False, "first_name": "Bench"}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class FakeTelegram:
+    """Just enough of the Bot API for the bot to start and answer callbacks."""
+
+    def __init__(self, rtt_ms: float = 0.0) -> None:
+        self._one_way = rtt_ms / 2000
+        self._pending: List[Dict[str, Any]] = []
+        self._new_update = asyncio.Event()
+        self._update_id = 0
+        self._pressed: Dict[str, float] = {}
+        self._answered: Dict[str, asyncio.Event] = {}
+        self.latencies_ms: List[float] = []
+        self.webhook_url: str = ""
+        self.webhook_secret: str = ""
+        self.ready = asyncio.Event()
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route("*", "/bot{token}/{method}", self._handle)
+        return app
+
+    async def _params(self, request: web.Request) -> Dict[str, Any]:
+        if request.content_type == "application/json":
+            return await request.json()
+        params: Dict[str, Any] = dict(request.query)
+        params.update(await request.post())
+        return params
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = await self._params(request)
+        result: Any = True
+        if method == "getMe":
+            result = {"id": 42, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+        elif method == "getUpdates":
+            result = await self._get_updates(params)
+            self.ready.set()
+        elif method == "setWebhook":
+            self.webhook_url = str(params.get("url", ""))
+            self.webhook_secret = str(params.get("secret_token", ""))
+            self.ready.set()
+        elif method == "deleteWebhook":
+            self.webhook_url = ""
+        elif method == "answerCallbackQuery":
+            self._record_answer(str(params.get("callback_query_id")))
+        elif method in ("sendMessage", "editMessageText"):
+            result = {
+                "message_id": 1, "date": int(time.time()), "chat": _CHAT,
+                "text": str(params.get("text", "")),
+            }
+        if self._one_way:
+            await asyncio.sleep(self._one_way)
+        return web.json_response({"ok": True, "result": result})
+
+    async def _get_updates(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        offset = int(params.get("offset") or 0)
+        self._pending = [u for u in self._pending if u["update_id"] >= offset]
+        if not self._pending:
+            self._new_update.clear()
+            try:
+                await asyncio.wait_for(self._new_update.wait(), float(params.get("timeout") or 0))
+            except asyncio.TimeoutError:
+                pass
+        return list(self._pending)
+
+    def _record_answer(self, callback_id: str) -> None:
+        pressed = self._pressed.pop(callback_id, None)
+        if pressed is not None:
+            self.latencies_ms.append((time.perf_counter() - pressed) * 1000)
+            self._answered[callback_id].set()
+
+    def _callback_update(self) -> Dict[str, Any]:
+        self._update_id += 1
+        return {
+            "update_id": self._update_id,
+            "callback_query": {
+                "id": f"cb{self._update_id}",
+                "from": _USER,
+                "chat_instance": "1",
+                "data": "bot:no_settings",
+                "message": {"message_id": 1, "date": int(time.time()), "chat": _CHAT, "text": "menu"},
+            },
+        }
+
+    async def press(self, http: aiohttp.ClientSession, timeout: float = 10.0) -> bool:
+        """Deliver one button press and wait for the bot to answer it."""
+        update = self._callback_update()
+        callback_id = update["callback_query"]["id"]
+        self._answered[callback_id] = asyncio.Event()
+        self._pressed[callback_id] = time.perf_counter()
+        if self.webhook_url:
+            if self._one_way:
+                await asyncio.sleep(self._one_way)
+            async with http.post(
+                self.webhook_url, json=update,
+                headers={"X-Telegram-Bot-Api-Secret-Token": self.webhook_secret},
+            ):
+                pass
+        else:
+            self._pending.append(update)
+            self._new_update.set()
+        try:
+            await asyncio.wait_for(self._answered[callback_id].wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            self._pressed.pop(callback_id, None)
+            return False
+
+    async def forged_post_rejected(self, http: aiohttp.ClientSession) -> bool:
+        async with http.post(
+            self.webhook_url, json=self._callback_update(),
+            headers={"X-Telegram-Bot-Api-Secret-Token": "wrong"},
+        ) as response:
+            return response.status == 401
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[int(pct / 100 * (len(ordered) - 1))] if ordered else 0.0
+
+
+async def run_mode(mode: str, updates: int, rtt_ms: float, workdir: str) -> Dict[str, Any]:
+    fake = FakeTelegram(rtt_ms)
+    runner = web.AppRunner(fake.app())
+    await runner.setup()
+    api_port, webhook_port = _free_port(), _free_port()
+    await web.TCPSite(runner, "127.0.0.1", api_port).start()
+
+    env = dict(
+        os.environ,
+        BOT_TOKEN=_TOKEN,
+        BOT_MODE=mode,
+        TELEGRAM_API_URL=f"http://127.0.0.1:{api_port}",
+        WEBHOOK_BASE_URL=f"http://127.0.0.1:{webhook_port}",
+        WEBHOOK_HOST="127.0.0.1",
+        WEBHOOK_PORT=str(webhook_port),
+        WEBHOOK_SECRET="",   # the bot generates one and registers it with setWebhook
+        DATABASE_URL=f"sqlite+aiosqlite:///{os.path.join(workdir, f'{mode}.db')}",
+        PREWARM="false",
+        LOG_LEVEL="WARNING",
+    )
+    log = open(os.path.join(workdir, f"{mode}.log"), "wb")
+    bot = await asyncio.create_subprocess_exec(
+        sys.executable, "main.py", cwd=_PROJECT_DIR, env=env, stdout=log, stderr=log,
+    )
+    result: Dict[str, Any] = {"mode": mode, "lost": 0, "forged_rejected": None}
+    try:
+        await asyncio.wait_for(fake.ready.wait(), 60)
+        if mode == "webhook" and not fake.webhook_url:
+            result["mode"] = "webhook (fell back to polling)"
+        async with aiohttp.ClientSession() as http:
+            for _ in range(updates):
+                if not await fake.press(http):
+                    result["lost"] += 1
+            if fake.webhook_url:
+                result["forged_rejected"] = await fake.forged_post_rejected(http)
+    finally:
+        bot.terminate()
+        await bot.wait()
+        log.close()
+        await runner.cleanup()
+    result["latencies_ms"] = fake.latencies_ms
+    return result
+
+
+def _report(result: Dict[str, Any]) -> str:
+    samples = result["latencies_ms"]
+    line = (
+        f"{result['mode']:<10} p50 {_percentile(samples, 50):7.2f} ms   "
+        f"p95 {_percentile(samples, 95):7.2f} ms   p99 {_percentile(samples, 99):7.2f} ms   "
+        f"max {max(samples, default=0.0):7.2f} ms   lost {result['lost']}"
+    )
+    if result["forged_rejected"] is not None:
+        line += f"   wrong secret rejected: {'yes' if result['forged_rejected'] else 'NO'}"
+    return line
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory(prefix="fake_telegram_") as workdir:
+        results = []
+        for mode in args.modes:
+            results.append(await run_mode(mode, args.updates, args.rtt_ms, workdir))
+        if args.json:
+            print(json.dumps(results))
+            return
+        for result in results:
+            print(_report(result))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--updates", type=int, default=100)
+    parser.add_argument("--rtt-ms", type=float, default=0.0, help="simulated round trip to Telegram")
+    parser.add_argument("--modes", nargs="+", default=["polling", "webhook"], choices=["polling", "webhook"])
+    parser.add_argument("--json", action="store_true", help="print raw results as JSON")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
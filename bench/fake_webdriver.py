@@ -0,0 +1,363 @@
+"""In-process fake of the WebDriver server for microbenchmarks of the poll loop.
+
+make_driver(page) returns a real selenium Remote WebDriver whose command
+executor is FakeExecutor. Everything above the wire is the production client
+code: WebElement, the getAttribute/isDisplayed atoms sent through
+executeScript, the Alert API and the JSON encoding of every command. Only the
+browser is replaced, by FakePage, an in-memory model of the orders page:
+  - a virtualized table: `rendered` rows out of the page's orders;
+  - the refresh and filter buttons;
+  - the order modal with its Take button, and the confirm() alert.
+
+Commands are dispatched on the selector constants and script snippets the
+worker actually sends. Anything else raises UnsupportedCommand, so a new
+worker code path cannot silently fall outside the model. Refreshing the
+table re-creates its row elements, and a command on an element from an
+earlier render fails with a stale element reference, as in a browser.
+
+Each command is counted by name (executeScript also by atom). A per-command latency is added to a
+modelled clock (FakeExecutor.simulated_seconds), or actually slept when
+sleep=True.
+"""
+import json
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.firefox.options import Options
+
+from core import selenium_worker as sw
+
+ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"   # W3C web element identifier
+_ORIGIN = "https://dashboard.test"
+_SITE_TZ = timezone(timedelta(hours=3))
+
+
+class UnsupportedCommand(NotImplementedError):
+    """The worker sent something FakePage does not model."""
+
+
+class _Node:
+    __slots__ = ("kind", "slug", "index", "generation")
+
+    def __init__(self, kind: str, slug: str = "", index: int = 0, generation: int = 0) -> None:
+        self.kind = kind
+        self.slug = slug
+        self.index = index
+        self.generation = generation
+
+
+class FakeOrder:
+    __slots__ = ("slug", "amount", "created")
+
+    def __init__(self, slug: str, amount: float, created: datetime) -> None:
+        self.slug = slug
+        self.amount = amount
+        self.created = created
+
+    def cell_titles(self) -> List[str]:
+        return [
+            self.slug,
+            self.created.strftime("%d.%m.%Y %H:%M:%S"),
+            f"RUB -{self.amount:,.2f}",
+            "Новый",
+        ]
+
+
+class FakePage:
+    """In-memory orders page: what the worker can see and click."""
+
+    ROW_HEIGHT = 48
+
+    def __init__(self, rendered: int = 12) -> None:
+        self.rendered = rendered
+        self.orders: List[FakeOrder] = []     # newest first, like the live list
+        self.path = "/trader/orders"
+        self.error_page = False
+        self.refresh_present = True
+        self.modal_slug: Optional[str] = None
+        self.alert_open = False
+        self.taken: List[str] = []
+        self.generation = 0                   # bumped by every table render
+        self._seq = 0
+
+    def add_orders(self, count: int, amount: float = 10000.0) -> None:
+        now = datetime.now(_SITE_TZ)
+        for _ in range(count):
+            self._seq += 1
+            self.orders.insert(0, FakeOrder(f"trade-{self._seq:012x}", amount, now))
+
+    def render(self) -> None:
+        self.generation += 1
+
+    def visible_orders(self) -> List[FakeOrder]:
+        return self.orders[: self.rendered]
+
+    def order(self, slug: str) -> Optional[FakeOrder]:
+        return next((o for o in self.orders if o.slug == slug), None)
+
+    def inner_text(self) -> str:
+        if self.error_page:
+            return "Что-то пошло не так\nПопробуйте обновить страницу."
+        lines = ["Ордера"]
+        for order in self.visible_orders():
+            lines.append("\t".join(order.cell_titles()))
+        return "\n".join(lines)
+
+    # ── Interactions ────────────────────────────────────────────────────────
+
+    def click(self, node: _Node) -> None:
+        if node.kind == "refresh":
+            self.render()
+        elif node.kind == "anchor":
+            self.modal_slug = node.slug
+            self.path = f"/trader/orders/{node.slug}"
+        elif node.kind == "take":
+            self.alert_open = True
+        elif node.kind == "filter_button":
+            pass
+        else:
+            raise UnsupportedCommand(f"click on {node.kind}")
+
+    def accept_alert(self) -> None:
+        self.alert_open = False
+        slug = self.modal_slug
+        self.orders = [o for o in self.orders if o.slug != slug]
+        self.taken.append(slug)
+        self.close_modal()
+        self.render()
+
+    def close_modal(self) -> None:
+        self.modal_slug = None
+        self.path = "/trader/orders"
+
+
+class FakeExecutor:
+    """Stands in for RemoteConnection: execute(command, params) -> response dict."""
+
+    def __init__(self, page: FakePage, latency_ms: float = 0.0, sleep: bool = False) -> None:
+        self.page = page
+        self.latency = latency_ms / 1000
+        self.sleep = sleep
+        self.commands: Counter = Counter()
+        self.simulated_seconds = 0.0
+        self._nodes: Dict[str, _Node] = {}
+        self._ids: Dict[Tuple[str, str, int, int], str] = {}
+
+    # ── Wire ────────────────────────────────────────────────────────────────
+
+    def execute(self, command: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        body = json.dumps(params)   # the client's request encoding, as in RemoteConnection
+        if command == "w3cExecuteScript":
+            self.commands[command + "/" + _script_label(params["script"])] += 1
+        else:
+            self.commands[command] += 1
+        if self.latency:
+            self.simulated_seconds += self.latency
+            if self.sleep:
+                time.sleep(self.latency)
+        handler = getattr(self, "_cmd_" + command, None)
+        if handler is None:
+            raise UnsupportedCommand(command)
+        try:
+            value = handler(json.loads(body))
+        except _WireError as exc:
+            return {"status": exc.status, "value": json.dumps({"value": {
+                "error": exc.error, "message": exc.message, "stacktrace": "",
+            }})}
+        return json.loads(json.dumps({"value": value}))
+
+    def _ref(self, node: _Node) -> Dict[str, str]:
+        key = (node.kind, node.slug, node.index, node.generation)
+        element_id = self._ids.get(key)
+        if element_id is None:
+            element_id = self._ids[key] = f"fake-{len(self._ids)}"
+            self._nodes[element_id] = node
+        return {ELEMENT_KEY: element_id}
+
+    def _node(self, reference: Dict[str, str]) -> _Node:
+        node = self._nodes[reference[ELEMENT_KEY]]
+        in_table = node.kind in ("row", "anchor", "cell")
+        if in_table and (node.generation != self.page.generation or self.page.order(node.slug) is None):
+            raise _WireError(404, "stale element reference", "element is not attached to the page document")
+        return node
+
+    # ── Lookups ─────────────────────────────────────────────────────────────
+
+    def _find(self, using: str, value: str, parent: Optional[_Node]) -> List[_Node]:
+        page = self.page
+        locator = (using, value)
+        if parent is None:
+            if page.error_page:
+                return []
+            if locator == sw.SEL_REFRESH_BUTTON:
+                return [_Node("refresh")] if page.refresh_present else []
+            if locator == sw.SEL_FILTER_BUTTON:
+                return [_Node("filter_button")]
+            if locator == sw.SEL_TABLE_BODY:
+                return [_Node("table_body")]
+            if locator == sw.SEL_ORDER_ROWS:
+                return [
+                    _Node("row", o.slug, i, page.generation) for i, o in enumerate(page.visible_orders())
+                ]
+            if locator == sw.SEL_MODAL_TAKE_BUTTON:
+                return [_Node("take", page.modal_slug)] if page.modal_slug else []
+            if locator == (By.CSS_SELECTOR, "body"):
+                return [_Node("body")]
+        elif parent.kind == "row":
+            if locator == (By.CSS_SELECTOR, "a[href*='/trader/orders/']"):
+                return [_Node("anchor", parent.slug, parent.index, parent.generation)]
+            if locator in ((By.CSS_SELECTOR, "div[role='cell']"), (By.CSS_SELECTOR, "div[title]")):
+                return [_Node("cell", parent.slug, i, parent.generation) for i in range(4)]
+        raise UnsupportedCommand(f"find {using}={value!r} under {parent.kind if parent else 'document'}")
+
+    def _attribute(self, node: _Node, name: str) -> Optional[str]:
+        order = self.page.order(node.slug) if node.slug else None
+        if node.kind == "row" and name == "style":
+            return (
+                f"position: absolute; top: {node.index * FakePage.ROW_HEIGHT}px; "
+                f"left: 0px; width: 100%; height: {FakePage.ROW_HEIGHT}px;"
+            )
+        if node.kind == "anchor" and name == "href":
+            return f"{_ORIGIN}/trader/orders/{node.slug}"
+        if node.kind == "cell" and name == "title":
+            return order.cell_titles()[node.index] if order else None
+        if node.kind == "table_body" and name == "innerHTML":
+            return "".join(
+                f'<div role="row" class="tr" data-slug="{o.slug}"></div>' for o in self.page.visible_orders()
+            ) or '<div class="empty">Нет ордеров</div>'
+        if name == "class":
+            return ""
+        raise UnsupportedCommand(f"attribute {name!r} of {node.kind}")
+
+    # ── Commands ────────────────────────────────────────────────────────────
+
+    def _cmd_newSession(self, params):
+        return {"sessionId": "fake", "capabilities": {"browserName": "firefox"}}
+
+    def _cmd_quit(self, params):
+        return None
+
+    def _cmd_getCurrentUrl(self, params):
+        return _ORIGIN + self.page.path
+
+    def _cmd_get(self, params):
+        self.page.path = params["url"].replace(_ORIGIN, "").split("?", 1)[0] or "/"
+        self.page.error_page = False
+        self.page.refresh_present = True
+        self.page.close_modal()
+        self.page.render()
+        return None
+
+    def _cmd_findElement(self, params):
+        found = self._find(params["using"], params["value"], None)
+        if not found:
+            raise _WireError(404, "no such element", f"Unable to locate element: {params['value']}")
+        return self._ref(found[0])
+
+    def _cmd_findElements(self, params):
+        return [self._ref(n) for n in self._find(params["using"], params["value"], None)]
+
+    def _cmd_findChildElement(self, params):
+        found = self._find(params["using"], params["value"], self._node({ELEMENT_KEY: params["id"]}))
+        if not found:
+            raise _WireError(404, "no such element", f"Unable to locate element: {params['value']}")
+        return self._ref(found[0])
+
+    def _cmd_findChildElements(self, params):
+        parent = self._node({ELEMENT_KEY: params["id"]})
+        return [self._ref(n) for n in self._find(params["using"], params["value"], parent)]
+
+    def _cmd_isElementEnabled(self, params):
+        self._node({ELEMENT_KEY: params["id"]})
+        return True
+
+    def _cmd_isElementSelected(self, params):
+        self._node({ELEMENT_KEY: params["id"]})
+        return False
+
+    def _cmd_sendKeysToElement(self, params):
+        node = self._node({ELEMENT_KEY: params["id"]})
+        if node.kind == "body" and Keys.ESCAPE in params.get("text", ""):
+            self.page.close_modal()
+        return None
+
+    def _cmd_w3cGetAlertText(self, params):
+        if not self.page.alert_open:
+            raise _WireError(404, "no such alert", "No alert is open")
+        return f"Взять ордер {self.page.modal_slug}?"
+
+    def _cmd_w3cAcceptAlert(self, params):
+        if not self.page.alert_open:
+            raise _WireError(404, "no such alert", "No alert is open")
+        self.page.accept_alert()
+        return None
+
+    def _cmd_w3cExecuteScript(self, params):
+        script, args = params["script"], params["args"]
+        if script.startswith("/* getAttribute */"):
+            return self._attribute(self._node(args[0]), args[1])
+        if script.startswith("/* isDisplayed */"):
+            self._node(args[0])
+            return True
+        if script == "return document.body ? document.body.innerText : ''":
+            return self.page.inner_text()
+        if script == "return document.readyState":
+            return "complete"
+        if script == "arguments[0].click();":
+            self.page.click(self._node(args[0]))
+            return None
+        if script == sw._ROWS_CELL_TEXTS_JS:
+            return [
+                [title + "\n" + title for title in self.page.order(self._node(ref).slug).cell_titles()]
+                for ref in args[0]
+            ]
+        if "__c2cRecoveryMarker" in script:
+            return True
+        raise UnsupportedCommand(f"script {script[:60]!r}")
+
+    def _cmd_w3cExecuteScriptAsync(self, params):
+        script, args = params["script"], params["args"]
+        if script == sw._COLLECT_ALL_ROWS_JS:
+            rows = [
+                {
+                    "slug": o.slug,
+                    "scrollTop": max(0, i - 3) * FakePage.ROW_HEIGHT,
+                    "cellTitles": o.cell_titles(),
+                    "cellTexts": o.cell_titles(),
+                    "titles": o.cell_titles(),
+                }
+                for i, o in enumerate(self.page.orders)
+            ]
+            return {"visible": len(self.page.visible_orders()), "rows": rows}
+        if script == sw._SCROLL_TO_ROW_JS:
+            slug = args[0]
+            index = next((i for i, o in enumerate(self.page.orders) if o.slug == slug), None)
+            if index is None:
+                return None
+            return self._ref(_Node("row", slug, index, self.page.generation))
+        raise UnsupportedCommand(f"async script {script[:60]!r}")
+
+
+def _script_label(script: str) -> str:
+    """getAttribute / isDisplayed for selenium's atoms, else "script"."""
+    if script.startswith("/* "):
+        return script[3:script.index(" */")]
+    return "script"
+
+
+class _WireError(Exception):
+    def __init__(self, status: int, error: str, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+        self.error = error
+        self.message = message
+
+
+def make_driver(page: FakePage, latency_ms: float = 0.0, sleep: bool = False) -> webdriver.Remote:
+    """A selenium Remote driver talking to `page` through FakeExecutor."""
+    return webdriver.Remote(command_executor=FakeExecutor(page, latency_ms, sleep), options=Options())
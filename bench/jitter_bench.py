@@ -0,0 +1,216 @@
+"""Poll-cycle jitter with the worker in the bot process vs. in its own process.
+
+    python -m bench.jitter_bench --seconds 30 --latency-ms 2
+
+The real SeleniumWorker polls bench/fake_webdriver.py: _run, _poll_loop, the
+refresh, the row scan and a take whenever the feeder lists a new order. Only
+the browser is fake. Each WebDriver command sleeps for --latency-ms, as a
+round trip to geckodriver would, so the GIL is released in the same places.
+Meanwhile the "bot side" runs an asyncio load like an update burst: JSON
+decoding, handler work and SQLite stats queries. Modes:
+  idle     — worker thread alone (baseline);
+  thread   — worker thread next to the load (WORKER_MODE=thread);
+  process  — ProcessWorker with its child polling the fake
+             (WORKER_MODE=process; this module stands in for the child
+             module, so the IPC and heartbeats are the production ones).
+Reported while the load runs:
+  - cycle: _poll_once wall time;
+  - wake: how late the worker's timed waits return (the poll tick, _sleep
+    and the WebDriverWait polling), i.e. what it loses to the GIL.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Read at config import time, in this process and in the child
+os.environ.setdefault("BOT_TOKEN", "0:bench")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("LEDGER_DIR", tempfile.mkdtemp(prefix="c2c_bench_ledger_"))
+os.environ.setdefault("SESSION_FILE", os.path.join(tempfile.mkdtemp(prefix="c2c_bench_"), "session.json"))
+
+from bench.fake_webdriver import FakePage, make_driver  # noqa: E402
+from core import selenium_worker  # noqa: E402
+from core.worker_process import ProcessWorker, _child_main  # noqa: E402
+
+# Child settings and where it leaves its samples, passed through the environment
+_OUT_ENV = "JITTER_BENCH_OUT"
+_LATENCY_ENV = "JITTER_BENCH_LATENCY_MS"
+_FEED_INTERVAL = 2.0   # s between new orders, each one taken by the worker
+
+Sample = Tuple[float, float]   # (monotonic time, ms); CLOCK_MONOTONIC is shared by both processes
+
+
+class _TimedEvent(threading.Event):
+    """threading.Event that records how late each timed-out wait() returned."""
+
+    def __init__(self, samples: List[Sample]) -> None:
+        super().__init__()
+        self._samples = samples
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        if timeout is None:
+            return super().wait()
+        started = time.monotonic()
+        flag = super().wait(timeout)
+        if not flag:
+            now = time.monotonic()
+            self._samples.append((now, max(0.0, now - started - timeout) * 1000))
+        return flag
+
+
+class _BenchWorker(selenium_worker.SeleniumWorker):
+    """SeleniumWorker on a FakePage, timing its cycles and waits."""
+
+    instances: List["_BenchWorker"] = []
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.cycles: List[Sample] = []
+        self.wakes: List[Sample] = []
+        self._stop_event = _TimedEvent(self.wakes)
+        self._wake_event = _TimedEvent(self.wakes)
+        self._latency_ms = float(os.environ.get(_LATENCY_ENV, "2"))
+        _BenchWorker.instances.append(self)
+
+    def _create_driver(self):
+        page = FakePage(rendered=25)
+        page.add_orders(25)
+        self._processed_slugs.update(order.slug for order in page.orders)
+        threading.Thread(target=self._feed, args=(page,), daemon=True).start()
+        return make_driver(page, self._latency_ms, sleep=True)
+
+    def _feed(self, page: FakePage) -> None:
+        # A list append is atomic under the GIL: no lock against the worker's reads
+        while not self._stop_event.is_set():
+            time.sleep(_FEED_INTERVAL)
+            page.add_orders(1)
+
+    def _poll_once(self) -> None:
+        started = time.monotonic()
+        super()._poll_once()
+        now = time.monotonic()
+        self.cycles.append((now, (now - started) * 1000))
+
+    def samples(self) -> Dict[str, List[Sample]]:
+        return {"cycle": self.cycles, "wake": self.wakes}
+
+
+class _BenchProcessWorker(ProcessWorker):
+    _CHILD_MODULE = "bench.jitter_bench"
+
+
+def _child(fd: int, headless: bool) -> None:
+    """The ProcessWorker child, polling a FakePage; samples go to $JITTER_BENCH_OUT."""
+    selenium_worker.SeleniumWorker = _BenchWorker   # _child_main imports it by name
+    _child_main(fd, headless)
+    with open(os.environ[_OUT_ENV], "w", encoding="utf-8") as f:
+        json.dump(_BenchWorker.instances[0].samples(), f)
+
+
+async def _handle_update(db: sqlite3.Connection, payload: str) -> None:
+    update = json.loads(payload)
+    text = "\n".join(f"{k}: {v}" for k, v in update["callback_query"].items())
+    db.execute("SELECT status, COUNT(*), SUM(amount) FROM order_log GROUP BY status").fetchall()
+    # rendering a reply: pure-Python work that holds the GIL
+    json.dumps(sorted(f"{line}:{i}" for i, line in enumerate(text.split("\n") * 40)))
+    await asyncio.sleep(0)
+
+
+async def _bot_load(seconds: float) -> None:
+    db = sqlite3.connect(":memory:")
+    db.execute("CREATE TABLE order_log (id INTEGER PRIMARY KEY, amount REAL, status TEXT)")
+    db.executemany(
+        "INSERT INTO order_log (amount, status) VALUES (?, ?)",
+        [(1000.0 + i, "taken" if i % 3 else "failed") for i in range(20000)],
+    )
+    payload = json.dumps({
+        "update_id": 1,
+        "callback_query": {f"field{i}": "x" * 200 for i in range(50)},
+    })
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        # a burst of 50 updates, then a short pause
+        await asyncio.gather(*(_handle_update(db, payload) for _ in range(50)))
+        await asyncio.sleep(0.01)
+
+
+def _wait_first_cycle(worker) -> None:
+    deadline = time.monotonic() + 60
+    while not worker.last_heartbeat:
+        if time.monotonic() > deadline:
+            worker.stop()
+            raise SystemExit("Worker did not reach its first poll cycle on the fake page")
+        time.sleep(0.05)
+
+
+def _load_window(worker, seconds: float, load: bool) -> Tuple[float, float, int]:
+    """Run the bot load (or just wait) for `seconds`; (start, end, orders taken) of the window."""
+    taken: List[str] = []
+    worker._on_order_taken = lambda slug, amount: taken.append(slug)
+    started = time.monotonic()
+    if load:
+        asyncio.run(_bot_load(seconds))
+    else:
+        time.sleep(seconds)
+    return started, time.monotonic(), len(taken)
+
+
+def run(mode: str, seconds: float, latency_ms: float) -> Tuple[Dict[str, List[float]], int]:
+    """Per-metric samples (ms) taken while the load ran, and the orders taken meanwhile."""
+    os.environ[_LATENCY_ENV] = str(latency_ms)
+    callbacks = dict(on_order_taken=lambda slug, amount: None, on_order_failed=lambda slug, amount: None)
+    if mode == "process":
+        out = os.path.join(tempfile.mkdtemp(prefix="c2c_bench_"), "samples.json")
+        os.environ[_OUT_ENV] = out
+        worker = _BenchProcessWorker(**callbacks)
+        worker.start("bench", "bench", None, None)
+        _wait_first_cycle(worker)
+        started, ended, taken = _load_window(worker, seconds, load=True)
+        worker.stop()
+        with open(out, encoding="utf-8") as f:
+            samples = json.load(f)
+    else:
+        worker = _BenchWorker(**callbacks)
+        worker.start("bench", "bench", None, None)
+        _wait_first_cycle(worker)
+        started, ended, taken = _load_window(worker, seconds, load=mode == "thread")
+        worker.stop()
+        samples = worker.samples()
+    return {
+        name: [ms for at, ms in values if started <= at <= ended] for name, values in samples.items()
+    }, taken
+
+
+def _summary(samples: List[float]) -> str:
+    ordered = sorted(samples)
+    if not ordered:
+        return "no samples"
+    p50 = ordered[int(0.50 * (len(ordered) - 1))]
+    p99 = ordered[int(0.99 * (len(ordered) - 1))]
+    return f"p50 {p50:7.2f} ms  p99 {p99:7.2f} ms  max {ordered[-1]:7.2f} ms  (n={len(ordered)})"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="per WebDriver command")
+    parser.add_argument("--modes", default="idle,thread,process")
+    args = parser.parse_args()
+    for mode in args.modes.split(","):
+        samples, taken = run(mode, args.seconds, args.latency_ms)
+        print(f"{mode:<8} cycle {_summary(samples['cycle'])}")
+        print(f"{'':<8} wake  {_summary(samples['wake'])}   taken {taken}")
+
+
+if __name__ == "__main__":
+    if os.environ.get(_OUT_ENV) and len(sys.argv) == 3 and sys.argv[1].isdigit():
+        _child(int(sys.argv[1]), sys.argv[2] == "1")
+    else:
+        main()
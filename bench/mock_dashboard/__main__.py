@@ -0,0 +1,42 @@
+"""Run the mock dashboard on its own, e.g. to point a manually started bot at it.
+
+    python -m bench.mock_dashboard --port 8765 --rate 6 --competitor-ms 5000
+    BASE_URL=http://127.0.0.1:8765 python main.py
+"""
+import argparse
+import logging
+
+from aiohttp import web
+
+from bench.mock_dashboard.faults import FaultInjector, parse_rates
+from bench.mock_dashboard.server import MockDashboard
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--login", default="bench@example.com")
+    parser.add_argument("--password", default="bench")
+    parser.add_argument("--rate", type=float, default=6.0, help="new orders per minute")
+    parser.add_argument("--amount-min", type=float, default=1000.0)
+    parser.add_argument("--amount-max", type=float, default=50000.0)
+    parser.add_argument("--competitor-ms", type=float, default=0.0,
+                        help="mean time until a competitor takes an order (0 = never)")
+    parser.add_argument("--backlog", type=int, default=0, help="out-of-range orders to fill the list")
+    parser.add_argument("--faults", default="", help="fault rates per hour, e.g. error_page=12,no_refresh=4")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    dashboard = MockDashboard(
+        login=args.login, password=args.password, rate=args.rate,
+        amount_min=args.amount_min, amount_max=args.amount_max,
+        competitor_ms=args.competitor_ms, backlog=args.backlog,
+    )
+    if args.faults:
+        dashboard.faults = FaultInjector(dashboard, parse_rates(args.faults))
+    web.run_app(dashboard.app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Fault injection for the mock dashboard (soak runs of the worker's recovery paths).
+
+Kinds, and what the worker is expected to do about them:
+  session_expiry  all sessions are dropped; the next request bounces to /login
+                  (_re_authenticate);
+  error_page      the next 1..error_depth order-list requests fail and the SPA
+                  shows its error boundary (_recover_from_error_page tiers);
+  filter_lost     the SPA drops its Amount filter state, like a remount would
+                  (_filter_applied);
+  stale_rows      the table re-renders every row shortly after the list
+                  arrives, while the worker may hold references to them
+                  (StaleElementReferenceException in _process_row);
+  no_refresh      the SPA removes its refresh button until the next page load
+                  (the full-reload fallback in _poll_once).
+
+Faults arrive as a Poisson process with per-kind rates (per hour), one at a
+time: while a fault is unresolved, arrivals are counted as skipped. A fault
+fires when it is delivered to the browser. It is recovered at the first later
+order-list request that carries the amount filter again, i.e. once the worker
+is back in its steady state. Faults still open after recovery_timeout are
+closed as unrecovered.
+"""
+import asyncio
+import random
+import time
+from typing import Dict, Iterable, List, Optional
+
+from bench.mock_dashboard.server import MockOrder, _percentiles
+
+FAULT_KINDS = ("session_expiry", "error_page", "filter_lost", "stale_rows", "no_refresh")
+
+DEFAULT_RATES = "session_expiry=4,error_page=8,filter_lost=4,stale_rows=20,no_refresh=4"
+
+
+def parse_rates(spec: str) -> Dict[str, float]:
+    """"error_page=12,no_refresh=4" → {"error_page": 12.0, "no_refresh": 4.0} (per hour)."""
+    rates: Dict[str, float] = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        kind, _, value = part.partition("=")
+        kind = kind.strip()
+        if kind not in FAULT_KINDS:
+            raise ValueError(f"Unknown fault kind {kind!r} (known: {', '.join(FAULT_KINDS)})")
+        rates[kind] = float(value)
+    return rates
+
+
+class FaultEvent:
+    __slots__ = ("kind", "armed_at", "fired_at", "recovered_at", "closed_at", "remaining")
+
+    def __init__(self, kind: str, remaining: int) -> None:
+        self.kind = kind
+        self.armed_at = time.monotonic()
+        self.fired_at: Optional[float] = None
+        self.recovered_at: Optional[float] = None
+        self.closed_at: Optional[float] = None
+        self.remaining = remaining       # responses still to be faulted
+
+
+class FaultInjector:
+    def __init__(
+        self,
+        dashboard,
+        rates: Dict[str, float],
+        seed: Optional[int] = None,
+        recovery_timeout: float = 120.0,
+        error_depth: int = 3,
+    ) -> None:
+        self._dashboard = dashboard
+        self._rates = {kind: rate for kind, rate in rates.items() if rate > 0}
+        self._random = random.Random(seed)
+        self._recovery_timeout = recovery_timeout
+        self._error_depth = max(1, error_depth)
+        self._active: Optional[FaultEvent] = None
+        self._task: Optional[asyncio.Task] = None
+        self.events: List[FaultEvent] = []
+        self.skipped = 0
+
+    # ── Scheduling (server loop) ────────────────────────────────────────────
+
+    def start(self) -> None:
+        """Begin injecting; must run on the server loop."""
+        if self._rates and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        total = sum(self._rates.values())
+        next_at = time.monotonic() + self._random.expovariate(total / 3600)
+        while True:
+            await asyncio.sleep(0.5)
+            now = time.monotonic()
+            self._expire(now)
+            if now < next_at:
+                continue
+            next_at = now + self._random.expovariate(total / 3600)
+            if self._active is not None:
+                self.skipped += 1
+                continue
+            kinds = list(self._rates)
+            self.arm(self._random.choices(kinds, weights=[self._rates[k] for k in kinds])[0])
+
+    def arm(self, kind: str) -> FaultEvent:
+        """Schedule one fault now (also usable directly, via MockDashboard.call)."""
+        if kind == "error_page":
+            remaining = self._random.randint(1, self._error_depth)
+        elif kind == "session_expiry":
+            remaining = 0                # fires right away, nothing to deliver
+        else:
+            remaining = 1
+        event = FaultEvent(kind, remaining)
+        if kind == "session_expiry":
+            self._dashboard.expire_sessions()
+            event.fired_at = event.armed_at
+        self._active = event
+        self.events.append(event)
+        return event
+
+    def _expire(self, now: float) -> None:
+        event = self._active
+        if event is not None and now - (event.fired_at or event.armed_at) > self._recovery_timeout:
+            event.closed_at = now
+            self._active = None
+
+    # ── Delivery (called by the order-list handler) ─────────────────────────
+
+    def on_orders_request(self, filtered: bool) -> Dict[str, object]:
+        """Directives for this order-list response; also detects recovery.
+
+        Only filtered requests count: faults are delivered in the worker's
+        steady state, and a filtered request after delivery means it is back.
+        """
+        event = self._active
+        if event is None or not filtered:
+            return {}
+        now = time.monotonic()
+        if event.remaining:
+            event.remaining -= 1
+            if event.fired_at is None:
+                event.fired_at = now
+            return self._directive(event.kind)
+        event.recovered_at = event.closed_at = now
+        self._active = None
+        return {}
+
+    def _directive(self, kind: str) -> Dict[str, object]:
+        if kind == "error_page":
+            return {"error": True}
+        if kind == "filter_lost":
+            return {"reset_filter": True}
+        if kind == "stale_rows":
+            return {"rerender_ms": self._random.randint(50, 600)}
+        if kind == "no_refresh":
+            return {"hide_refresh": True}
+        return {}
+
+    # ── Report ──────────────────────────────────────────────────────────────
+
+    def report(self, orders: Iterable[MockOrder]) -> Dict[str, object]:
+        """Per kind: recovery times and the orders that arrived during recovery.
+
+        An order is missed when it arrived while a fault was unresolved and
+        was not taken by the worker (lost to the competitor or still open).
+        """
+        orders = [o for o in orders if not o.backlog]
+        now = time.monotonic()
+        kinds: Dict[str, Dict[str, object]] = {}
+        in_recovery = set()
+        for kind in FAULT_KINDS:
+            events = [e for e in self.events if e.kind == kind]
+            if not events:
+                continue
+            fired = [e for e in events if e.fired_at is not None]
+            recovered = [e for e in fired if e.recovered_at is not None]
+            arrived = missed = 0
+            for event in fired:
+                end = event.closed_at or now
+                window = [o for o in orders if event.fired_at <= o.injected_at <= end]
+                in_recovery.update(o.slug for o in window)
+                arrived += len(window)
+                missed += sum(1 for o in window if o.status != "taken")
+            kinds[kind] = {
+                "injected": len(events),
+                "fired": len(fired),
+                "recovered": len(recovered),
+                "unrecovered": sum(1 for e in fired if e.recovered_at is None and e.closed_at is not None),
+                "recovery_ms": _percentiles([(e.recovered_at - e.fired_at) * 1000 for e in recovered]),
+                "orders_during_recovery": arrived,
+                "missed_during_recovery": missed,
+            }
+        outside = [o for o in orders if o.slug not in in_recovery]
+        return {
+            "kinds": kinds,
+            "skipped": self.skipped,
+            "orders_outside_recovery": len(outside),
+            "missed_outside_recovery": sum(1 for o in outside if o.status != "taken"),
+        }
@@ -0,0 +1,344 @@
+"""Local stand-in for the parts of the dashboard SeleniumWorker depends on.
+
+Pages (static/):
+  - /login: the plain login form;
+  - /trader/orders: a small SPA with the same DOM the worker's selectors
+    expect (refresh and filter SVG buttons, the Amount filter panel, a
+    virtualized div[role=row].tr table, the order modal with a "Взять" button
+    and a native confirm() dialog).
+
+JSON API the SPA talks to (cookie session required):
+  GET  /api/orders?min=&max=&from=   new orders, newest first (plus fault
+                                     directives for the SPA, see faults.py)
+  GET  /api/orders/{slug}            one order (the modal)
+  POST /api/orders/{slug}/take       200 taken / 409 already gone
+  GET  /api/stats                    benchmark numbers (no auth)
+
+Orders are injected as a Poisson process at `rate` per minute. With
+`competitor_ms` > 0 a simulated competitor takes each order after an
+exponentially distributed delay. Timing of every order is kept for the
+stats:
+  - listed: first served to the table;
+  - opened: the worker opened its modal;
+  - taken: the take POST arrived.
+"""
+import asyncio
+import logging
+import os
+import random
+import secrets
+import threading
+import time
+import urllib.parse
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+_STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+_SITE_TZ = timezone(timedelta(hours=3))
+SESSION_COOKIE = "c2c_session"
+
+
+class MockOrder:
+    __slots__ = (
+        "slug", "amount", "created", "injected_at", "backlog",
+        "status", "listed_at", "opened_at", "taken_at",
+    )
+
+    def __init__(self, amount: float, backlog: bool = False) -> None:
+        self.slug = f"trade-{secrets.token_hex(6)}"
+        self.amount = amount
+        self.created = datetime.now(_SITE_TZ)
+        self.injected_at = time.monotonic()
+        self.backlog = backlog
+        self.status = "new"            # new | taken (by the worker) | lost (competitor)
+        self.listed_at: Optional[float] = None
+        self.opened_at: Optional[float] = None
+        self.taken_at: Optional[float] = None
+
+    def to_json(self) -> dict:
+        return {
+            "slug": self.slug,
+            "amount": self.amount,
+            "created": self.created.strftime("%d.%m.%Y %H:%M:%S"),
+            "status": self.status,
+        }
+
+
+def _percentiles(samples: List[float]) -> Dict[str, Optional[float]]:
+    ordered = sorted(samples)
+    if not ordered:
+        return {"count": 0, "p50": None, "p95": None, "max": None}
+    return {
+        "count": len(ordered),
+        "p50": ordered[int(0.50 * (len(ordered) - 1))],
+        "p95": ordered[int(0.95 * (len(ordered) - 1))],
+        "max": ordered[-1],
+    }
+
+
+class MockDashboard:
+    def __init__(
+        self,
+        login: str = "bench@example.com",
+        password: str = "bench",
+        rate: float = 6.0,
+        amount_min: float = 1000.0,
+        amount_max: float = 50000.0,
+        competitor_ms: float = 0.0,
+        backlog: int = 0,
+        seed: Optional[int] = None,
+        inject_on_start: bool = True,
+    ) -> None:
+        self.login = login
+        self.password = password
+        self.rate = rate
+        self.amount_min = amount_min
+        self.amount_max = amount_max
+        self.competitor_ms = competitor_ms
+        self._inject_on_start = inject_on_start
+        self._random = random.Random(seed)
+        self._orders: Dict[str, MockOrder] = {}
+        self._sessions: Dict[str, float] = {}
+        self._started_at = time.monotonic()
+        self._injector: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url = ""
+        # Optional faults.FaultInjector, set by soak runs
+        self.faults = None
+        for _ in range(backlog):
+            # Out of the benchmark's amount range: only there to fill the virtual list
+            self._add_order(self._random.uniform(amount_max * 2, amount_max * 4), backlog=True)
+
+    # ── Orders ──────────────────────────────────────────────────────────────
+
+    def _add_order(self, amount: float, backlog: bool = False) -> MockOrder:
+        order = MockOrder(round(amount / 100) * 100, backlog)
+        self._orders[order.slug] = order
+        return order
+
+    def inject(self, amount: Optional[float] = None) -> MockOrder:
+        """Add one new order now (random amount within the range by default)."""
+        if amount is None:
+            amount = self._random.uniform(self.amount_min, self.amount_max)
+        order = self._add_order(amount)
+        if self.competitor_ms > 0:
+            delay = self._random.expovariate(1000 / self.competitor_ms)
+            asyncio.get_running_loop().call_later(delay, self._competitor_takes, order)
+        return order
+
+    def _competitor_takes(self, order: MockOrder) -> None:
+        if order.status == "new":
+            order.status = "lost"
+
+    def start_injecting(self) -> None:
+        """Start order (and fault) arrivals and the stats clock; must run on the server loop."""
+        self._started_at = time.monotonic()
+        if self.rate > 0 and self._injector is None:
+            self._injector = asyncio.get_running_loop().create_task(self._inject_loop())
+        if self.faults is not None:
+            self.faults.start()
+
+    async def _inject_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._random.expovariate(self.rate / 60))
+            self.inject()
+
+    # ── Sessions ────────────────────────────────────────────────────────────
+
+    def _new_session(self) -> str:
+        token = secrets.token_urlsafe(24)
+        self._sessions[token] = time.monotonic()
+        return token
+
+    def expire_sessions(self) -> None:
+        self._sessions.clear()
+
+    def _authorized(self, request: web.Request) -> bool:
+        return request.cookies.get(SESSION_COOKIE) in self._sessions
+
+    # ── App ─────────────────────────────────────────────────────────────────
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/", self._root)
+        app.router.add_get("/login", self._login_page)
+        app.router.add_post("/login", self._login_submit)
+        app.router.add_get("/favicon.ico", self._favicon)
+        app.router.add_get("/trader", self._spa)
+        app.router.add_get("/trader/orders", self._spa)
+        app.router.add_get("/trader/orders/{slug}", self._spa)
+        app.router.add_get("/api/orders", self._api_orders)
+        app.router.add_get("/api/orders/{slug}", self._api_order)
+        app.router.add_post("/api/orders/{slug}/take", self._api_take)
+        app.router.add_get("/api/stats", self._api_stats)
+        app.router.add_static("/static", _STATIC_DIR)
+        app.on_startup.append(self._on_startup)
+        app.on_cleanup.append(self._on_cleanup)
+        return app
+
+    async def _on_startup(self, app: web.Application) -> None:
+        if self._inject_on_start:
+            self.start_injecting()
+
+    async def _on_cleanup(self, app: web.Application) -> None:
+        if self._injector is not None:
+            self._injector.cancel()
+        if self.faults is not None:
+            self.faults.stop()
+
+    @staticmethod
+    def _static(name: str) -> web.FileResponse:
+        return web.FileResponse(os.path.join(_STATIC_DIR, name))
+
+    async def _root(self, request: web.Request) -> web.StreamResponse:
+        raise web.HTTPFound("/trader/orders")
+
+    async def _login_page(self, request: web.Request) -> web.StreamResponse:
+        return self._static("login.html")
+
+    async def _login_submit(self, request: web.Request) -> web.StreamResponse:
+        form = await request.post()
+        if form.get("email") != self.login or form.get("password") != self.password:
+            raise web.HTTPFound("/login?error=1")
+        target = request.query.get("redirect") or "/trader/orders"
+        if not target.startswith("/"):
+            target = "/trader/orders"
+        response = web.HTTPFound(target)
+        response.set_cookie(SESSION_COOKIE, self._new_session(), path="/", httponly=True)
+        raise response
+
+    async def _favicon(self, request: web.Request) -> web.StreamResponse:
+        return web.Response(body=b"", content_type="image/x-icon")
+
+    async def _spa(self, request: web.Request) -> web.StreamResponse:
+        if not self._authorized(request):
+            raise web.HTTPFound("/login?redirect=" + urllib.parse.quote(request.path_qs, safe=""))
+        return self._static("app.html")
+
+    async def _api_orders(self, request: web.Request) -> web.StreamResponse:
+        if not self._authorized(request):
+            raise web.HTTPUnauthorized()
+        query = request.query
+        low = float(query["min"]) if query.get("min") else None
+        high = float(query["max"]) if query.get("max") else None
+        since: Optional[datetime] = None
+        if query.get("from"):
+            try:
+                since = datetime.fromisoformat(query["from"])
+            except ValueError:
+                since = None
+        directives = {}
+        if self.faults is not None:
+            directives = self.faults.on_orders_request(low is not None or high is not None)
+            if directives.pop("error", False):
+                raise web.HTTPInternalServerError()
+        now = time.monotonic()
+        listed = []
+        for order in reversed(list(self._orders.values())):
+            if order.status != "new":
+                continue
+            if low is not None and order.amount < low or high is not None and order.amount > high:
+                continue
+            if since is not None and order.created < since:
+                continue
+            if order.listed_at is None:
+                order.listed_at = now
+            listed.append(order.to_json())
+        return web.json_response({"orders": listed, **directives})
+
+    async def _api_order(self, request: web.Request) -> web.StreamResponse:
+        if not self._authorized(request):
+            raise web.HTTPUnauthorized()
+        order = self._orders.get(request.match_info["slug"])
+        if order is None:
+            raise web.HTTPNotFound()
+        if order.opened_at is None:
+            order.opened_at = time.monotonic()
+        return web.json_response(order.to_json())
+
+    async def _api_take(self, request: web.Request) -> web.StreamResponse:
+        if not self._authorized(request):
+            raise web.HTTPUnauthorized()
+        order = self._orders.get(request.match_info["slug"])
+        if order is None:
+            raise web.HTTPNotFound()
+        if order.status != "new":
+            return web.json_response({"ok": False, "status": order.status}, status=409)
+        order.status = "taken"
+        order.taken_at = time.monotonic()
+        return web.json_response({"ok": True})
+
+    async def _api_stats(self, request: web.Request) -> web.StreamResponse:
+        return web.json_response(self.stats())
+
+    def stats(self) -> dict:
+        orders = [o for o in self._orders.values() if not o.backlog]
+        taken = [o for o in orders if o.status == "taken"]
+        elapsed = time.monotonic() - self._started_at
+        result = {
+            "elapsed_s": elapsed,
+            "injected": len(orders),
+            "taken": len(taken),
+            "lost": sum(1 for o in orders if o.status == "lost"),
+            "pending": sum(1 for o in orders if o.status == "new"),
+            "orders_per_min": len(taken) / elapsed * 60 if elapsed else 0.0,
+            "listed_ms": _percentiles(
+                [(o.listed_at - o.injected_at) * 1000 for o in orders if o.listed_at is not None]
+            ),
+            "detection_ms": _percentiles(
+                [(o.opened_at - o.injected_at) * 1000 for o in orders if o.opened_at is not None]
+            ),
+            "take_ms": _percentiles([(o.taken_at - o.injected_at) * 1000 for o in taken]),
+        }
+        if self.faults is not None:
+            result["faults"] = self.faults.report(self._orders.values())
+        return result
+
+    # ── Running next to the code under test ─────────────────────────────────
+
+    def start_in_thread(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serve on a background thread with its own event loop; returns the base URL."""
+        started = threading.Event()
+        address: List[str] = []
+
+        async def serve() -> None:
+            self._runner = web.AppRunner(self.app())
+            await self._runner.setup()
+            site = web.TCPSite(self._runner, host, port)
+            await site.start()
+            bound = site._server.sockets[0].getsockname()
+            address.append(f"http://{bound[0]}:{bound[1]}")
+            started.set()
+
+        def run() -> None:
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(serve())
+            self._loop.run_forever()
+
+        threading.Thread(target=run, name="mock-dashboard", daemon=True).start()
+        if not started.wait(10):
+            raise RuntimeError("mock dashboard did not start")
+        self.base_url = address[0]
+        return self.base_url
+
+    def call(self, function, *args):
+        """Run function(*args) on the server loop (for inject() from other threads)."""
+        future = asyncio.run_coroutine_threadsafe(self._call(function, *args), self._loop)
+        return future.result(10)
+
+    @staticmethod
+    async def _call(function, *args):
+        return function(*args)
+
+    def stop(self) -> None:
+        if self._loop is None:
+            return
+        if self._runner is not None:
+            asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
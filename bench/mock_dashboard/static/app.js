@@ -0,0 +1,241 @@
+// Minimal SPA with the DOM SeleniumWorker expects from the real dashboard.
+(function () {
+  "use strict";
+
+  var ROW_HEIGHT = 48;
+  var OVERSCAN = 3;
+  var state = { orders: [], filter: { min: null, max: null }, listUrl: null };
+
+  var scroller = document.getElementById("scroller");
+  var rowgroup = document.getElementById("rowgroup");
+  var modal = document.getElementById("modal");
+  var modalTitle = document.getElementById("modal-title");
+  var modalBody = document.getElementById("modal-body");
+  var panel = document.getElementById("filter-panel");
+  var amountCheckbox = document.getElementById("f-amount");
+  var slidedown = document.getElementById("amount-slidedown");
+  var amountOp = document.getElementById("amount-op");
+  var amountLow = document.getElementById("amount-low");
+  var amountHigh = document.getElementById("amount-high");
+  var appRoot = document.getElementById("app");
+  var errorBoundary = document.getElementById("error-boundary");
+
+  function toLogin() {
+    window.location.href = "/login?redirect=" +
+      encodeURIComponent(window.location.pathname + window.location.search);
+  }
+
+  function formatAmount(amount) {
+    // Same shape as the live title attribute: "RUB -10,000.00"
+    return "RUB -" + amount.toLocaleString("en-US", { minimumFractionDigits: 2, maximumFractionDigits: 2 });
+  }
+
+  function escapeHtml(text) {
+    return String(text).replace(/[&<>"]/g, function (c) {
+      return { "&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;" }[c];
+    });
+  }
+
+  // ── Orders table (virtualized like react-window) ──────────────────────────
+
+  function loadOrders() {
+    rowgroup.innerHTML = '<div class="loading">Loading...</div>';
+    var params = new URLSearchParams(window.location.search);
+    if (state.filter.min !== null) { params.set("min", state.filter.min); }
+    if (state.filter.max !== null) { params.set("max", state.filter.max); }
+    return fetch("/api/orders?" + params.toString(), { credentials: "include" })
+      .then(function (response) {
+        if (response.status === 401) { toLogin(); throw new Error("unauthorized"); }
+        if (!response.ok) { showErrorBoundary(); throw new Error("HTTP " + response.status); }
+        return response.json();
+      })
+      .then(function (data) {
+        hideErrorBoundary();
+        state.orders = data.orders;
+        renderRows();
+        applyFaults(data);
+      })
+      .catch(function () {});
+  }
+
+  // Fault directives from bench/mock_dashboard/faults.py
+  function applyFaults(data) {
+    if (data.reset_filter) {
+      // State lost as on a remount: the table stays, the filter is gone
+      state.filter = { min: null, max: null };
+      amountCheckbox.checked = false;
+      slidedown.hidden = true;
+    }
+    if (data.rerender_ms) {
+      // Every row is replaced by a new node while the worker may hold the old ones
+      window.setTimeout(function () { rowgroup.innerHTML = ""; renderRows(); }, data.rerender_ms);
+    }
+    if (data.hide_refresh) {
+      var refresh = document.getElementById("refresh-button");
+      if (refresh) { refresh.parentNode.removeChild(refresh); }
+    }
+  }
+
+  function showErrorBoundary() {
+    appRoot.hidden = true;
+    errorBoundary.hidden = false;
+  }
+
+  function hideErrorBoundary() {
+    appRoot.hidden = false;
+    errorBoundary.hidden = true;
+  }
+
+  document.getElementById("error-retry").addEventListener("click", loadOrders);
+
+  function renderRows() {
+    var orders = state.orders;
+    if (!orders.length) {
+      rowgroup.style.height = "";
+      rowgroup.innerHTML = '<div class="empty">Нет ордеров по выбранным фильтрам</div>';
+      return;
+    }
+    rowgroup.style.height = orders.length * ROW_HEIGHT + "px";
+    var first = Math.max(0, Math.floor(scroller.scrollTop / ROW_HEIGHT) - OVERSCAN);
+    var last = Math.min(
+      orders.length, Math.ceil((scroller.scrollTop + scroller.clientHeight) / ROW_HEIGHT) + OVERSCAN
+    );
+    var html = [];
+    for (var i = first; i < last; i++) {
+      var o = orders[i];
+      html.push(
+        '<div role="row" class="tr" style="position: absolute; top: ' + i * ROW_HEIGHT +
+        'px; left: 0px; width: 100%; height: ' + ROW_HEIGHT + 'px;">' +
+        '<div role="cell" title="' + escapeHtml(o.slug) + '">' + escapeHtml(o.slug) + "</div>" +
+        '<div role="cell" title="' + escapeHtml(o.created) + '">' + escapeHtml(o.created) + "</div>" +
+        '<div role="cell" title="' + formatAmount(o.amount) + '">' + o.amount.toLocaleString("ru-RU") + " ₽</div>" +
+        '<div role="cell" title="Новый">Новый</div>' +
+        '<a class="row-link" href="/trader/orders/' + encodeURIComponent(o.slug) + '"></a>' +
+        "</div>"
+      );
+    }
+    rowgroup.innerHTML = html.join("");
+  }
+
+  scroller.addEventListener("scroll", renderRows);
+
+  rowgroup.addEventListener("click", function (event) {
+    var link = event.target.closest("a.row-link");
+    if (!link) { return; }
+    event.preventDefault();
+    state.listUrl = window.location.pathname + window.location.search;
+    window.history.pushState({}, "", link.getAttribute("href"));
+    route();
+  });
+
+  document.getElementById("refresh-button").addEventListener("click", loadOrders);
+
+  // ── Filter panel ──────────────────────────────────────────────────────────
+
+  document.getElementById("filter-button").addEventListener("click", function () {
+    panel.hidden = !panel.hidden;
+  });
+
+  amountCheckbox.addEventListener("change", function () {
+    slidedown.hidden = !amountCheckbox.checked;
+  });
+
+  amountOp.addEventListener("change", function () {
+    amountHigh.hidden = amountOp.value !== "is_between";
+  });
+
+  function parseAmount(input) {
+    var value = parseFloat(String(input.value).replace(/\s/g, "").replace(",", "."));
+    return isNaN(value) ? null : value;
+  }
+
+  document.getElementById("filter-done").addEventListener("click", function () {
+    if (!amountCheckbox.checked) {
+      state.filter = { min: null, max: null };
+    } else if (amountOp.value === "is_between") {
+      state.filter = { min: parseAmount(amountLow), max: parseAmount(amountHigh) };
+    } else if (amountOp.value === "is_greater") {
+      state.filter = { min: parseAmount(amountLow), max: null };
+    } else {
+      var exact = parseAmount(amountLow);
+      state.filter = { min: exact, max: exact };
+    }
+    panel.hidden = true;
+    loadOrders();
+  });
+
+  // ── Order modal ───────────────────────────────────────────────────────────
+
+  function closeModal() {
+    modal.hidden = true;
+    modalBody.innerHTML = "";
+    if (/^\/trader\/orders\/trade-/.test(window.location.pathname)) {
+      window.history.pushState({}, "", state.listUrl || "/trader/orders");
+    }
+  }
+
+  function openModal(slug) {
+    modal.hidden = false;
+    modalTitle.textContent = "Ордер " + slug;
+    modalBody.innerHTML = '<div class="loading">Загрузка...</div>';
+    fetch("/api/orders/" + encodeURIComponent(slug), { credentials: "include" })
+      .then(function (response) {
+        if (response.status === 401) { toLogin(); throw new Error("unauthorized"); }
+        return response.json();
+      })
+      .then(function (order) {
+        if (order.status !== "new") {
+          modalBody.innerHTML = "<p>Ордер недоступен</p>";
+          return;
+        }
+        modalBody.innerHTML =
+          "<p>Сумма: " + order.amount.toLocaleString("ru-RU") + " ₽</p>" +
+          '<button type="button" class="sc-a take">Взять</button>';
+        modalBody.querySelector("button.take").addEventListener("click", function () {
+          if (!window.confirm("Взять ордер " + slug + "?")) { return; }
+          takeOrder(slug);
+        });
+      })
+      .catch(function () {});
+  }
+
+  function takeOrder(slug) {
+    fetch("/api/orders/" + encodeURIComponent(slug) + "/take", { method: "POST", credentials: "include" })
+      .then(function (response) {
+        if (response.ok) {
+          state.orders = state.orders.filter(function (o) { return o.slug !== slug; });
+          renderRows();
+          closeModal();
+        } else {
+          modalBody.innerHTML = "<p>Ордер уже взят другим трейдером</p>";
+        }
+      })
+      .catch(function () {});
+  }
+
+  document.addEventListener("keydown", function (event) {
+    if (event.key === "Escape" && !modal.hidden) { closeModal(); }
+  });
+
+  // ── Routing ───────────────────────────────────────────────────────────────
+
+  function route() {
+    var match = /^\/trader\/orders\/(trade-[^\/?]+)/.exec(window.location.pathname);
+    if (match) {
+      openModal(decodeURIComponent(match[1]));
+    } else {
+      modal.hidden = true;
+      if (window.location.pathname !== "/trader/orders") {
+        window.history.replaceState({}, "", "/trader/orders" + window.location.search);
+      }
+      loadOrders();
+    }
+  }
+
+  window.addEventListener("popstate", route);
+
+  if (/^\/trader\/orders\/trade-/.test(window.location.pathname)) {
+    loadOrders();
+  }
+  route();
+})();
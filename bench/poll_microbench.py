@@ -0,0 +1,139 @@
+"""Microbenchmarks of the poll loop on the in-process fake WebDriver.
+
+    python -m bench.poll_microbench --cycles 50 --rows 10,25,50,100 --latency-ms 2
+
+No browser and no network: the worker runs against bench/fake_webdriver.py.
+Its own sleeps are counted instead of slept. Scenarios:
+  steady/N    _poll_once over N rendered rows, all already processed;
+  take/N      the same, with one new in-range order before every cycle
+              (_process_row's whole take path);
+  coverage/N  FULL_TABLE_COVERAGE over a list of N orders, 12 rendered;
+  wait_table  _wait_for_table alone.
+Reported per cycle:
+  - CPU ms (process time);
+  - WebDriver commands and the most frequent ones;
+  - the worker's sleeps;
+  - a modelled cycle time: CPU + commands × latency + sleeps.
+The per-row slope between the smallest and the largest N is shown too. The
+defaults finish in about two seconds, so CI can run it on every change.
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+
+def _scenario(
+    name: str,
+    rendered: int,
+    orders: int,
+    cycles: int,
+    latency_ms: float,
+    before_cycle: Callable = None,
+    step: str = "poll",
+) -> Dict[str, Any]:
+    from bench.fake_webdriver import FakePage, make_driver
+    from core.selenium_worker import SeleniumWorker
+
+    page = FakePage(rendered=rendered)
+    page.add_orders(orders)
+    worker = SeleniumWorker(on_order_taken=lambda slug, amount: None, on_order_failed=lambda slug, amount: None)
+    worker._driver = make_driver(page, latency_ms)
+    executor = worker._driver.command_executor
+    worker.min_amount, worker.max_amount = 1000.0, 50000.0
+    worker._filter_applied = True
+    worker._processed_slugs.update(o.slug for o in page.orders)
+    slept: List[float] = []
+    worker._sleep = slept.append
+    run = worker._poll_once if step == "poll" else worker._wait_for_table
+
+    run()   # warm-up: lazily loaded atoms, first element ids
+    executor.commands.clear()
+    slept.clear()
+    cpu_started = time.process_time()
+    for _ in range(cycles):
+        if before_cycle is not None:
+            before_cycle(page)
+        run()
+    cpu = (time.process_time() - cpu_started) / cycles
+    commands = sum(executor.commands.values()) / cycles
+    sleeps = sum(slept) / cycles
+    return {
+        "scenario": name,
+        "rows": orders,
+        "cpu_ms": cpu * 1000,
+        "commands": commands,
+        "top_commands": {k: v / cycles for k, v in executor.commands.most_common(4)},
+        "sleep_ms": sleeps * 1000,
+        "modelled_ms": (cpu + commands * latency_ms / 1000 + sleeps) * 1000,
+        "taken": len(page.taken),
+    }
+
+
+def run(cycles: int, row_counts: List[int], latency_ms: float) -> List[Dict[str, Any]]:
+    os.environ.setdefault("BOT_TOKEN", "0:bench")
+    # The ledger stays on, as in production, but its records must not land in data/
+    os.environ.setdefault("LEDGER_DIR", tempfile.mkdtemp(prefix="c2c_bench_ledger_"))
+    from core import selenium_worker as sw
+
+    results = []
+    for rows in row_counts:
+        results.append(_scenario(f"steady/{rows}", rows, rows, cycles, latency_ms))
+    for rows in row_counts:
+        results.append(_scenario(
+            f"take/{rows}", rows, rows, cycles, latency_ms, before_cycle=lambda page: page.add_orders(1),
+        ))
+    full_table_coverage = sw.FULL_TABLE_COVERAGE
+    sw.FULL_TABLE_COVERAGE = True
+    try:
+        for rows in row_counts:
+            results.append(_scenario(f"coverage/{rows}", 12, rows, cycles, latency_ms))
+    finally:
+        sw.FULL_TABLE_COVERAGE = full_table_coverage
+    results.append(_scenario("wait_table", 12, 12, cycles, latency_ms, step="wait"))
+    return results
+
+
+def _slopes(results: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    slopes = {}
+    for kind in ("steady", "take", "coverage"):
+        series = sorted((r for r in results if r["scenario"].startswith(kind + "/")), key=lambda r: r["rows"])
+        if len(series) >= 2 and series[-1]["rows"] > series[0]["rows"]:
+            span = series[-1]["rows"] - series[0]["rows"]
+            slopes[kind] = {
+                "cpu_ms_per_row": (series[-1]["cpu_ms"] - series[0]["cpu_ms"]) / span,
+                "commands_per_row": (series[-1]["commands"] - series[0]["commands"]) / span,
+            }
+    return slopes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--rows", default="10,25,50", help="comma-separated row counts")
+    parser.add_argument("--latency-ms", type=float, default=2.0,
+                        help="modelled WebDriver round trip (local geckodriver is ~1-5 ms)")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    results = run(args.cycles, [int(r) for r in args.rows.split(",")], args.latency_ms)
+    slopes = _slopes(results)
+    if args.json:
+        print(json.dumps({"results": results, "per_row": slopes}))
+        return
+    print(f"{'scenario':<14}{'cpu ms':>9}{'cmds':>8}{'sleep ms':>10}{'model ms':>10}   top commands / cycle")
+    for r in results:
+        top = ", ".join(f"{name} {count:.0f}" for name, count in r["top_commands"].items())
+        print(f"{r['scenario']:<14}{r['cpu_ms']:>9.2f}{r['commands']:>8.0f}{r['sleep_ms']:>10.0f}"
+              f"{r['modelled_ms']:>10.1f}   {top}")
+    print()
+    for kind, slope in slopes.items():
+        print(f"per row ({kind}): {slope['cpu_ms_per_row']:.3f} ms CPU, {slope['commands_per_row']:.1f} commands")
+
+
+if __name__ == "__main__":
+    main()
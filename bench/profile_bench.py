@@ -0,0 +1,109 @@
+"""Compare the default and the lean Firefox profile on the live orders page.
+
+    python -m bench.profile_bench --refreshes 200
+
+For each profile: cold start (driver + login + filter + table) time, then N
+refresh clicks measuring table render time, plus CPU seconds and RSS of the
+geckodriver/Firefox tree. Credentials come from C2C_LOGIN / C2C_PASSWORD or,
+failing that, from the settings row in the bot database.
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import statistics
+import time
+from typing import Dict, List, Optional, Tuple
+
+from selenium.webdriver.support import expected_conditions as EC
+
+from config import DATABASE_URL, HEADLESS
+from core.procinfo import tree_cpu_seconds, tree_rss
+from core.selenium_worker import SEL_REFRESH_BUTTON, SeleniumWorker
+
+logger = logging.getLogger(__name__)
+
+
+def _load_credentials() -> Tuple[str, str, Optional[float], Optional[float]]:
+    login = os.getenv("C2C_LOGIN")
+    password = os.getenv("C2C_PASSWORD")
+    if login and password:
+        return login, password, None, None
+    con = sqlite3.connect(DATABASE_URL.replace("sqlite+aiosqlite:///", ""))
+    try:
+        row = con.execute(
+            "SELECT login, password, min_amount, max_amount FROM settings WHERE id = 1"
+        ).fetchone()
+    finally:
+        con.close()
+    if not row or not row[0] or not row[1]:
+        raise SystemExit("No credentials: set C2C_LOGIN/C2C_PASSWORD or save them in the bot")
+    return row[0], row[1], row[2], row[3]
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[int(pct / 100 * (len(ordered) - 1))] if ordered else 0.0
+
+
+def run_profile(lean: bool, refreshes: int) -> Dict[str, float]:
+    login, password, min_amount, max_amount = _load_credentials()
+    worker = SeleniumWorker(
+        on_order_taken=lambda slug, amount: None,
+        on_order_failed=lambda slug, amount: None,
+        headless=HEADLESS,
+        lean_profile=lean,
+    )
+    worker.login, worker.password = login, password
+    worker.min_amount, worker.max_amount = min_amount, max_amount
+
+    started = time.monotonic()
+    worker._driver = worker._create_driver()
+    try:
+        worker._navigate_to_orders()
+        worker._apply_amount_filter()
+        startup = time.monotonic() - started
+
+        pid = worker._driver_pid(worker._driver)
+        cpu_before = tree_cpu_seconds(pid)
+        render_ms: List[float] = []
+        loop_started = time.monotonic()
+        for _ in range(refreshes):
+            button = worker._wait(5).until(EC.element_to_be_clickable(SEL_REFRESH_BUTTON))
+            clicked = time.monotonic()
+            worker._driver.execute_script("arguments[0].click();", button)
+            worker._wait_for_table()
+            render_ms.append((time.monotonic() - clicked) * 1000)
+        wall = time.monotonic() - loop_started
+        return {
+            "startup_s": startup,
+            "render_p50_ms": statistics.median(render_ms) if render_ms else 0.0,
+            "render_p95_ms": _percentile(render_ms, 95),
+            "cpu_per_refresh_ms": (tree_cpu_seconds(pid) - cpu_before) / max(refreshes, 1) * 1000,
+            "cpu_util_pct": (tree_cpu_seconds(pid) - cpu_before) / wall * 100 if wall else 0.0,
+            "rss_mb": tree_rss(pid) / (1024 * 1024),
+        }
+    finally:
+        worker._quit_driver()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--refreshes", type=int, default=100)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    results = {
+        "default": run_profile(lean=False, refreshes=args.refreshes),
+        "lean": run_profile(lean=True, refreshes=args.refreshes),
+    }
+    metrics = list(results["default"])
+    print(f"{'metric':<22}{'default':>12}{'lean':>12}{'change':>10}")
+    for metric in metrics:
+        a, b = results["default"][metric], results["lean"][metric]
+        change = f"{(b - a) / a * 100:+.0f}%" if a else "—"
+        print(f"{metric:<22}{a:>12.1f}{b:>12.1f}{change:>10}")
+
+
+if __name__ == "__main__":
+    main()
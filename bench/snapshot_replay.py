@@ -0,0 +1,331 @@
+"""Replay stored page snapshots through the worker's parsers and selectors.
+
+    python -m bench.snapshot_replay --dir data/snapshots --repeat 3
+    python -m bench.snapshot_replay --write-baseline data/snapshots/baseline.json
+    python -m bench.snapshot_replay --baseline data/snapshots/baseline.json
+
+Snapshots come from SNAPSHOT_CAPTURE=true (core/snapshots.py). Each one is
+parsed with lxml, wrapped in SnapshotElement, the slice of the WebElement API
+the parsers use, and run through the real code:
+  - table:  SEL_ORDER_ROWS, _extract_slug, _extract_amount (and whether the
+            full-coverage path, _amount_from_titles, agrees); the refresh and
+            filter buttons; no false error-page detection;
+  - modal:  no false error-page detection, and whether SEL_MODAL_TAKE_BUTTON
+            finds a button the live run missed (informational);
+  - filter: SEL_FILTER_BUTTON, SEL_AMOUNT_CHECKBOX, SEL_AMOUNT_SELECT,
+            SEL_AMOUNT_INPUTS, SEL_FILTER_SUBMIT;
+  - error:  _is_error_text on the captured innerText.
+Failed checks are reported per kind and per capture day, so a site redeploy
+shows up as the day a check started failing. With --baseline, the parsed
+rows and checks are compared with an earlier run, so a code change that
+alters any result is listed as a regression (or a fix).
+
+Throughput is reported separately for HTML parsing and for extraction. Needs
+lxml and cssselect (pip install lxml cssselect); the bot itself does not.
+"""
+import argparse
+import functools
+import json
+import logging
+import os
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional
+
+try:
+    import lxml.html
+    from cssselect import GenericTranslator
+    from lxml import etree
+except ImportError:   # pragma: no cover - bench-only dependencies
+    raise SystemExit("snapshot_replay needs lxml and cssselect: pip install lxml cssselect")
+
+logger = logging.getLogger(__name__)
+
+# Attributes WebElement.get_attribute() reports as "true"/None
+_BOOLEAN_ATTRIBUTES = frozenset({"checked", "selected", "disabled", "hidden", "readonly", "multiple"})
+
+
+@functools.lru_cache(maxsize=None)
+def _css_to_xpath(selector: str) -> etree.XPath:
+    return etree.XPath(GenericTranslator().css_to_xpath(selector, prefix="descendant::"))
+
+
+@functools.lru_cache(maxsize=None)
+def _xpath(expression: str) -> etree.XPath:
+    return etree.XPath(expression)
+
+
+class SnapshotElement:
+    """The WebElement methods the worker's parsers call, over an lxml element."""
+
+    __slots__ = ("_element",)
+
+    def __init__(self, element) -> None:
+        self._element = element
+
+    def find_elements(self, by: str, value: str) -> List["SnapshotElement"]:
+        if by == "css selector":
+            query = _css_to_xpath(value)
+        elif by == "xpath":
+            query = _xpath(value)
+        elif by == "tag name":
+            query = _css_to_xpath(value)
+        else:
+            raise ValueError(f"Unsupported locator strategy {by!r}")
+        return [SnapshotElement(e) for e in query(self._element) if isinstance(e, etree._Element)]
+
+    def find_element(self, by: str, value: str) -> "SnapshotElement":
+        from selenium.common.exceptions import NoSuchElementException
+
+        found = self.find_elements(by, value)
+        if not found:
+            raise NoSuchElementException(f"{by}={value}")
+        return found[0]
+
+    def get_attribute(self, name: str) -> Optional[str]:
+        value = self._element.get(name)
+        if name in _BOOLEAN_ATTRIBUTES:
+            return "true" if value is not None else None
+        return value
+
+    def is_displayed(self) -> bool:
+        element = self._element
+        while element is not None:
+            if element.get("hidden") is not None or element.get("data-c2c-hidden") is not None:
+                return False
+            style = (element.get("style") or "").replace(" ", "").lower()
+            if "display:none" in style or "visibility:hidden" in style:
+                return False
+            element = element.getparent()
+        return True
+
+    def is_enabled(self) -> bool:
+        return self._element.get("disabled") is None
+
+    def is_selected(self) -> bool:
+        return self._element.get("checked") is not None or self._element.get("selected") is not None
+
+    @property
+    def text(self) -> str:
+        return " ".join(self._element.text_content().split()) if self.is_displayed() else ""
+
+
+def _clickable(document: SnapshotElement, locator) -> bool:
+    return any(e.is_displayed() and e.is_enabled() for e in document.find_elements(*locator))
+
+
+# ── Checks ──────────────────────────────────────────────────────────────────
+
+def _check_table(sw, document: SnapshotElement, text: str) -> Dict[str, Any]:
+    checks = {
+        "table_body": bool(document.find_elements(*sw.SEL_TABLE_BODY)),
+        "refresh_button": _clickable(document, sw.SEL_REFRESH_BUTTON),
+        "filter_button": _clickable(document, sw.SEL_FILTER_BUTTON),
+        "not_error_page": not sw._is_error_text(text),
+    }
+    rows = []
+    for row in document.find_elements(*sw.SEL_ORDER_ROWS):
+        if "position: absolute" not in (row.get_attribute("style") or ""):
+            continue
+        slug = sw._extract_slug(row)
+        amount = sw._extract_amount(row)
+        cell_titles = [c.get_attribute("title") or "" for c in row.find_elements("css selector", "div[role='cell']")]
+        titles = [d.get_attribute("title") or "" for d in row.find_elements("css selector", "div[title]")]
+        rows.append([slug, amount])
+        checks["row_slug"] = checks.get("row_slug", True) and slug is not None
+        checks["row_amount"] = checks.get("row_amount", True) and amount is not None
+        checks["titles_agree"] = (
+            checks.get("titles_agree", True) and sw._amount_from_titles(cell_titles, titles) == amount
+        )
+    return {"checks": checks, "rows": rows}
+
+
+def _check_modal(sw, document: SnapshotElement, text: str) -> Dict[str, Any]:
+    return {
+        "checks": {"not_error_page": not sw._is_error_text(text)},
+        # Informational: modals are captured on failed takes, where a Take
+        # button is usually absent; one found here points at a selector miss
+        "take_button": _clickable(document, sw.SEL_MODAL_TAKE_BUTTON),
+    }
+
+
+def _check_filter(sw, document: SnapshotElement, text: str) -> Dict[str, Any]:
+    selects = document.find_elements(*sw.SEL_AMOUNT_SELECT)
+    between = any(
+        o.get_attribute("value") == "is_between" and o.is_selected()
+        for s in selects for o in s.find_elements("tag name", "option")
+    )
+    visible_inputs = [i for i in document.find_elements(*sw.SEL_AMOUNT_INPUTS) if i.is_displayed()]
+    return {"checks": {
+        "filter_button": _clickable(document, sw.SEL_FILTER_BUTTON),
+        "amount_checkbox": bool(document.find_elements(*sw.SEL_AMOUNT_CHECKBOX)),
+        "amount_select": any(s.is_displayed() for s in selects),
+        "amount_inputs": len(visible_inputs) >= (2 if between else 1),
+        "filter_submit": _clickable(document, sw.SEL_FILTER_SUBMIT),
+    }}
+
+
+def _check_error(sw, document: SnapshotElement, text: str) -> Dict[str, Any]:
+    return {
+        "checks": {"error_detected": sw._is_error_text(text)},
+        # Informational: decides whether recovery can start with the cheapest tier
+        "retry_button": bool(document.find_elements(*sw.SEL_ERROR_RETRY_BUTTON)),
+    }
+
+
+_CHECKS = {"table": _check_table, "modal": _check_modal, "filter": _check_filter, "error": _check_error}
+
+
+# ── Replay ──────────────────────────────────────────────────────────────────
+
+def replay(directory: str, repeat: int = 1, limit: int = 0) -> Dict[str, Any]:
+    os.environ.setdefault("BOT_TOKEN", "0:bench")
+    from core import selenium_worker as sw
+    from core.snapshots import iter_snapshot_files, load_snapshot
+
+    paths = list(iter_snapshot_files(directory))
+    if limit:
+        paths = paths[-limit:]
+    snapshots = [(os.path.relpath(p, directory), load_snapshot(p)) for p in paths]
+
+    results: Dict[str, Dict[str, Any]] = {}
+    parse_seconds = extract_seconds = 0.0
+    for _ in range(max(1, repeat)):
+        for name, snapshot in snapshots:
+            started = time.perf_counter()
+            document = SnapshotElement(lxml.html.document_fromstring(snapshot["html"]))
+            parsed = time.perf_counter()
+            result = _CHECKS[snapshot["meta"]["kind"]](sw, document, snapshot.get("text") or "")
+            extract_seconds += time.perf_counter() - parsed
+            parse_seconds += parsed - started
+            result["kind"] = snapshot["meta"]["kind"]
+            result["day"] = (snapshot["meta"].get("captured_at") or "")[:10]
+            results[name] = result
+
+    # Pure parser throughput over every amount title seen in the table snapshots
+    amount_titles = [
+        title
+        for _, snapshot in snapshots if snapshot["meta"]["kind"] == "table"
+        for title in _amount_titles(snapshot["html"])
+    ]
+    parser_rate = 0.0
+    if amount_titles:
+        started = time.perf_counter()
+        for _ in range(max(1, repeat)):
+            for title in amount_titles:
+                sw._parse_amount_title(title)
+        parser_rate = len(amount_titles) * max(1, repeat) / (time.perf_counter() - started)
+
+    runs = len(snapshots) * max(1, repeat)
+    rows = sum(len(r.get("rows", ())) for r in results.values()) * max(1, repeat)
+    return {
+        "snapshots": len(snapshots),
+        "results": results,
+        "throughput": {
+            "parse_per_s": runs / parse_seconds if parse_seconds else 0.0,
+            "extract_per_s": runs / extract_seconds if extract_seconds else 0.0,
+            "rows_per_s": rows / extract_seconds if extract_seconds else 0.0,
+            "amount_titles_per_s": parser_rate,
+        },
+    }
+
+
+def _amount_titles(html: str) -> List[str]:
+    document = lxml.html.document_fromstring(html)
+    return [t for t in document.xpath("//div[@role='cell']/@title") if "RUB" in t]
+
+
+def failures(results: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Per kind and check: failures, and the capture days they occurred on."""
+    summary: Dict[str, Dict[str, Any]] = defaultdict(lambda: {"snapshots": 0, "failed": Counter(), "days": {}})
+    for result in results.values():
+        kind = summary[result["kind"]]
+        kind["snapshots"] += 1
+        for check, passed in result["checks"].items():
+            if not passed:
+                kind["failed"][check] += 1
+                kind["days"].setdefault(check, Counter())[result["day"]] += 1
+    return summary
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]]) -> Dict[str, List[str]]:
+    """Snapshots whose rows or checks differ from the baseline run."""
+    regressions, fixes, changed_rows = [], [], []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        for check, passed in result["checks"].items():
+            was = before["checks"].get(check)
+            if was and not passed:
+                regressions.append(f"{name}: {check}")
+            elif was is False and passed:
+                fixes.append(f"{name}: {check}")
+        if result.get("rows") != before.get("rows"):
+            changed_rows.append(name)
+    return {"regressions": regressions, "fixes": fixes, "changed_rows": changed_rows}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--dir", default=None, help="snapshot directory (default: SNAPSHOT_DIR)")
+    parser.add_argument("--repeat", type=int, default=1, help="replay every snapshot N times for timing")
+    parser.add_argument("--limit", type=int, default=0, help="only the newest N snapshots per run")
+    parser.add_argument("--baseline", help="compare with the results stored in this file")
+    parser.add_argument("--write-baseline", help="store this run's results in this file")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    directory = args.dir
+    if directory is None:
+        os.environ.setdefault("BOT_TOKEN", "0:bench")
+        from config import SNAPSHOT_DIR
+        directory = SNAPSHOT_DIR
+    report = replay(directory, args.repeat, args.limit)
+    if not report["snapshots"]:
+        raise SystemExit(f"No snapshots under {directory} (capture with SNAPSHOT_CAPTURE=true)")
+    summary = failures(report["results"])
+    diff = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            diff = compare(report["results"], json.load(f))
+    if args.write_baseline:
+        with open(args.write_baseline, "w", encoding="utf-8") as f:
+            json.dump(report["results"], f, ensure_ascii=False)
+
+    if args.json:
+        print(json.dumps({
+            "snapshots": report["snapshots"],
+            "throughput": report["throughput"],
+            "failures": {k: {"snapshots": v["snapshots"], "failed": dict(v["failed"])} for k, v in summary.items()},
+            "baseline": diff,
+        }))
+        return
+    throughput = report["throughput"]
+    print(f"{report['snapshots']} snapshots × {args.repeat}")
+    print(f"  HTML parse      {throughput['parse_per_s']:10.1f} snapshots/s")
+    print(f"  extraction      {throughput['extract_per_s']:10.1f} snapshots/s   "
+          f"{throughput['rows_per_s']:10.1f} rows/s")
+    print(f"  amount titles   {throughput['amount_titles_per_s']:10.0f} /s (_parse_amount_title)")
+    print()
+    for kind, stats in summary.items():
+        failed = stats["failed"]
+        print(f"{kind:<8}{stats['snapshots']:>6} snapshots   " + (", ".join(
+            f"{check} failed {count}" for check, count in failed.items()
+        ) or "all checks pass"))
+        for check, days in stats["days"].items():
+            first = min(days)
+            print(f"          {check}: first failing capture {first}, by day {dict(sorted(days.items()))}")
+    if diff is not None:
+        print()
+        print(f"vs baseline: {len(diff['regressions'])} regressions, {len(diff['fixes'])} fixes, "
+              f"{len(diff['changed_rows'])} snapshots with different rows")
+        for line in diff["regressions"][:20]:
+            print(f"  regression  {line}")
+        for name in diff["changed_rows"][:20]:
+            print(f"  rows differ {name}")
+
+
+if __name__ == "__main__":
+    main()
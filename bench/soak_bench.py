@@ -0,0 +1,210 @@
+"""Soak the real SeleniumWorker against the mock dashboard with injected faults.
+
+    python -m bench.soak_bench --hours 4 --faults session_expiry=4,error_page=8,stale_rows=20
+
+The setup is the same as bench.e2e_bench. In addition, a FaultInjector
+(bench/mock_dashboard/faults.py) triggers session expiry, error pages, lost
+filters, stale rows and a missing refresh button at the given rates per hour,
+one fault at a time. The report gives:
+  - per fault kind: time to recovery (fault delivered → next filtered table
+    request), unrecovered faults, and orders missed while recovering vs. the
+    miss rate outside recovery;
+  - the worker's recovery tiers and take outcomes;
+  - memory and FD growth, as slopes per hour, of this process (the worker
+    thread; the mock server shares it) and of the geckodriver/Firefox tree.
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from bench.e2e_bench import _format, start_worker
+from bench.mock_dashboard.faults import DEFAULT_RATES, FaultInjector, parse_rates
+from bench.mock_dashboard.server import MockDashboard
+from core.procinfo import open_fds, process_tree, rss_bytes, tree_open_fds, tree_rss
+
+
+def _slope_per_hour(points: List[tuple]) -> float:
+    """Least-squares slope of (hours, value) points."""
+    if len(points) < 2:
+        return 0.0
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    var_x = sum((x - mean_x) ** 2 for x, _ in points)
+    if not var_x:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / var_x
+
+
+class _ResourceSampler:
+    """Samples RSS and FDs of this process and of the browser tree on a thread."""
+
+    def __init__(self, worker, interval: float) -> None:
+        self._worker = worker
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = time.monotonic()
+        self.samples: List[Dict[str, float]] = []
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="soak-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self._interval + 5)
+
+    def _run(self) -> None:
+        while True:
+            self.sample()
+            if self._stop.wait(self._interval):
+                return
+
+    def sample(self) -> None:
+        driver = self._worker._driver
+        pid = self._worker._driver_pid(driver) if driver is not None else None
+        own = os.getpid()
+        self.samples.append({
+            "hours": (time.monotonic() - self._started) / 3600,
+            "process_rss_mb": rss_bytes(own) / 2**20,
+            "process_fds": open_fds(own),
+            "browser_rss_mb": tree_rss(pid) / 2**20 if pid else 0.0,
+            "browser_fds": tree_open_fds(pid) if pid else 0,
+            "browser_processes": len(process_tree(pid)) if pid else 0,
+            "driver_pid": pid or 0,
+        })
+
+    def growth(self) -> Dict[str, Dict[str, float]]:
+        result = {}
+        for key in ("process_rss_mb", "process_fds", "browser_rss_mb", "browser_fds", "browser_processes"):
+            # Skip samples taken while the driver was being replaced
+            points = [
+                (s["hours"], s[key]) for s in self.samples
+                if s["driver_pid"] or key.startswith("process")
+            ]
+            if not points:
+                continue
+            values = [v for _, v in points]
+            result[key] = {
+                "first": values[0],
+                "last": values[-1],
+                "max": max(values),
+                "per_hour": _slope_per_hour(points),
+            }
+        result["driver_pids"] = {"count": len({s["driver_pid"] for s in self.samples if s["driver_pid"]})}
+        return result
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    dashboard = MockDashboard(
+        rate=args.rate,
+        amount_min=args.amount_min,
+        amount_max=args.amount_max,
+        competitor_ms=args.competitor_ms,
+        backlog=args.backlog,
+        seed=args.seed,
+        inject_on_start=False,
+    )
+    dashboard.faults = FaultInjector(
+        dashboard, parse_rates(args.faults), seed=args.seed,
+        recovery_timeout=args.recovery_timeout, error_depth=args.error_depth,
+    )
+    dashboard.start_in_thread()
+    try:
+        worker, reported, startup_s = start_worker(dashboard, args.amount_min, args.amount_max)
+        sampler = _ResourceSampler(worker, args.sample_every)
+        try:
+            dashboard.call(dashboard.start_injecting)
+            sampler.start()
+            time.sleep(args.hours * 3600)
+            sampler.stop()
+            sampler.sample()
+            result = dashboard.call(dashboard.stats)
+        finally:
+            worker.stop()
+    finally:
+        dashboard.stop()
+
+    result["startup_s"] = startup_s
+    result["worker_reported_takes"] = len(reported)
+    result["take_outcomes"] = worker.take_stats.summary()["outcomes"]
+    result["recovery_tiers"] = {
+        tier: {"attempts": stats["attempts"], "successes": stats["successes"]}
+        for tier, stats in worker.recovery_stats.items()
+    }
+    result["reauths"] = worker.reactive_reauths
+    result["resources"] = sampler.growth()
+    if args.samples:
+        result["resource_samples"] = sampler.samples
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--hours", type=float, default=2.0)
+    parser.add_argument("--rate", type=float, default=6.0, help="new orders per minute")
+    parser.add_argument("--faults", default=DEFAULT_RATES, help="kind=per_hour,... (see faults.py)")
+    parser.add_argument("--error-depth", type=int, default=3,
+                        help="an error page fault fails 1..N consecutive table requests")
+    parser.add_argument("--recovery-timeout", type=float, default=120.0,
+                        help="seconds after which a fault counts as unrecovered")
+    parser.add_argument("--amount-min", type=float, default=1000.0)
+    parser.add_argument("--amount-max", type=float, default=50000.0)
+    parser.add_argument("--competitor-ms", type=float, default=30000.0,
+                        help="mean time until a competitor takes an order (0 = never)")
+    parser.add_argument("--backlog", type=int, default=200, help="out-of-range orders in the list")
+    parser.add_argument("--sample-every", type=float, default=60.0, help="resource sampling interval, s")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--samples", action="store_true", help="include raw resource samples in --json")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    result = run(args)
+    if args.json:
+        print(json.dumps(result))
+        return
+    faults = result["faults"]
+    print(f"{result['elapsed_s'] / 3600:.2f} h, {result['injected']} orders, {result['taken']} taken, "
+          f"{result['orders_per_min']:.2f}/min, {faults['skipped']} fault arrivals skipped (one at a time)")
+    print()
+    print(f"{'fault':<16}{'fired':>6}{'recov':>6}{'unrec':>6}   recovery")
+    for kind, stats in faults["kinds"].items():
+        print(f"{kind:<16}{stats['fired']:>6}{stats['recovered']:>6}{stats['unrecovered']:>6}   "
+              f"{_format(stats['recovery_ms'])}")
+    print()
+    print("missed orders (not taken by the worker):")
+    for kind, stats in faults["kinds"].items():
+        arrived = stats["orders_during_recovery"]
+        share = stats["missed_during_recovery"] / arrived * 100 if arrived else 0.0
+        print(f"  during {kind:<16}{stats['missed_during_recovery']:>5} / {arrived:<5} ({share:.0f}%)")
+    outside = faults["orders_outside_recovery"]
+    share = faults["missed_outside_recovery"] / outside * 100 if outside else 0.0
+    print(f"  {'outside recovery':<23}{faults['missed_outside_recovery']:>5} / {outside:<5} ({share:.0f}%)")
+    print()
+    print("worker recovery tiers: " + (", ".join(
+        f"{tier} {s['successes']}/{s['attempts']}" for tier, s in result["recovery_tiers"].items()
+    ) or "—") + f"; reauths {result['reauths']}")
+    print("take outcomes: " + (", ".join(
+        f"{outcome} {count}" for outcome, count in result["take_outcomes"].items()
+    ) or "—"))
+    print()
+    resources = result["resources"]
+    print(f"{'resource':<20}{'first':>10}{'last':>10}{'max':>10}{'per hour':>11}")
+    for key, stats in resources.items():
+        if key == "driver_pids":
+            continue
+        print(f"{key:<20}{stats['first']:>10.1f}{stats['last']:>10.1f}{stats['max']:>10.1f}"
+              f"{stats['per_hour']:>+11.2f}")
+    if resources["driver_pids"]["count"] > 1:
+        print(f"(driver replaced during the run: {resources['driver_pids']['count']} browser trees sampled)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,19 @@
+import asyncio
+import logging
+import math
+
 from aiogram import F, Router
-from aiogram.types import CallbackQuery
+from aiogram.filters import Command, CommandObject
+from aiogram.types import BufferedInputFile, CallbackQuery, Message
 
-from bot.keyboards.inline import main_menu_keyboard
+from bot.keyboards.inline import main_menu_keyboard, stats_keyboard
+from config import ANALYTICS_DAYS
+from core.order_processor import START_NO_CREDENTIALS
+from core.take_trace import OUTCOME_LABELS, STAGE_LABELS, STAGES
 from db.engine import get_session
-from db.repository import OrderLogRepository, SettingsRepository
+from db.repository import OrderLogRepository, SettingsRepository, TakeTraceRepository
+
+logger = logging.getLogger(__name__)
 
 router = Router()
 
@@ -21,8 +31,8 @@ async def bot_start(callback: CallbackQuery) -> None:
 
     if not success:
         await callback.message.edit_text(
-            "Не удалось запустить: не заданы логин и пароль.\nПерейдите в настройки.",
-            reply_markup=main_menu_keyboard(False, False),
+            f"Не удалось запустить: {processor.start_error}",
+            reply_markup=main_menu_keyboard(False, processor.start_error != START_NO_CREDENTIALS),
         )
     else:
         await callback.message.edit_text(
@@ -69,6 +79,7 @@ async def stats_show(callback: CallbackQuery) -> None:
         taken = await log_repo.count_taken()
         failed = await log_repo.count_failed()
         last = await log_repo.last_entries(5)
+        outcomes = await TakeTraceRepository(session).outcome_counts()
 
     lines = [
         f"Статистика\n",
@@ -76,6 +87,29 @@ async def stats_show(callback: CallbackQuery) -> None:
         f"Ошибок: {failed}",
     ]
 
+    from main import processor
+    sup = processor.supervisor_stats()
+    if sup and sup["restarts"]:
+        lines.append(
+            f"Перезапусков воркера: {sup['restarts']} "
+            f"(простой {sup['downtime_total']:.0f} с)"
+        )
+
+    if outcomes:
+        lines.append("\nПопытки взятия:")
+        for outcome, count in sorted(outcomes.items(), key=lambda item: -item[1]):
+            lines.append(f"  {OUTCOME_LABELS.get(outcome, outcome)}: {count}")
+
+    traces = processor.take_stats()
+    if traces and any(stage["count"] for stage in traces["stages"].values()):
+        lines.append("\nВремя с появления ордера, мс (p50 / p90 / p99):")
+        for stage in STAGES:
+            st = traces["stages"][stage]
+            if st["count"]:
+                lines.append(
+                    f"  {STAGE_LABELS[stage]}: {st['p50']:.0f} / {st['p90']:.0f} / {st['p99']:.0f}"
+                )
+
     if last:
         lines.append("\nПоследние 5 записей:")
         for entry in last:
@@ -84,8 +118,93 @@ async def stats_show(callback: CallbackQuery) -> None:
             icon = "+" if entry.status == "taken" else "x"
             lines.append(f"[{icon}] {dt_str}  {amount_str}  <code>{entry.order_slug[:18]}...</code>")
 
-    await callback.message.answer("\n".join(lines), parse_mode="HTML")
+    await callback.message.answer("\n".join(lines), parse_mode="HTML", reply_markup=stats_keyboard())
+    await callback.answer()
+
+
+@router.callback_query(F.data == "stats:analytics")
+async def stats_analytics(callback: CallbackQuery) -> None:
+    from core import analytics   # numpy; kept off the startup path
+
+    await callback.answer()
+    report = await asyncio.to_thread(analytics.get_report, ANALYTICS_DAYS)
+    await callback.message.answer(analytics.render_text(report), parse_mode="HTML")
+
+
+@router.callback_query(F.data == "stats:chart")
+async def stats_chart(callback: CallbackQuery) -> None:
+    from core import analytics
+
+    report = await asyncio.to_thread(analytics.get_report, ANALYTICS_DAYS)
+    try:
+        png = await asyncio.to_thread(analytics.render_chart, report)
+    except ImportError:
+        await callback.answer("Графики недоступны: не установлен matplotlib.", show_alert=True)
+        return
     await callback.answer()
+    await callback.message.answer_photo(
+        BufferedInputFile(png, filename="analytics.png"),
+        caption=f"Аналитика за {ANALYTICS_DAYS:g} дн.",
+    )
+
+
+def _backtest_line(result: dict) -> str:
+    from core.backtest import RANKING_LABELS
+
+    limits = f"{result['min_amount']:,.0f} – " + (
+        f"{result['max_amount']:,.0f}" if result["max_amount"] is not None else "∞"
+    )
+    return (
+        f"{limits}, {RANKING_LABELS[result['ranking']]}: {result['takes_per_day']:.1f}/день, "
+        f"объём {result['volume']:,.0f} ₽, спорных {result['contested_won']}/{result['contested']}"
+        + (" ⚠" if result["beyond_observed"] else "")
+    )
+
+
+@router.message(Command("backtest"))
+async def cmd_backtest(message: Message, command: CommandObject) -> None:
+    """/backtest [дней] — прогон фильтров суммы по истории увиденных ордеров."""
+    # Imported here: numpy would add ~100 ms to every bot start
+    from core.backtest import best, run_backtest
+
+    try:
+        days = float(command.args) if command.args else 30.0
+    except ValueError:
+        await message.answer("Использование: /backtest [дней], например /backtest 60")
+        return
+    if not math.isfinite(days) or days <= 0:
+        await message.answer("Число дней должно быть больше нуля.")
+        return
+
+    await message.answer(f"Считаю бэктест за {days:.0f} дн...")
+    try:
+        report = await asyncio.to_thread(run_backtest, days)
+    except Exception as exc:
+        logger.exception("Backtest failed: %s", exc)
+        await message.answer("Не удалось выполнить бэктест, подробности в логе.")
+        return
+    if not report["orders"]:
+        await message.answer("Нет данных: журнал увиденных ордеров пуст.")
+        return
+
+    latency = report["latency"]
+    observed = report["observed"]
+    observed_max = observed["max_amount"]
+    lines = [
+        f"Бэктест за {report['days']:.1f} дн.: {report['orders']} ордеров, "
+        f"{report['configs']} вариантов ({report['sweep_s']:.1f} с)",
+        f"Задержка взятия: {latency['reach_s']:.2f} с, цикл {latency['take_cycle_s']:.2f} с",
+        f"Фильтр сайта при сборе: {observed['min_amount']:,.0f} – "
+        + (f"{observed_max:,.0f}" if observed_max is not None else "∞")
+        + " ₽. Ордеров вне него бот не видел, поэтому для вариантов шире (⚠) оценка неполная.",
+    ]
+    if report["current"] is not None:
+        lines.append("\nТекущий фильтр:")
+        lines.append("  " + _backtest_line(report["current"]))
+    lines.append("\nЛучшие по объёму:")
+    for result in best(report["results"], "volume", 5):
+        lines.append("  " + _backtest_line(result))
+    await message.answer("\n".join(lines))
 
 
 @router.callback_query(F.data.startswith("retry:"))
@@ -98,7 +217,7 @@ async def retry_order(callback: CallbackQuery) -> None:
         await callback.answer("Бот не запущен, повтор невозможен.", show_alert=True)
         return
 
-    processor._worker._retry_slug = slug
+    processor.request_retry(slug)
     await callback.message.edit_text(
         f"Повтор попытки для ордера <code>{slug}</code> запланирован.",
         parse_mode="HTML",
@@ -0,0 +1,252 @@
+import asyncio
+import logging
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from aiogram import F, Router
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.filters import Command, CommandObject
+from aiogram.types import CallbackQuery, FSInputFile, InlineKeyboardMarkup, Message
+
+from bot.keyboards.inline import history_keyboard
+from core.export import FORMATS, STATUSES as EXPORT_STATUSES, export_order_log, parse_date
+from db.engine import get_session
+from db.models import OrderLog
+from db.repository import OrderLogRepository
+
+logger = logging.getLogger(__name__)
+
+router = Router()
+
+PAGE_SIZE = 10
+# Callback data: "hist:<status>:<min>:<max>:<page>:<direction>:<cursor>"
+#   status    a (all) / t (taken) / f (failed)
+#   min, max  whole rubles below 10**9, empty when not set
+#   page      shown page number, capped at MAX_PAGE
+#   direction o (older than cursor) / n (newer than cursor), empty for the first page
+#   cursor    base36 microseconds of taken_at "." base36 id of the edge entry
+# Worst case is ~55 bytes, under Telegram's 64-byte limit.
+CALLBACK_DATA_LIMIT = 64
+MAX_PAGE = 99999
+STATUSES = {"a": None, "t": "taken", "f": "failed"}
+STATUS_LABELS = {"a": "все", "t": "взятые", "f": "ошибки"}
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _b36(value: int) -> str:
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    text = ""
+    while True:
+        value, rest = divmod(value, 36)
+        text = digits[rest] + text
+        if not value:
+            return text
+
+
+def encode_cursor(entry: OrderLog) -> str:
+    return f"{_b36((entry.taken_at - _EPOCH) // _MICROSECOND)}.{_b36(entry.id)}"
+
+
+def decode_cursor(text: str) -> Tuple[datetime, int]:
+    micros, entry_id = text.split(".")
+    return _EPOCH + int(micros, 36) * _MICROSECOND, int(entry_id, 36)
+
+
+class HistoryView:
+    """Filter and position of one history message, round-tripped through callback data."""
+
+    __slots__ = ("status", "min_amount", "max_amount", "page", "direction", "cursor")
+
+    def __init__(self, status: str = "a", min_amount: Optional[int] = None, max_amount: Optional[int] = None,
+                 page: int = 1, direction: str = "", cursor: str = "") -> None:
+        self.status = status
+        self.min_amount = min_amount
+        self.max_amount = max_amount
+        self.page = page
+        self.direction = direction
+        self.cursor = cursor
+
+    @classmethod
+    def parse(cls, data: str) -> "HistoryView":
+        _, status, min_amount, max_amount, page, direction, cursor = data.split(":")
+        if status not in STATUSES or direction not in ("", "o", "n"):
+            raise ValueError(data)
+        if cursor:
+            decode_cursor(cursor)
+        return cls(
+            status,
+            int(min_amount) if min_amount else None,
+            int(max_amount) if max_amount else None,
+            min(max(int(page), 1), MAX_PAGE),
+            direction,
+            cursor,
+        )
+
+    def callback(self, **changes) -> str:
+        fields = {name: getattr(self, name) for name in self.__slots__}
+        fields.update(changes)
+        data = "hist:{status}:{min}:{max}:{page}:{direction}:{cursor}".format(
+            status=fields["status"],
+            min="" if fields["min_amount"] is None else fields["min_amount"],
+            max="" if fields["max_amount"] is None else fields["max_amount"],
+            page=min(fields["page"], MAX_PAGE),   # past it the label stops counting
+            direction=fields["direction"],
+            cursor=fields["cursor"],
+        )
+        if len(data.encode()) > CALLBACK_DATA_LIMIT:
+            raise ValueError(f"callback data over {CALLBACK_DATA_LIMIT} bytes: {data}")
+        return data
+
+    def describe(self) -> str:
+        parts = [STATUS_LABELS[self.status]]
+        if self.min_amount is not None or self.max_amount is not None:
+            low = f"{self.min_amount:,}" if self.min_amount is not None else "0"
+            high = f"{self.max_amount:,}" if self.max_amount is not None else "∞"
+            parts.append(f"{low} – {high} ₽")
+        return ", ".join(parts)
+
+
+async def _render(view: HistoryView) -> Tuple[str, InlineKeyboardMarkup]:
+    before = after = None
+    if view.cursor:
+        key = decode_cursor(view.cursor)
+        if view.direction == "n":
+            after = key
+        else:
+            before = key
+    async with get_session() as session:
+        entries, more = await OrderLogRepository(session).page(
+            PAGE_SIZE,
+            before=before,
+            after=after,
+            status=STATUSES[view.status],
+            min_amount=view.min_amount,
+            max_amount=view.max_amount,
+        )
+
+    if view.direction == "n":
+        # Went back towards the newest entries: the older side is where we came from
+        has_newer, has_older = more, True
+        if not more:
+            view.page = 1
+    else:
+        has_newer, has_older = view.page > 1, more
+
+    lines: List[str] = [f"История ордеров ({view.describe()}), стр. {view.page}\n"]
+    if not entries:
+        lines.append("Записей нет.")
+    for entry in entries:
+        amount_str = f"{entry.amount:,.0f} RUB" if entry.amount else "—"
+        dt_str = entry.taken_at.strftime("%d.%m %H:%M")
+        icon = "+" if entry.status == "taken" else "x"
+        lines.append(f"[{icon}] {dt_str}  {amount_str}  <code>{entry.order_slug[:18]}...</code>")
+
+    newer = older = None
+    if entries and has_newer:
+        newer = view.callback(page=max(view.page - 1, 1), direction="n", cursor=encode_cursor(entries[0]))
+    if entries and has_older:
+        older = view.callback(page=view.page + 1, direction="o", cursor=encode_cursor(entries[-1]))
+    filters = [
+        (("• " if code == view.status else "") + label.capitalize(),
+         view.callback(status=code, page=1, direction="", cursor=""))
+        for code, label in STATUS_LABELS.items()
+    ]
+    return "\n".join(lines), history_keyboard(newer, older, filters)
+
+
+def _parse_amount(text: str) -> Optional[int]:
+    if text in ("-", "0"):
+        return None
+    amount = int(float(text.replace(",", ".")))
+    if not 0 < amount < 10**9:   # keeps the callback data within 64 bytes
+        raise ValueError(text)
+    return amount
+
+
+@router.message(Command("history"))
+async def cmd_history(message: Message, command: CommandObject) -> None:
+    """/history [мин] [макс] — история ордеров; «-» вместо суммы — без ограничения."""
+    args = (command.args or "").split()
+    try:
+        min_amount = _parse_amount(args[0]) if len(args) > 0 else None
+        max_amount = _parse_amount(args[1]) if len(args) > 1 else None
+    except ValueError:
+        await message.answer("Использование: /history [мин] [макс], например /history 1000 50000")
+        return
+    text, markup = await _render(HistoryView(min_amount=min_amount, max_amount=max_amount))
+    await message.answer(text, parse_mode="HTML", reply_markup=markup)
+
+
+@router.callback_query(F.data == "history:show")
+async def history_show(callback: CallbackQuery) -> None:
+    text, markup = await _render(HistoryView())
+    await callback.message.answer(text, parse_mode="HTML", reply_markup=markup)
+    await callback.answer()
+
+
+@router.callback_query(F.data.startswith("hist:"))
+async def history_page(callback: CallbackQuery) -> None:
+    try:
+        view = HistoryView.parse(callback.data)
+    except ValueError:
+        await callback.answer("Устаревшая кнопка.", show_alert=True)
+        return
+    text, markup = await _render(view)
+    try:
+        await callback.message.edit_text(text, parse_mode="HTML", reply_markup=markup)
+    except TelegramBadRequest as exc:
+        if "not modified" not in str(exc):   # the same filter pressed again
+            raise
+    await callback.answer()
+
+
+_EXPORT_USAGE = (
+    "Использование: /export [csv|parquet] [с ГГГГ-ММ-ДД] [по ГГГГ-ММ-ДД] [taken|failed]\n"
+    "Например: /export csv 2026-01-01 2026-03-31 taken"
+)
+
+
+@router.message(Command("export"))
+async def cmd_export(message: Message, command: CommandObject) -> None:
+    """/export — выгрузка order_log файлами; даты в UTC, «по» включительно."""
+    fmt, status, dates = "csv", None, []
+    try:
+        for arg in (command.args or "").split():
+            if arg.lower() in FORMATS:
+                fmt = arg.lower()
+            elif arg.lower() in EXPORT_STATUSES:
+                status = arg.lower()
+            else:
+                dates.append(parse_date(arg))
+        if len(dates) > 2:
+            raise ValueError(dates)
+    except ValueError:
+        await message.answer(_EXPORT_USAGE)
+        return
+    date_from = dates[0] if dates else None
+    date_to = dates[1] if len(dates) > 1 else None
+
+    await message.answer("Готовлю выгрузку...")
+    directory = tempfile.mkdtemp(prefix="export-")
+    try:
+        try:
+            paths = await asyncio.to_thread(export_order_log, directory, fmt, date_from, date_to, status)
+        except ImportError:
+            await message.answer("Parquet недоступен: не установлен pyarrow. Используйте /export csv.")
+            return
+        except Exception as exc:
+            logger.exception("Export failed: %s", exc)
+            await message.answer("Не удалось выполнить выгрузку, подробности в логе.")
+            return
+        if not paths:
+            await message.answer("Нет записей за выбранный период.")
+            return
+        for number, path in enumerate(paths, 1):
+            caption = f"Часть {number} из {len(paths)}" if len(paths) > 1 else None
+            await message.answer_document(FSInputFile(path), caption=caption)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
@@ -237,6 +237,9 @@ async def filters_save(callback: CallbackQuery, state: FSMContext) -> None:
             min_amount=data.get("min_amount"),
             max_amount=data.get("max_amount"),
         )
+    # Apply to the running worker right away (takes effect on its next poll tick)
+    from main import processor
+    processor.update_filters(data.get("min_amount"), data.get("max_amount"))
     await callback.message.edit_text(
         "Фильтры суммы сохранены.",
         reply_markup=settings_menu_keyboard(),
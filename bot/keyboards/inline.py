@@ -1,3 +1,5 @@
+from typing import List, Optional, Tuple
+
 from aiogram.types import InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
@@ -17,6 +19,33 @@ def main_menu_keyboard(is_running: bool, has_credentials: bool) -> InlineKeyboar
     return builder.as_markup()
 
 
+def stats_keyboard() -> InlineKeyboardMarkup:
+    builder = InlineKeyboardBuilder()
+    builder.button(text="Аналитика", callback_data="stats:analytics")
+    builder.button(text="Графики", callback_data="stats:chart")
+    builder.button(text="История", callback_data="history:show")
+    builder.adjust(3)
+    return builder.as_markup()
+
+
+def history_keyboard(
+    newer: Optional[str], older: Optional[str], filters: List[Tuple[str, str]]
+) -> InlineKeyboardMarkup:
+    builder = InlineKeyboardBuilder()
+    sizes = []
+    if newer or older:
+        if newer:
+            builder.button(text="‹ Новее", callback_data=newer)
+        if older:
+            builder.button(text="Старее ›", callback_data=older)
+        sizes.append(int(bool(newer)) + int(bool(older)))
+    for text, callback_data in filters:
+        builder.button(text=text, callback_data=callback_data)
+    sizes.append(len(filters))
+    builder.adjust(*sizes)
+    return builder.as_markup()
+
+
 def settings_menu_keyboard() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.button(text="Данные для входа", callback_data="settings:credentials")
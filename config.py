@@ -4,11 +4,37 @@ from dotenv import load_dotenv
 load_dotenv()
 
 BOT_TOKEN: str = os.environ["BOT_TOKEN"]
+# Bot API server; override only for a local Bot API server or the benchmark's fake one
+TELEGRAM_API_URL: str = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org").rstrip("/")
 DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./data/bot.db")
 LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
 HEADLESS: bool = os.getenv("HEADLESS", "true").lower() != "false"
+# Boot Firefox and log in at process start, so "Запустить бота" only activates it
+PREWARM: bool = os.getenv("PREWARM", "false").lower() == "true"
+# Scan the whole virtualized orders list each cycle, not only the rows React has rendered
+FULL_TABLE_COVERAGE: bool = os.getenv("FULL_TABLE_COVERAGE", "false").lower() == "true"
+# Narrow the orders query's from= to the newest order creation time seen minus an overlap.
+# New orders older than the overlap drop out of the query, so keep it above the order TTL.
+INCREMENTAL_WINDOW: bool = os.getenv("INCREMENTAL_WINDOW", "false").lower() == "true"
+ORDERS_WINDOW_OVERLAP_MIN: int = int(os.getenv("ORDERS_WINDOW_OVERLAP_MIN", "60"))
+# Reuse the dashboard session (cookies + localStorage) saved after the last login
+SESSION_REUSE: bool = os.getenv("SESSION_REUSE", "true").lower() != "false"
+SESSION_FILE: str = os.getenv("SESSION_FILE", "./data/session.json")
+# Proactive session refresh: renew the login during a quiet moment once the auth token
+# (cookie or JWT in storage) is within SESSION_REFRESH_MARGIN s of expiry, or once the
+# session is older than SESSION_MAX_AGE_MIN (0 = only act on a known expiry)
+SESSION_KEEPALIVE: bool = os.getenv("SESSION_KEEPALIVE", "false").lower() == "true"
+SESSION_REFRESH_MARGIN: int = int(os.getenv("SESSION_REFRESH_MARGIN", "300"))
+SESSION_MAX_AGE_MIN: int = int(os.getenv("SESSION_MAX_AGE_MIN", "0"))
+SESSION_CHECK_INTERVAL: float = 60.0
+SESSION_QUIET_SECONDS: float = 5.0   # no candidate orders for this long = quiet moment
+# Lean browser profile: no images, web fonts, animations, telemetry or third-party hosts.
+# LEAN_ALLOWED_HOSTS (plus the dashboard host) are the only hosts the browser may reach.
+LEAN_PROFILE: bool = os.getenv("LEAN_PROFILE", "false").lower() == "true"
+LEAN_ALLOWED_HOSTS: str = os.getenv("LEAN_ALLOWED_HOSTS", "cards2cards.com")
 
-BASE_URL = "https://dashboard.cards2cards.com"
+# Override only to point the worker at a local copy of the dashboard (bench/mock_dashboard)
+BASE_URL: str = os.getenv("BASE_URL", "https://dashboard.cards2cards.com").rstrip("/")
 LOGIN_URL = f"{BASE_URL}/login?t=22314268-b9f0-48fd-8901-30419acd2419"
 TRADER_URL = f"{BASE_URL}/trader?t=22314268-b9f0-48fd-8901-30419acd2419"
 ORDERS_URL = f"{BASE_URL}/trader/orders?from=2026-02-01T00%3A00%3A00%2B03%3A00&status=new&t=22314268-b9f0-48fd-8901-30419acd2419"
@@ -18,3 +44,87 @@ POLL_INTERVAL: float = 0.5
 PAGE_LOAD_TIMEOUT: int = 20
 ELEMENT_WAIT_TIMEOUT: int = 10
 ALERT_WAIT_TIMEOUT: int = 5
+COVERAGE_SCROLL_DELAY_MS: int = 60   # time React gets to render each scrolled window
+
+# Worker supervisor: restart the Selenium worker when its thread dies or stops heart-beating
+SUPERVISOR_ENABLED: bool = os.getenv("SUPERVISOR_ENABLED", "true").lower() != "false"
+SUPERVISOR_CHECK_INTERVAL: float = 5.0
+WORKER_HANG_TIMEOUT: int = int(os.getenv("WORKER_HANG_TIMEOUT", "120"))      # s without a finished poll cycle
+WORKER_STARTUP_TIMEOUT: int = int(os.getenv("WORKER_STARTUP_TIMEOUT", "180"))  # s from launch to first cycle
+RESTART_BACKOFF_BASE: float = 2.0
+RESTART_BACKOFF_MAX: float = 300.0
+# Give up after this many restarts in a row that never reached a poll cycle (0 = never)
+SUPERVISOR_MAX_RESTARTS: int = int(os.getenv("SUPERVISOR_MAX_RESTARTS", "8"))
+
+# Browser recycling: replace the driver in the background once the geckodriver/Firefox
+# tree exceeds RECYCLE_RSS_MB or has been up for RECYCLE_MAX_AGE_MIN (0 disables either)
+RECYCLE_RSS_MB: int = int(os.getenv("RECYCLE_RSS_MB", "1500"))
+RECYCLE_MAX_AGE_MIN: int = int(os.getenv("RECYCLE_MAX_AGE_MIN", "360"))
+RECYCLE_CHECK_INTERVAL: float = 60.0
+
+# "thread": Selenium worker runs inside the bot process (default).
+# "process": it runs in its own process (python -m core.worker_process, Linux only),
+# talking to the bot over a unix socket pair, so it does not share the bot's GIL.
+WORKER_MODE: str = os.getenv("WORKER_MODE", "thread").lower()
+
+# Telegram updates: "polling" (default) or "webhook". Webhook mode serves an embedded
+# aiohttp server on WEBHOOK_HOST:WEBHOOK_PORT and registers WEBHOOK_BASE_URL + WEBHOOK_PATH
+# with Telegram; if that fails the bot falls back to polling. Updates must carry
+# WEBHOOK_SECRET; when it is empty a random secret is generated on every start.
+BOT_MODE: str = os.getenv("BOT_MODE", "polling").lower()
+WEBHOOK_BASE_URL: str = os.getenv("WEBHOOK_BASE_URL", "").rstrip("/")
+WEBHOOK_PATH: str = os.getenv("WEBHOOK_PATH", "/telegram/webhook")
+WEBHOOK_SECRET: str = os.getenv("WEBHOOK_SECRET", "")
+WEBHOOK_HOST: str = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT: int = int(os.getenv("WEBHOOK_PORT", "8080"))
+WEBHOOK_MAX_CONNECTIONS: int = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40"))  # parallel deliveries
+
+# Prometheus text metrics on http://METRICS_HOST:METRICS_PORT/metrics (0 disables)
+METRICS_PORT: int = int(os.getenv("METRICS_PORT", "0"))
+METRICS_HOST: str = os.getenv("METRICS_HOST", "127.0.0.1")
+
+# WebDriver command tracer (debugging): records every round trip with the calling
+# worker method and writes a Chrome-trace/Perfetto JSON file on stop and after any
+# poll cycle slower than WEBDRIVER_TRACE_SLOW_MS.
+WEBDRIVER_TRACE: bool = os.getenv("WEBDRIVER_TRACE", "false").lower() == "true"
+WEBDRIVER_TRACE_FILE: str = os.getenv("WEBDRIVER_TRACE_FILE", "./data/webdriver_trace.json")
+WEBDRIVER_TRACE_SLOW_MS: int = int(os.getenv("WEBDRIVER_TRACE_SLOW_MS", "2000"))
+
+# Sanitized page snapshots (table, modal, filter panel, error pages) for offline
+# parser/selector checks with bench/snapshot_replay.py; each kind at most once per
+# SNAPSHOT_INTERVAL seconds, capture stops at SNAPSHOT_MAX_FILES stored files.
+SNAPSHOT_CAPTURE: bool = os.getenv("SNAPSHOT_CAPTURE", "false").lower() == "true"
+SNAPSHOT_DIR: str = os.getenv("SNAPSHOT_DIR", "./data/snapshots")
+SNAPSHOT_INTERVAL: float = float(os.getenv("SNAPSHOT_INTERVAL", "60"))
+SNAPSHOT_MAX_FILES: int = int(os.getenv("SNAPSHOT_MAX_FILES", "5000"))
+
+# Seen-orders ledger: one compact record per distinct order the worker saw (amount,
+# created, first seen, gone, our outcome), batched off the hot path into rotating
+# binary segments under LEDGER_DIR (core/ledger.py). Cheap enough to stay on.
+LEDGER_ENABLED: bool = os.getenv("LEDGER_ENABLED", "true").lower() == "true"
+LEDGER_DIR: str = os.getenv("LEDGER_DIR", "./data/ledger")
+LEDGER_SEGMENT_MB: float = float(os.getenv("LEDGER_SEGMENT_MB", "16"))
+LEDGER_FLUSH_INTERVAL: float = float(os.getenv("LEDGER_FLUSH_INTERVAL", "30"))
+LEDGER_GONE_AFTER: float = float(os.getenv("LEDGER_GONE_AFTER", "10"))   # s missing before "gone"
+# Window mode: an order back in view within this many seconds of "gone" keeps its record
+LEDGER_REOPEN_WITHIN: float = float(os.getenv("LEDGER_REOPEN_WITHIN", "600"))
+
+# "Статистика" → "Аналитика": reports are cached for ANALYTICS_CACHE_TTL seconds;
+# hours of day are shown in ANALYTICS_UTC_OFFSET_H (the site's Moscow time by default)
+ANALYTICS_DAYS: float = float(os.getenv("ANALYTICS_DAYS", "7"))
+ANALYTICS_CACHE_TTL: float = float(os.getenv("ANALYTICS_CACHE_TTL", "300"))
+ANALYTICS_UTC_OFFSET_H: float = float(os.getenv("ANALYTICS_UTC_OFFSET_H", "3"))
+
+# /export: order_log is split into files of at most ~EXPORT_PART_MB each (the Bot API
+# accepts documents up to 50 MB; a local Bot API server allows up to 2000 MB)
+EXPORT_PART_MB: float = float(os.getenv("EXPORT_PART_MB", "45"))
+
+# order_log retention (0 disables): rows older than RETENTION_DAYS are rolled up into
+# order_log_daily, appended to monthly gzip CSVs in RETENTION_ARCHIVE_DIR and deleted
+# in small batches every RETENTION_INTERVAL_H hours, then freed pages are returned
+# with incremental VACUUM (core/retention.py)
+RETENTION_DAYS: int = int(os.getenv("RETENTION_DAYS", "0"))
+RETENTION_ARCHIVE_DIR: str = os.getenv("RETENTION_ARCHIVE_DIR", "./data/archive")
+RETENTION_INTERVAL_H: float = float(os.getenv("RETENTION_INTERVAL_H", "6"))
+RETENTION_BATCH_ROWS: int = int(os.getenv("RETENTION_BATCH_ROWS", "500"))
+RETENTION_BATCH_PAUSE: float = float(os.getenv("RETENTION_BATCH_PAUSE", "0.2"))   # s between batches
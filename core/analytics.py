@@ -0,0 +1,256 @@
+"""Take performance and market statistics for the "Статистика" menu.
+
+compute_report() loads the last `days` of order_log, take_trace and the
+seen-orders ledger into NumPy arrays and derives, all vectorized:
+  - attempts and success rate per hour of day (site time, ANALYTICS_UTC_OFFSET_H);
+  - amount histograms: every order seen vs. orders taken;
+  - failure streaks: longest, current, and how many reached STREAK_ALERT;
+  - throughput: takes per hour over the last day, best and latest 24 h;
+  - time to the Take click of taken orders (p50 / p90).
+An attempt is a take_trace row with a final outcome; retried outcomes
+(error page, login redirect, stale row, aborted) are left out.
+
+get_report() caches each report for ANALYTICS_CACHE_TTL seconds. It blocks
+on SQLite and the ledger, so the bot calls it in a thread. render_text()
+gives compact <pre> tables and render_chart() a PNG; the chart needs
+matplotlib, which is optional.
+"""
+import io
+import logging
+import sqlite3
+import threading
+import time
+import urllib.parse
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import ANALYTICS_CACHE_TTL, ANALYTICS_UTC_OFFSET_H, DATABASE_URL, LEDGER_DIR
+from core.ledger import read_columns
+
+logger = logging.getLogger(__name__)
+
+_DB_PATH = DATABASE_URL.replace("sqlite+aiosqlite:///", "")
+# order_log/take_trace timestamps are naive UTC text; julianday() turns them into epoch seconds
+_EPOCH_SQL = "(julianday({}) - 2440587.5) * 86400.0"
+_FINAL_OUTCOMES = ("taken", "no_take_button", "no_alert", "webdriver_error", "no_anchor")
+
+AMOUNT_EDGES: Tuple[float, ...] = (0, 1000, 2000, 5000, 10000, 20000, 50000, 100000, 200000)
+STREAK_ALERT = 5
+_SPARKS = "▁▂▃▄▅▆▇█"
+
+_cache: Dict[float, Tuple[float, Dict[str, Any]]] = {}
+_cache_lock = threading.Lock()
+
+
+def _query(db_path: str, sql: str, params: tuple, columns: int) -> np.ndarray:
+    try:
+        # Read-only: a wrong path fails instead of creating an empty database
+        con = sqlite3.connect(f"file:{urllib.parse.quote(db_path)}?mode=ro", uri=True)
+        try:
+            rows = con.execute(sql, params).fetchall()
+        finally:
+            con.close()
+    except sqlite3.Error as exc:
+        logger.warning("Analytics query failed: %s", exc)
+        rows = []
+    return np.array(rows, dtype=float).reshape(len(rows), columns)
+
+
+def _percentile(values: np.ndarray, q: float) -> Optional[float]:
+    values = values[~np.isnan(values)]
+    return float(np.percentile(values, q)) if len(values) else None
+
+
+def _failure_runs(success: np.ndarray) -> np.ndarray:
+    """Lengths of the failure runs between successes, including both ends (may be 0)."""
+    boundaries = np.concatenate(([-1], np.flatnonzero(success), [len(success)]))
+    return np.diff(boundaries) - 1
+
+
+def _histogram(amounts: np.ndarray) -> List[int]:
+    amounts = amounts[~np.isnan(amounts)]
+    bins = np.searchsorted(AMOUNT_EDGES, amounts, side="right") - 1
+    return np.bincount(bins[bins >= 0], minlength=len(AMOUNT_EDGES)).tolist()
+
+
+def compute_report(days: float, db_path: str = _DB_PATH, ledger_dir: str = LEDGER_DIR) -> Dict[str, Any]:
+    started = time.monotonic()
+    now = time.time()
+    since = now - days * 86400
+    since_text = (datetime.utcnow() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+
+    log = _query(
+        db_path,
+        f"SELECT {_EPOCH_SQL.format('taken_at')}, amount FROM order_log "
+        "WHERE status = 'taken' AND taken_at >= ? ORDER BY taken_at",
+        (since_text,),
+        2,
+    )
+    placeholders = ",".join("?" * len(_FINAL_OUTCOMES))
+    traces = _query(
+        db_path,
+        f"SELECT {_EPOCH_SQL.format('traced_at')}, outcome = 'taken', clicked_ms FROM take_trace "
+        f"WHERE traced_at >= ? AND outcome IN ({placeholders}) ORDER BY traced_at",
+        (since_text, *_FINAL_OUTCOMES),
+        3,
+    )
+    seen = np.frombuffer(read_columns(ledger_dir, since)["amount"], dtype=float)
+
+    taken_at, taken_amounts = log[:, 0], log[:, 1]
+    attempt_at, success = traces[:, 0], traces[:, 1] > 0
+    clicked_ms = traces[:, 2][success]
+
+    # Per hour of day, site time
+    hour = ((attempt_at + ANALYTICS_UTC_OFFSET_H * 3600) // 3600 % 24).astype(int)
+    attempts_by_hour = np.bincount(hour, minlength=24)
+    taken_by_hour = np.bincount(hour, weights=success, minlength=24)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rate_by_hour = np.where(attempts_by_hour > 0, taken_by_hour / attempts_by_hour, np.nan)
+
+    runs = _failure_runs(success) if len(success) else np.zeros(1, dtype=int)
+
+    # Throughput: takes per hour bucket ending now, rolling 24 h sums
+    hours = max(int(np.ceil(days * 24)), 24)
+    bucket = ((now - taken_at) // 3600).astype(int)
+    per_hour = np.bincount(bucket[(bucket >= 0) & (bucket < hours)], minlength=hours)[::-1]   # oldest first
+    rolling_24h = np.convolve(per_hour, np.ones(24, dtype=int))[23:len(per_hour)]
+
+    return {
+        "days": days,
+        "generated_at": now,
+        "compute_ms": (time.monotonic() - started) * 1000,
+        "taken": len(taken_at),
+        "volume": float(np.nansum(taken_amounts)),
+        "attempts": len(success),
+        "success_rate": float(success.mean()) if len(success) else None,
+        "attempts_by_hour": attempts_by_hour.tolist(),
+        "rate_by_hour": [None if np.isnan(r) else float(r) for r in rate_by_hour],
+        "seen": len(seen),
+        "amount_edges": list(AMOUNT_EDGES),
+        "seen_histogram": _histogram(seen),
+        "taken_histogram": _histogram(taken_amounts),
+        "longest_failure_streak": int(runs.max()),
+        "current_failure_streak": int(runs[-1]),
+        "streaks_over_alert": int((runs >= STREAK_ALERT).sum()),
+        "takes_last_24h": per_hour[-24:].tolist(),
+        "rolling_24h_max": int(rolling_24h.max()) if len(rolling_24h) else 0,
+        "rolling_24h_now": int(rolling_24h[-1]) if len(rolling_24h) else 0,
+        "takes_per_day": len(taken_at) / days,
+        "clicked_ms_p50": _percentile(clicked_ms, 50),
+        "clicked_ms_p90": _percentile(clicked_ms, 90),
+    }
+
+
+def get_report(days: float, ttl: float = ANALYTICS_CACHE_TTL) -> Dict[str, Any]:
+    """Cached compute_report(); a report is reused for `ttl` seconds."""
+    with _cache_lock:
+        hit = _cache.get(days)
+        if hit is not None and hit[0] > time.monotonic():
+            return hit[1]
+        report = compute_report(days)
+        _cache[days] = (time.monotonic() + ttl, report)
+        return report
+
+
+def _amount_label(edge: float) -> str:
+    return f"{edge / 1000:g}k" if edge >= 1000 else f"{edge:g}"
+
+
+def _sparkline(values: List[int]) -> str:
+    top = max(values) if values else 0
+    if not top:
+        return _SPARKS[0] * len(values)
+    return "".join(_SPARKS[min(int(v / top * (len(_SPARKS) - 1) + 0.5), len(_SPARKS) - 1)] for v in values)
+
+
+def render_text(report: Dict[str, Any]) -> str:
+    """Compact monospace tables (HTML parse mode)."""
+    rate = report["success_rate"]
+    lines = [
+        f"Аналитика за {report['days']:g} дн.",
+        f"Взято: {report['taken']} ({report['takes_per_day']:.1f}/день), "
+        f"объём {report['volume']:,.0f} ₽",
+        f"Попыток: {report['attempts']}, успешных "
+        + (f"{rate * 100:.0f}%" if rate is not None else "—"),
+    ]
+    if report["clicked_ms_p50"] is not None:
+        lines.append(
+            f"До клика «Взять»: {report['clicked_ms_p50']:.0f} / {report['clicked_ms_p90']:.0f} мс (p50 / p90)"
+        )
+    lines.append(
+        f"Серии неудач: макс. {report['longest_failure_streak']}, текущая "
+        f"{report['current_failure_streak']}, ≥{STREAK_ALERT} подряд: {report['streaks_over_alert']}"
+    )
+
+    cells = [
+        f"{hour:02d} {attempts:>5} " + (f"{hour_rate * 100:>3.0f}%" if attempts else "   —")
+        for hour, (attempts, hour_rate) in enumerate(zip(report["attempts_by_hour"], report["rate_by_hour"]))
+    ]
+    if report["attempts"]:
+        # Two columns: 00–11 and 12–23
+        table = ["ч  попыт успех │ ч  попыт успех"] + [f"{cells[i]} │ {cells[i + 12]}" for i in range(12)]
+        lines.append(f"\nУспешность по часам (UTC{ANALYTICS_UTC_OFFSET_H:+g}):")
+        lines.append("<pre>" + "\n".join(table) + "</pre>")
+
+    if report["seen"] or report["taken"]:
+        edges = report["amount_edges"]
+        table = ["сумма       видели   взяли"]
+        for i, (seen, taken) in enumerate(zip(report["seen_histogram"], report["taken_histogram"])):
+            if not seen and not taken:
+                continue
+            upper = _amount_label(edges[i + 1]) if i + 1 < len(edges) else "∞"
+            table.append(f"{_amount_label(edges[i]) + '–' + upper:<11}{seen:>7}{taken:>8}")
+        lines.append("\nРаспределение сумм:")
+        lines.append("<pre>" + "\n".join(table) + "</pre>")
+
+    lines.append(
+        f"\nВзятия по часам, последние 24 ч:\n<pre>{_sparkline(report['takes_last_24h'])}</pre>\n"
+        f"За 24 ч: {report['rolling_24h_now']}, лучшие 24 ч: {report['rolling_24h_max']}"
+    )
+    return "\n".join(lines)
+
+
+def render_chart(report: Dict[str, Any]) -> bytes:
+    """PNG with four panels; raises ImportError without matplotlib."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    from matplotlib import pyplot as plt
+
+    fig, axes = plt.subplots(2, 2, figsize=(10, 7))
+    try:
+        ax = axes[0][0]
+        rates = [r * 100 if r is not None else 0 for r in report["rate_by_hour"]]
+        ax.bar(range(24), rates, color="tab:green")
+        ax.set_title("Успешность по часам, %")
+        ax.set_xticks(range(0, 24, 3))
+
+        ax = axes[0][1]
+        edges = report["amount_edges"]
+        labels = [_amount_label(e) for e in edges]
+        positions = np.arange(len(edges))
+        ax.bar(positions - 0.2, report["seen_histogram"], 0.4, label="видели")
+        ax.bar(positions + 0.2, report["taken_histogram"], 0.4, label="взяли")
+        ax.set_xticks(positions)
+        ax.set_xticklabels(labels, rotation=45)
+        ax.set_yscale("symlog")
+        ax.set_title("Суммы ордеров, ₽ (от)")
+        ax.legend()
+
+        ax = axes[1][0]
+        ax.bar(range(-23, 1), report["takes_last_24h"], color="tab:blue")
+        ax.set_title("Взятия по часам, последние 24 ч")
+
+        ax = axes[1][1]
+        ax.bar(range(24), report["attempts_by_hour"], color="tab:gray")
+        ax.set_title("Попытки по часам")
+        ax.set_xticks(range(0, 24, 3))
+
+        fig.tight_layout()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", dpi=100)
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
@@ -0,0 +1,393 @@
+"""Vectorized backtest of amount filters and ranking rules over observed orders.
+
+    python -m core.backtest --days 90 --min 1000:20000:1000 --max 20000:100000:5000,none
+
+Orders come from the seen-orders ledger (core/ledger.py), our take latency
+from the take_trace table. Each configuration is a (min_amount, max_amount,
+ranking) triple, and the model is deliberately simple:
+  - an order is a candidate if its amount is within the range;
+  - orders first seen within one take cycle of each other compete for the
+    same take pipeline. They are taken one after another in ranking order
+    ("table" = newest first, as the worker does now, "amount_desc",
+    "amount_asc"). The k-th one is reached reach_s + k * take_cycle_s after
+    it appeared;
+  - a candidate is won if it was still listed when reached. Orders we took
+    and orders still listed when the ledger was closed never go away;
+  - "contested" orders are candidates that somebody else took, i.e. gone
+    within contested_s of first seen, or lost at the Take button.
+Without FULL_TABLE_COVERAGE, orders also leave the ledger's view when they
+scroll out of the rendered window, so listed times are a lower bound.
+
+The ledger only holds orders inside the site's amount filter at the time,
+so a wider configuration finds nothing more and would look tied with it.
+The observed range is the one every recorded filter let through: the
+highest recorded min and the lowest recorded max. The default grid stays
+inside it. Any configuration reaching beyond it is flagged beyond_observed
+and ranked after the others by best().
+
+Per configuration the rows are pre-sorted once per ranking. The rank among
+candidates within a cycle is then a cumulative sum, so a sweep costs a few
+array passes per configuration.
+"""
+import argparse
+import json
+import logging
+import math
+import sqlite3
+import time
+import urllib.parse
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from config import DATABASE_URL, LEDGER_DIR, POLL_INTERVAL
+from core.ledger import FLAG_UNCLOSED, OUTCOMES, read_columns
+
+logger = logging.getLogger(__name__)
+
+RANKINGS = ("table", "amount_desc", "amount_asc")
+RANKING_LABELS: Dict[str, str] = {
+    "table": "новые первыми",
+    "amount_desc": "крупные первыми",
+    "amount_asc": "мелкие первыми",
+}
+
+_DB_PATH = DATABASE_URL.replace("sqlite+aiosqlite:///", "")
+_TAKEN = OUTCOMES.index("taken")
+_LOST = OUTCOMES.index("no_take_button")
+
+# Used until take_trace has enough taken orders
+DEFAULT_REACH_S = 1.5
+DEFAULT_TAKE_CYCLE_S = 2.5
+
+
+def _connect_ro(db_path: str) -> sqlite3.Connection:
+    """Read-only connection; a wrong path fails instead of creating an empty database."""
+    return sqlite3.connect(f"file:{urllib.parse.quote(db_path)}?mode=ro", uri=True)
+
+
+class Latency:
+    """How long we need to reach an order: the first one in a cycle and each next one."""
+
+    __slots__ = ("reach_s", "take_cycle_s", "samples")
+
+    def __init__(self, reach_s: float, take_cycle_s: float, samples: int = 0) -> None:
+        self.reach_s = reach_s
+        self.take_cycle_s = take_cycle_s
+        self.samples = samples
+
+
+def load_latency(db_path: str = _DB_PATH, min_samples: int = 5) -> Latency:
+    """Median time to the Take click and per-take cost from take_trace rows of taken orders."""
+    try:
+        con = _connect_ro(db_path)
+        try:
+            rows = con.execute(
+                "SELECT clicked_ms, parsed_ms, callback_done_ms FROM take_trace "
+                "WHERE outcome = 'taken' AND clicked_ms IS NOT NULL AND callback_done_ms IS NOT NULL"
+            ).fetchall()
+        finally:
+            con.close()
+    except sqlite3.Error as exc:
+        logger.warning("Could not read take_trace (%s) — using default latency", exc)
+        rows = []
+    if len(rows) < min_samples:
+        return Latency(DEFAULT_REACH_S, DEFAULT_TAKE_CYCLE_S, len(rows))
+    values = np.array(rows, dtype=float)
+    reach_s = float(np.median(values[:, 0])) / 1000
+    busy_s = float(np.nanmedian(values[:, 2] - values[:, 1])) / 1000
+    return Latency(reach_s, busy_s + POLL_INTERVAL, len(rows))
+
+
+def load_settings(db_path: str = _DB_PATH) -> tuple:
+    """Current (min_amount, max_amount); None where the filter is not set."""
+    try:
+        con = _connect_ro(db_path)
+        try:
+            row = con.execute("SELECT min_amount, max_amount FROM settings WHERE id = 1").fetchone()
+        finally:
+            con.close()
+    except sqlite3.Error:
+        row = None
+    return tuple(row) if row else (None, None)
+
+
+class History:
+    """Observed orders as arrays, one element per order."""
+
+    __slots__ = ("amount", "first_seen", "window_s", "contested", "days", "observed_min", "observed_max")
+
+    def __init__(self, amount: np.ndarray, first_seen: np.ndarray, window_s: np.ndarray,
+                 contested: np.ndarray, observed_min: float = 0.0, observed_max: float = math.inf) -> None:
+        self.amount = amount
+        self.first_seen = first_seen
+        self.window_s = window_s
+        self.contested = contested
+        # Amount range the site filter showed throughout the history (see the module doc)
+        self.observed_min = observed_min
+        self.observed_max = observed_max
+        span = float(first_seen.max() - first_seen.min()) if len(first_seen) else 0.0
+        self.days = max(span / 86400, 1 / 24)
+
+    def __len__(self) -> int:
+        return len(self.amount)
+
+
+def load_history(ledger_dir: str = LEDGER_DIR, days: Optional[float] = None,
+                 contested_s: float = 120.0) -> History:
+    since = time.time() - days * 86400 if days else None
+    columns = {name: np.frombuffer(values, dtype=float if values.typecode == "d" else np.uint8)
+               for name, values in read_columns(ledger_dir, since).items()}
+    known = ~np.isnan(columns["amount"])
+    amount = columns["amount"][known]
+    first_seen = columns["first_seen"][known]
+    outcome = columns["outcome"][known]
+    listed = columns["gone_at"][known] - first_seen
+    unclosed = (columns["flags"][known] & FLAG_UNCLOSED) != 0
+    window = np.where(unclosed | np.isnan(listed) | (outcome == _TAKEN), np.inf, listed)
+    contested = (outcome == _LOST) | ((outcome != _TAKEN) & (window <= contested_s))
+    # NaN: filter unknown (not applied at the time, or a segment older than the field)
+    filter_min = columns["filter_min"][known]
+    filter_max = columns["filter_max"][known]
+    filter_min = filter_min[~np.isnan(filter_min)]
+    filter_max = filter_max[~np.isnan(filter_max)]
+    observed_min = float(filter_min.max()) if len(filter_min) else 0.0
+    observed_max = float(filter_max.min()) if len(filter_max) else math.inf
+    return History(amount, first_seen, window, contested, observed_min, observed_max)
+
+
+class _Singles:
+    """Orders alone in their take cycle: reached after reach_s whatever the configuration.
+
+    Their totals for any amount range are differences of prefix sums over the
+    amount-sorted orders, found with two binary searches.
+    """
+
+    __slots__ = ("amount", "candidates", "takes", "volume", "contested", "contested_won")
+
+    def __init__(self, amount: np.ndarray, won: np.ndarray, contested: np.ndarray) -> None:
+        order = np.argsort(amount, kind="stable")
+        self.amount = amount[order]
+        won, contested = won[order], contested[order]
+
+        def prefix(values: np.ndarray) -> np.ndarray:
+            return np.concatenate(([0], np.cumsum(values)))
+
+        self.candidates = np.arange(len(order) + 1)
+        self.takes = prefix(won)
+        self.volume = prefix(self.amount * won)
+        self.contested = prefix(contested)
+        self.contested_won = prefix(contested & won)
+
+    def totals(self, lo: float, hi: float) -> tuple:
+        a = np.searchsorted(self.amount, lo, "left")
+        b = np.searchsorted(self.amount, hi, "right")
+        return tuple(
+            column[b] - column[a]
+            for column in (self.candidates, self.takes, self.volume, self.contested, self.contested_won)
+        )
+
+
+def sweep(
+    history: History,
+    latency: Latency,
+    mins: Sequence[float],
+    maxes: Sequence[float],
+    rankings: Sequence[str] = RANKINGS,
+) -> List[Dict[str, Any]]:
+    """Simulate every (min, max, ranking) combination; one result dict per combination.
+
+    Only orders that share a take cycle with others depend on the ranking and
+    on which of their neighbours are candidates. They are sorted once per
+    ranking, and a candidate's rank within its cycle is a cumulative sum.
+    """
+    results = []
+    if not len(history):
+        return results
+    cycle = np.floor(history.first_seen / latency.take_cycle_s)
+    _, inverse, counts = np.unique(cycle, return_inverse=True, return_counts=True)
+    shared = counts[inverse] > 1
+    alone = ~shared
+    singles = _Singles(
+        history.amount[alone], history.window_s[alone] > latency.reach_s, history.contested[alone]
+    )
+    cycle, amount_all = cycle[shared], history.amount[shared]
+    window_all, contested_all = history.window_s[shared], history.contested[shared]
+    index = np.arange(len(cycle))
+    for ranking in rankings:
+        key = {
+            "table": -history.first_seen[shared],
+            "amount_desc": -amount_all,
+            "amount_asc": amount_all,
+        }[ranking]
+        order = np.lexsort((key, cycle))
+        amount = amount_all[order]
+        window = window_all[order]
+        contested = contested_all[order]
+        sorted_cycle = cycle[order]
+        starts = np.ones(len(order), dtype=bool)
+        np.not_equal(sorted_cycle[1:], sorted_cycle[:-1], out=starts[1:])
+        cycle_start = np.maximum.accumulate(np.where(starts, index, 0))
+        for lo in mins:
+            above = amount >= lo
+            for hi in maxes:
+                if hi < lo:
+                    continue
+                candidate = above & (amount <= hi)
+                before = np.cumsum(candidate) - candidate    # candidates ahead of each row overall
+                rank = before - before[cycle_start]          # ... and within its cycle
+                won = candidate & (window > latency.reach_s + rank * latency.take_cycle_s)
+                contested_in = candidate & contested
+                candidates, takes, volume, n_contested, contested_won = singles.totals(lo, hi)
+                takes += int(won.sum())
+                results.append({
+                    "min_amount": float(lo),
+                    "max_amount": None if math.isinf(hi) else float(hi),
+                    "ranking": ranking,
+                    "candidates": int(candidates + candidate.sum()),
+                    "takes": int(takes),
+                    "volume": float(volume + amount @ won),
+                    "contested": int(n_contested + contested_in.sum()),
+                    "contested_won": int(contested_won + (contested_in & won).sum()),
+                    "takes_per_day": takes / history.days,
+                    "beyond_observed": bool(lo < history.observed_min or hi > history.observed_max),
+                })
+    return results
+
+
+def default_grid(history: History, steps: int = 10) -> tuple:
+    """Mins from the amount deciles, maxes from the upper half plus the widest observed limit."""
+    lo, hi = history.observed_min, history.observed_max
+    if not len(history):
+        return [lo], [hi]
+    quantiles = np.quantile(history.amount, np.linspace(0, 1, steps + 1))
+    rounded = np.unique(np.round(quantiles, -2))
+    mins = [lo] + [float(v) for v in rounded[:-1] if lo < v <= hi]
+    maxes = [float(v) for v in rounded[len(rounded) // 2:] if lo <= v < hi] + [hi]
+    return mins, maxes
+
+
+def best(results: List[Dict[str, Any]], by: str = "volume", limit: int = 10) -> List[Dict[str, Any]]:
+    """Top results by `by`; configurations beyond the observed range come last."""
+    return sorted(
+        results, key=lambda r: (not r["beyond_observed"], r[by], r["takes"], r["volume"]), reverse=True
+    )[:limit]
+
+
+def run_backtest(
+    days: Optional[float] = 30.0,
+    mins: Optional[Sequence[float]] = None,
+    maxes: Optional[Sequence[float]] = None,
+    rankings: Sequence[str] = RANKINGS,
+    contested_s: float = 120.0,
+    ledger_dir: str = LEDGER_DIR,
+    db_path: str = _DB_PATH,
+) -> Dict[str, Any]:
+    """Load the data, sweep the grid and simulate the current settings (blocking)."""
+    started = time.monotonic()
+    history = load_history(ledger_dir, days, contested_s)
+    latency = load_latency(db_path)
+    loaded_s = time.monotonic() - started
+    grid_mins, grid_maxes = default_grid(history)
+    mins = list(mins) if mins is not None else grid_mins
+    maxes = list(maxes) if maxes is not None else grid_maxes
+    results = sweep(history, latency, mins, maxes, rankings)
+    current_min, current_max = load_settings(db_path)
+    current = sweep(
+        history, latency,
+        [current_min if current_min is not None else 0.0],
+        [current_max if current_max is not None else math.inf],
+        ["table"],
+    )
+    return {
+        "orders": len(history),
+        "days": history.days,
+        "latency": {"reach_s": latency.reach_s, "take_cycle_s": latency.take_cycle_s,
+                    "samples": latency.samples},
+        "observed": {"min_amount": history.observed_min,
+                     "max_amount": None if math.isinf(history.observed_max) else history.observed_max},
+        "configs": len(results),
+        "load_s": loaded_s,
+        "sweep_s": time.monotonic() - started - loaded_s,
+        "current": current[0] if current else None,
+        "results": results,
+    }
+
+
+def _parse_values(spec: str) -> List[float]:
+    """'1000,5000' or 'start:stop:step' (inclusive); 'none' means no limit."""
+    values: List[float] = []
+    for part in spec.split(","):
+        part = part.strip().lower()
+        if part in ("none", "inf"):
+            values.append(math.inf)
+        elif ":" in part:
+            start, stop, step = (float(p) for p in part.split(":"))
+            values.extend(float(v) for v in np.arange(start, stop + step / 2, step))
+        elif part:
+            values.append(float(part))
+    return values
+
+
+def _format_limit(value: Optional[float]) -> str:
+    return "—" if value is None else f"{value:,.0f}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--days", type=float, default=30.0, help="history to load (0 = all)")
+    parser.add_argument("--min", dest="mins", help="min_amount values, e.g. 1000:20000:1000 (default: deciles)")
+    parser.add_argument("--max", dest="maxes", help="max_amount values, 'none' = no limit")
+    parser.add_argument("--ranking", default=",".join(RANKINGS), help="comma-separated: " + ", ".join(RANKINGS))
+    parser.add_argument("--contested-s", type=float, default=120.0,
+                        help="orders gone within this many seconds count as contested")
+    parser.add_argument("--by", choices=("volume", "takes", "contested_won"), default="volume")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--ledger-dir", default=LEDGER_DIR)
+    parser.add_argument("--db", default=_DB_PATH)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    rankings = [r.strip() for r in args.ranking.split(",") if r.strip()]
+    unknown = set(rankings) - set(RANKINGS)
+    if unknown:
+        parser.error(f"unknown ranking: {', '.join(sorted(unknown))}")
+    report = run_backtest(
+        days=args.days or None,
+        mins=_parse_values(args.mins) if args.mins else None,
+        maxes=_parse_values(args.maxes) if args.maxes else None,
+        rankings=rankings,
+        contested_s=args.contested_s,
+        ledger_dir=args.ledger_dir,
+        db_path=args.db,
+    )
+    if args.json:
+        print(json.dumps(report))
+        return
+    latency = report["latency"]
+    print(f"{report['orders']} orders over {report['days']:.1f} days; reach {latency['reach_s']:.2f} s, "
+          f"take cycle {latency['take_cycle_s']:.2f} s ({latency['samples']} taken traces)")
+    print(f"{report['configs']} configurations: load {report['load_s']:.2f} s, sweep {report['sweep_s']:.2f} s")
+    if not report["orders"]:
+        print(f"No orders in the ledger ({args.ledger_dir}).")
+        return
+    observed = report["observed"]
+    print(f"Site filter while recording: {_format_limit(observed['min_amount'])} – "
+          f"{_format_limit(observed['max_amount'])}; rows marked * reach beyond it, "
+          "where no orders were seen")
+    print()
+    print(f"{'min':>10}{'max':>10}  {'ranking':<12}{'cand':>9}{'takes':>9}{'/day':>8}{'volume':>17}"
+          f"{'contested':>11}{'won':>9}")
+    rows = best(report["results"], args.by, args.top)
+    if report["current"] is not None:
+        rows = [dict(report["current"], ranking="current")] + rows
+    for r in rows:
+        ranking = r["ranking"] + ("*" if r["beyond_observed"] else "")
+        print(f"{_format_limit(r['min_amount']):>10}{_format_limit(r['max_amount']):>10}  {ranking:<12}"
+              f"{r['candidates']:>9}{r['takes']:>9}{r['takes_per_day']:>8.1f}{r['volume']:>17,.0f}"
+              f"{r['contested']:>11}{r['contested_won']:>9}")
+
+
+if __name__ == "__main__":
+    main()
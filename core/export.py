@@ -0,0 +1,214 @@
+"""Streaming export of order_log to CSV or Parquet.
+
+    python -m core.export --format csv --from 2026-01-01 --to 2026-03-31 --status taken --out ./data/export
+
+Rows are read in (taken_at, id) order, one keyset-paged query per chunk, so
+the read lock is released between chunks and the bot's writers are never held
+off for more than one chunk. They are written chunk by chunk: CSV rows, or one
+Parquet row group per chunk. Memory stays at one chunk whatever the range.
+Once a part reaches EXPORT_PART_MB, the next chunk starts a new file
+(<name>-partNN.csv / .parquet), so every part fits in a Telegram document.
+Parquet needs pyarrow, which is optional.
+
+Dates are UTC calendar days, like taken_at; `to` is inclusive.
+"""
+import abc
+import argparse
+import csv
+import logging
+import os
+import sqlite3
+from datetime import date, datetime, timedelta
+from typing import Iterator, List, Optional, Sequence
+
+from config import DATABASE_URL, EXPORT_PART_MB
+
+logger = logging.getLogger(__name__)
+
+_DB_PATH = DATABASE_URL.replace("sqlite+aiosqlite:///", "")
+FORMATS = ("csv", "parquet")
+STATUSES = ("taken", "failed")
+COLUMNS = ("id", "order_slug", "amount", "status", "taken_at")
+
+
+def _chunks(
+    db_path: str,
+    date_from: Optional[date],
+    date_to: Optional[date],
+    status: Optional[str],
+    chunk_rows: int,
+) -> Iterator[List[tuple]]:
+    conditions, params = [], []
+    if date_from is not None:
+        conditions.append("taken_at >= ?")
+        params.append(date_from.strftime("%Y-%m-%d"))
+    if date_to is not None:
+        conditions.append("taken_at < ?")
+        params.append((date_to + timedelta(days=1)).strftime("%Y-%m-%d"))
+    if status is not None:
+        conditions.append("status = ?")
+        params.append(status)
+    con = sqlite3.connect(db_path)
+    try:
+        last: Optional[tuple] = None
+        while True:
+            # One short read per chunk: a cursor held open for the whole export
+            # would keep the SHARED lock and lock out the bot's own writers
+            keyset = ["(taken_at, id) > (?, ?)"] if last is not None else []
+            where = " AND ".join(conditions + keyset)
+            rows = con.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM order_log "
+                f"{'WHERE ' + where + ' ' if where else ''}ORDER BY taken_at, id LIMIT ?",
+                (*params, *(last or ()), chunk_rows),
+            ).fetchall()
+            if not rows:
+                return
+            last = (rows[-1][4], rows[-1][0])
+            yield rows
+    finally:
+        con.close()
+
+
+class _PartWriter(abc.ABC):
+    """Writes chunks to <stem>-partNN.<ext>, starting a new part past max_bytes."""
+
+    def __init__(self, stem: str, ext: str, max_bytes: int) -> None:
+        self._stem = stem
+        self._ext = ext
+        self._max_bytes = max_bytes
+        self._file = None
+        self.paths: List[str] = []
+
+    def write(self, rows: List[tuple]) -> None:
+        if self._file is not None and self._file.tell() >= self._max_bytes:
+            self.close()
+        if self._file is None:
+            path = f"{self._stem}-part{len(self.paths) + 1:02d}.{self._ext}"
+            self.paths.append(path)
+            self._open(path)
+        self._write(rows)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._close()
+            self._file = None
+
+    @abc.abstractmethod
+    def _open(self, path: str) -> None:
+        """Create the part file at path and set self._file."""
+
+    @abc.abstractmethod
+    def _write(self, rows: List[tuple]) -> None:
+        """Append one chunk of rows to the open part."""
+
+    def _close(self) -> None:
+        self._file.close()
+
+
+class _CsvWriter(_PartWriter):
+    def _open(self, path: str) -> None:
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._csv = csv.writer(self._file)
+        self._csv.writerow(COLUMNS)
+
+    def _write(self, rows: List[tuple]) -> None:
+        self._csv.writerows(rows)
+
+
+class _ParquetWriter(_PartWriter):
+    def __init__(self, stem: str, ext: str, max_bytes: int) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        super().__init__(stem, ext, max_bytes)
+        self._pa, self._pq = pa, pq
+        self._schema = pa.schema([
+            ("id", pa.int64()),
+            ("order_slug", pa.string()),
+            ("amount", pa.float64()),
+            ("status", pa.string()),
+            ("taken_at", pa.timestamp("us", tz="UTC")),
+        ])
+
+    def _open(self, path: str) -> None:
+        self._file = open(path, "wb")
+        self._parquet = self._pq.ParquetWriter(self._file, self._schema, compression="zstd")
+
+    def _write(self, rows: List[tuple]) -> None:
+        ids, slugs, amounts, statuses, taken_at = zip(*rows)
+        self._parquet.write_batch(self._pa.record_batch([
+            self._pa.array(ids, self._pa.int64()),
+            self._pa.array(slugs, self._pa.string()),
+            self._pa.array(amounts, self._pa.float64()),
+            self._pa.array(statuses, self._pa.string()),
+            self._pa.array([datetime.fromisoformat(t) for t in taken_at], self._schema.field("taken_at").type),
+        ], schema=self._schema))
+
+    def _close(self) -> None:
+        self._parquet.close()
+        self._file.close()
+
+
+def export_order_log(
+    directory: str,
+    fmt: str = "csv",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    status: Optional[str] = None,
+    chunk_rows: int = 5000,
+    part_bytes: int = int(EXPORT_PART_MB * 2**20),
+    db_path: str = _DB_PATH,
+) -> List[str]:
+    """Write the matching rows into one or more files under directory; returns their paths.
+
+    Raises ImportError for Parquet without pyarrow. No rows → no files.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown format: {fmt}")
+    os.makedirs(directory, exist_ok=True)
+    name = "order_log"
+    if date_from is not None or date_to is not None:
+        name += f"-{date_from or 'start'}_{date_to or 'now'}"
+    if status is not None:
+        name += f"-{status}"
+    writer_class = _CsvWriter if fmt == "csv" else _ParquetWriter
+    writer = writer_class(os.path.join(directory, name), fmt, part_bytes)
+    rows_total = 0
+    try:
+        for rows in _chunks(db_path, date_from, date_to, status, chunk_rows):
+            writer.write(rows)
+            rows_total += len(rows)
+    finally:
+        writer.close()
+    logger.info("Exported %d order_log rows to %d %s file(s)", rows_total, len(writer.paths), fmt)
+    return writer.paths
+
+
+def parse_date(text: str) -> date:
+    return datetime.strptime(text, "%Y-%m-%d").date()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--from", dest="date_from", type=parse_date, help="YYYY-MM-DD (UTC)")
+    parser.add_argument("--to", dest="date_to", type=parse_date, help="YYYY-MM-DD (UTC), inclusive")
+    parser.add_argument("--status", choices=STATUSES)
+    parser.add_argument("--out", default="./data/export")
+    parser.add_argument("--part-mb", type=float, default=EXPORT_PART_MB)
+    parser.add_argument("--db", default=_DB_PATH)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    paths = export_order_log(
+        args.out, args.format, args.date_from, args.date_to, args.status,
+        part_bytes=int(args.part_mb * 2**20), db_path=args.db,
+    )
+    for path in paths:
+        print(f"{path}\t{os.path.getsize(path)}")
+    if not paths:
+        print("No rows in the selected range.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+"""Append-only ledger of every order the worker has seen (LEDGER_ENABLED).
+
+order_log only holds the orders we tried to take. The ledger keeps one record
+per distinct slug that passed through the table, whatever happened to it:
+  - amount and, when the page shows it, the creation time;
+  - first seen, last seen and gone (the first cycle it was missing);
+  - the amount filter the table was read with when the order was first seen;
+  - our last take outcome, if we tried.
+The site only lists orders inside the active amount filter, so the ledger
+knows nothing about amounts outside it. The recorded range says which
+amounts a stretch of records actually covers.
+"Gone" is relative to what the worker reads: the whole virtual list with
+FULL_TABLE_COVERAGE (flag FLAG_FULL_COVERAGE), otherwise the rendered window,
+where orders also go when newer ones push them out of view. An order counts
+as gone after LEDGER_GONE_AFTER seconds of complete cycles without it; cycles
+cut short by a take or an error do not count.
+
+In window mode an order pushed out of view can scroll back in. So a closed
+order is first held for LEDGER_REOPEN_WITHIN seconds, up to _HELD_MAX orders.
+If it shows up again in that time, its entry is reopened and the order keeps
+one record. Only later is the record written. Under full coverage a missing
+order has really left the list and is written at once.
+
+Open entries live as long as the ledger object, across worker stops and
+restarts, so an order still listed after a restart keeps its one record. Only
+close(), registered with atexit on the first cycle, writes the still-listed
+ones (FLAG_UNCLOSED). An order that went away while the table was not read
+for longer than LEDGER_GONE_AFTER, e.g. during a restart, is recorded as gone
+at its last sighting: a lower bound.
+
+The worker thread only updates a dict per row (observe) and packs a record
+when an order is closed. Packed records are handed to a writer thread in
+batches, every LEDGER_FLUSH_INTERVAL seconds. The writer appends them as
+zlib-compressed blocks to LEDGER_DIR/seen-<YYYYmmdd-HHMMSS-micros>.bin and
+starts a new segment at LEDGER_SEGMENT_MB or at midnight.
+
+Segment layout: the 8-byte magic, then blocks of
+<raw length u32><compressed length u32><crc32 u32><zlib data>. Each record is
+_RECORD (first_seen, last_seen, gone_at, created, amount, filter_min,
+filter_max as float64, where NaN means unknown, then outcome, flags, slug
+length) followed by the slug in UTF-8. A filter without a lower or upper
+limit is stored as 0 or inf. Segments with the older MAGIC_V1 have no filter
+fields, and the reader reports NaN for them. A torn block at the end of a
+segment, e.g. after a crash, is skipped by the reader.
+"""
+import atexit
+import functools
+import logging
+import math
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from array import array
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"C2CSEEN2"
+_RECORD = struct.Struct("<dddddddBBB")
+MAGIC_V1 = b"C2CSEEN1"
+_RECORD_V1 = struct.Struct("<dddddBBB")   # no filter_min/filter_max
+_FORMATS = {MAGIC: _RECORD, MAGIC_V1: _RECORD_V1}
+_BLOCK = struct.Struct("<III")
+
+# Outcome codes; index 0 means we never tried to take the order
+OUTCOMES = (
+    "", "taken", "no_take_button", "no_alert", "error_page", "login_redirect",
+    "stale", "no_anchor", "webdriver_error", "aborted",
+)
+_OUTCOME_CODES = {name: code for code, name in enumerate(OUTCOMES)}
+
+FLAG_FULL_COVERAGE = 1   # seen/gone over the whole virtual list, not the rendered window
+FLAG_UNCLOSED = 2        # still listed when the ledger was closed; gone_at unknown
+
+# Window mode: at most this many closed orders wait to be reopened (oldest written first)
+_HELD_MAX = 4096
+
+_NAN = float("nan")
+# Open entry fields
+_AMOUNT, _CREATED, _FIRST, _LAST, _MISSING, _OUTCOME, _FILTER_MIN, _FILTER_MAX = range(8)
+
+
+class LedgerRecord:
+    __slots__ = ("slug", "amount", "created", "first_seen", "last_seen", "gone_at", "outcome", "flags",
+                 "filter_min", "filter_max")
+
+    def __init__(self, slug: str, amount: Optional[float], created: Optional[float], first_seen: float,
+                 last_seen: float, gone_at: Optional[float], outcome: str, flags: int,
+                 filter_min: Optional[float] = None, filter_max: Optional[float] = None) -> None:
+        self.slug = slug
+        self.amount = amount
+        self.created = created
+        self.first_seen = first_seen
+        self.last_seen = last_seen
+        self.gone_at = gone_at
+        self.outcome = outcome
+        self.flags = flags
+        # Amount filter of the table when first seen (0 / inf = no limit), None if unknown
+        self.filter_min = filter_min
+        self.filter_max = filter_max
+
+    @property
+    def listed_s(self) -> Optional[float]:
+        """Seconds from first seen to gone, None if the order was still listed."""
+        return None if self.gone_at is None else self.gone_at - self.first_seen
+
+    def __repr__(self) -> str:
+        return f"<LedgerRecord {self.slug} amount={self.amount} outcome={self.outcome or '-'}>"
+
+
+class SeenLedger:
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = 16 * 2**20,
+        flush_interval: float = 30.0,
+        gone_after: float = 10.0,
+        reopen_within: float = 600.0,
+    ) -> None:
+        self._directory = directory
+        self._segment_bytes = segment_bytes
+        self._flush_interval = flush_interval
+        self._gone_after = gone_after
+        self._reopen_within = reopen_within
+        self._open: Dict[str, list] = {}
+        # Window mode: orders closed as gone, not yet written: slug -> (entry, gone_at)
+        self._held: Dict[str, Tuple[list, float]] = {}
+        self._cycle_at = 0.0
+        self._cycle_filter = (_NAN, _NAN)
+        self._exit_hook = False
+        self._pending: List[bytes] = []
+        self._last_flush = time.monotonic()
+        self._queue: "queue.Queue[Optional[List[bytes]]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._file = None
+        self._file_day: Optional[date] = None
+        self.recorded = 0
+
+    # ── Worker thread ────────────────────────────────────────────────────────
+
+    def begin_cycle(self, filter_range: Optional[Tuple[Optional[float], Optional[float]]] = None) -> None:
+        """Start a table read; observe() calls until end_cycle() share its timestamp.
+
+        filter_range is the (min, max) amount filter the table is shown with,
+        None where a side is open; pass None if the filter state is unknown.
+        """
+        self._cycle_at = time.time()
+        if filter_range is None:
+            self._cycle_filter = (_NAN, _NAN)
+        else:
+            lo, hi = filter_range
+            self._cycle_filter = (0.0 if lo is None else lo, math.inf if hi is None else hi)
+        if not self._exit_hook:
+            atexit.register(self.close)
+            self._exit_hook = True
+
+    def observe(self, slug: str, amount: Optional[float]) -> None:
+        entry = self._open.get(slug)
+        if entry is None:
+            held = self._held.pop(slug, None)
+            if held is None:
+                self._open[slug] = [amount, None, self._cycle_at, self._cycle_at, 0.0, 0, *self._cycle_filter]
+                return
+            entry = self._open[slug] = held[0]   # scrolled back into the window
+        entry[_LAST] = self._cycle_at
+        entry[_LAST] = self._cycle_at
+        entry[_MISSING] = 0.0
+        if entry[_AMOUNT] is None:
+            entry[_AMOUNT] = amount
+
+    def set_created(self, slug: str, created: float) -> None:
+        entry = self._open.get(slug)
+        if entry is not None:
+            entry[_CREATED] = created
+
+    def set_outcome(self, slug: str, outcome: str) -> None:
+        entry = self._open.get(slug)
+        if entry is not None:
+            entry[_OUTCOME] = _OUTCOME_CODES.get(outcome, 0)
+
+    def end_cycle(self, complete: bool = True, full_coverage: bool = False) -> None:
+        """Close orders missing for gone_after seconds; hand a batch to the writer when due.
+
+        Pass complete=False when the cycle stopped before reading every row.
+        """
+        at = self._cycle_at
+        if complete:
+            gone = []
+            for slug, entry in self._open.items():
+                if entry[_LAST] >= at:
+                    continue
+                if not entry[_MISSING]:
+                    entry[_MISSING] = at
+                elif at - entry[_MISSING] >= self._gone_after:
+                    gone.append(slug)
+            flags = FLAG_FULL_COVERAGE if full_coverage else 0
+            for slug in gone:
+                entry = self._open.pop(slug)
+                # No complete cycle for longer than gone_after between the last sighting
+                # and the first miss (a restart): when it went is unknown, take the former
+                missing = entry[_MISSING]
+                gone_at = entry[_LAST] if missing - entry[_LAST] > self._gone_after else missing
+                if full_coverage:
+                    self._pending.append(_pack(slug, entry, gone_at, flags))
+                else:
+                    self._held[slug] = (entry, gone_at)
+            self._release_held(at - self._reopen_within)
+        if self._pending and time.monotonic() - self._last_flush >= self._flush_interval:
+            self._flush()
+
+    def _release_held(self, before: float) -> None:
+        """Write held orders closed before `before`, and the oldest ones beyond _HELD_MAX."""
+        held = self._held
+        while held:
+            slug = next(iter(held))
+            entry, gone_at = held[slug]
+            if gone_at >= before and len(held) <= _HELD_MAX:
+                return
+            del held[slug]
+            self._pending.append(_pack(slug, entry, gone_at, 0))
+
+    def flush(self, timeout: float = 10.0) -> None:
+        """Write every closed record and stop the writer; open and held entries are kept.
+
+        Called when the worker thread ends: a restarted worker goes on with the
+        same open entries.
+        """
+        if self._pending:
+            self._flush()
+        if self._writer is None:
+            return
+        self._queue.put(None)
+        self._writer.join(timeout)
+        self._writer = None
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Record orders still listed (FLAG_UNCLOSED) and write everything (process exit)."""
+        self._release_held(math.inf)
+        for slug, entry in list(self._open.items()):
+            self._pending.append(_pack(slug, entry, None, FLAG_UNCLOSED))
+        self._open.clear()
+        self.flush(timeout)
+
+    def _flush(self) -> None:
+        self._last_flush = time.monotonic()
+        batch, self._pending = self._pending, []
+        self.recorded += len(batch)
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, name="ledger", daemon=True)
+            self._writer.start()
+        self._queue.put(batch)
+
+    # ── Writer thread ────────────────────────────────────────────────────────
+
+    def _write_loop(self) -> None:
+        try:
+            while True:
+                batch = self._queue.get()
+                if batch is None:
+                    return
+                try:
+                    self._write_block(batch)
+                except OSError as exc:
+                    logger.warning("Could not write %d ledger records: %s", len(batch), exc)
+                    self._close_file()
+        finally:
+            self._close_file()
+
+    def _write_block(self, batch: List[bytes]) -> None:
+        raw = b"".join(batch)
+        data = zlib.compress(raw, 6)
+        block = _BLOCK.pack(len(raw), len(data), zlib.crc32(data)) + data
+        today = date.today()
+        if self._file is not None and (
+            self._file_day != today or self._file.tell() + len(block) > self._segment_bytes
+        ):
+            self._close_file()
+        if self._file is None:
+            os.makedirs(self._directory, exist_ok=True)
+            path = os.path.join(self._directory, f"seen-{datetime.now():%Y%m%d-%H%M%S-%f}.bin")
+            self._file = open(path, "ab")
+            if self._file.tell() == 0:
+                self._file.write(MAGIC)
+            self._file_day = today
+            logger.info("Ledger segment %s", path)
+        self._file.write(block)
+        self._file.flush()
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _pack(slug: str, entry: list, gone_at: Optional[float], flags: int) -> bytes:
+    name = slug.encode("utf-8")[:255]
+    amount, created = entry[_AMOUNT], entry[_CREATED]
+    return _RECORD.pack(
+        entry[_FIRST], entry[_LAST],
+        _NAN if gone_at is None else gone_at,
+        _NAN if created is None else created,
+        _NAN if amount is None else amount,
+        entry[_FILTER_MIN], entry[_FILTER_MAX],
+        entry[_OUTCOME], flags, len(name),
+    ) + name
+
+
+def _optional(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+
+# ── Reading ──────────────────────────────────────────────────────────────────
+
+def iter_segment_files(directory: str) -> Iterator[str]:
+    """Paths of all ledger segments under directory, oldest first."""
+    try:
+        names = sorted(os.listdir(directory))
+    except OSError:
+        return
+    for name in names:
+        if name.startswith("seen-") and name.endswith(".bin"):
+            yield os.path.join(directory, name)
+
+
+def _read_blocks(path: str) -> Iterator[Tuple[struct.Struct, bytes]]:
+    """(record format, decompressed block) of one segment, stopping at a torn or corrupt block."""
+    with open(path, "rb") as f:
+        record = _FORMATS.get(f.read(len(MAGIC)))
+        if record is None:
+            logger.warning("Not a ledger segment: %s", path)
+            return
+        while True:
+            header = f.read(_BLOCK.size)
+            if len(header) < _BLOCK.size:
+                return
+            raw_len, data_len, crc = _BLOCK.unpack(header)
+            data = f.read(data_len)
+            if len(data) < data_len or zlib.crc32(data) != crc:
+                logger.warning("Torn block at the end of %s, skipped", path)
+                return
+            yield record, zlib.decompress(data)
+
+
+def _unpack_from(record: struct.Struct, raw: bytes, offset: int) -> tuple:
+    """One record's fields in the current layout; unknown filter fields of v1 records are NaN."""
+    values = record.unpack_from(raw, offset)
+    if record is _RECORD_V1:
+        values = values[:5] + (_NAN, _NAN) + values[5:]
+    return values
+
+
+def read_segment(path: str) -> Iterator[LedgerRecord]:
+    for record, raw in _read_blocks(path):
+        offset = 0
+        while offset < len(raw):
+            first, last, gone, created, amount, filter_min, filter_max, outcome, flags, size = (
+                _unpack_from(record, raw, offset)
+            )
+            offset += record.size
+            slug = raw[offset:offset + size].decode("utf-8", "replace")
+            offset += size
+            yield LedgerRecord(
+                slug, _optional(amount), _optional(created), first, last, _optional(gone),
+                OUTCOMES[outcome] if outcome < len(OUTCOMES) else "", flags,
+                _optional(filter_min), _optional(filter_max),
+            )
+
+
+def iter_records(directory: str, since: Optional[float] = None) -> Iterator[LedgerRecord]:
+    """All records under directory in write order; `since` filters on first_seen (epoch s)."""
+    for path in iter_segment_files(directory):
+        for record in read_segment(path):
+            if since is None or record.first_seen >= since:
+                yield record
+
+
+COLUMNS = ("first_seen", "last_seen", "gone_at", "created", "amount", "filter_min", "filter_max",
+           "outcome", "flags")
+
+
+def read_columns(directory: str, since: Optional[float] = None) -> Dict[str, array]:
+    """The numeric fields of all records as typed arrays, without slugs or record objects.
+
+    Float columns keep NaN for unknown values; outcome and flags are bytes.
+    np.frombuffer() turns each column into a NumPy array without a copy.
+    """
+    columns = {name: array("d") for name in COLUMNS[:7]}
+    columns["outcome"] = array("B")
+    columns["flags"] = array("B")
+    appends = [columns[name].append for name in COLUMNS]
+    for path in iter_segment_files(directory):
+        for record, raw in _read_blocks(path):
+            unpack_from = record.unpack_from if record is _RECORD else functools.partial(_unpack_from, record)
+            offset = 0
+            while offset < len(raw):
+                values = unpack_from(raw, offset)
+                offset += record.size + values[-1]
+                if since is not None and values[0] < since:
+                    continue
+                for append, value in zip(appends, values):
+                    append(value)
+    return columns
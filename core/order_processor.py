@@ -1,27 +1,49 @@
 import asyncio
 import logging
+import queue
 import sqlite3
+import threading
+import time
 import urllib.parse
 import urllib.request
 from datetime import datetime
-from typing import Optional, Set
+from typing import TYPE_CHECKING, Optional, Set
 
 from aiogram import Bot
 
-from config import BOT_TOKEN, DATABASE_URL, HEADLESS
-from core.selenium_worker import SeleniumWorker
+from config import (
+    BOT_TOKEN,
+    DATABASE_URL,
+    HEADLESS,
+    METRICS_HOST,
+    METRICS_PORT,
+    SUPERVISOR_ENABLED,
+    TELEGRAM_API_URL,
+    WORKER_MODE,
+)
+from core import metrics
+from core.take_trace import STAGES, TakeTrace
 from db.engine import get_session
 from db.repository import OrderLogRepository, SettingsRepository
 
+if TYPE_CHECKING:
+    from core.selenium_worker import SeleniumWorker
+    from core.supervisor import WorkerSupervisor
+
 logger = logging.getLogger(__name__)
 
 # Derive the raw sqlite file path from the async URL, e.g.:
 #   "sqlite+aiosqlite:///./data/bot.db"  →  "./data/bot.db"
 _DB_PATH = DATABASE_URL.replace("sqlite+aiosqlite:///", "")
 
+# OrderProcessor.start_error texts, shown after "Не удалось запустить: "
+START_NO_CREDENTIALS = "не заданы логин и пароль.\nПерейдите в настройки."
+START_WORKER_BUSY = "предыдущий браузер не остановился. Попробуйте ещё раз."
+
 
 def _db_add_sync(slug: str, amount: Optional[float], status: str) -> None:
     """Write an order_log entry synchronously (safe to call from any thread)."""
+    started = time.monotonic()
     try:
         con = sqlite3.connect(_DB_PATH)
         con.execute(
@@ -35,29 +57,92 @@ def _db_add_sync(slug: str, amount: Optional[float], status: str) -> None:
         )
         con.commit()
         con.close()
+        metrics.DB_WRITE_SECONDS.labels("order_log").observe(time.monotonic() - started)
         logger.info("DB write OK: slug=%s status=%s", slug, status)
     except Exception as exc:
         logger.error("DB write failed: slug=%s status=%s err=%s", slug, status, exc)
 
 
+class _TraceWriter:
+    """Writes take_trace rows in batches from its own thread.
+
+    add() only queues the row, so the worker thread never waits on SQLite or
+    on the lock held by another writer. Rows queued when the process exits
+    are lost, which is acceptable for traces.
+    """
+
+    def __init__(self, db_path: str, max_batch: int = 200, max_queued: int = 10000) -> None:
+        self._db_path = db_path
+        self._max_batch = max_batch
+        self._queue: "queue.Queue[tuple]" = queue.Queue(maxsize=max_queued)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._sql = (
+            "INSERT INTO take_trace (order_slug, amount, outcome, traced_at, "
+            + ", ".join(f"{stage}_ms" for stage in STAGES)
+            + ") VALUES (?, ?, ?, ?, " + ", ".join("?" for _ in STAGES) + ")"
+        )
+
+    def add(self, trace: TakeTrace) -> None:
+        offsets = trace.offsets_ms()
+        row = (
+            trace.slug,
+            float(trace.amount) if trace.amount is not None else None,
+            trace.outcome,
+            datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S.%f"),
+            *(offsets[stage] for stage in STAGES),
+        )
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._write_loop, name="trace-writer", daemon=True)
+                self._thread.start()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            logger.warning("Trace writer backlog full, dropping trace for %s", trace.slug)
+
+    def _write_loop(self) -> None:
+        con = sqlite3.connect(self._db_path, timeout=30)
+        while True:
+            rows = [self._queue.get()]
+            while len(rows) < self._max_batch:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            started = time.monotonic()
+            try:
+                with con:
+                    con.executemany(self._sql, rows)
+                metrics.DB_WRITE_SECONDS.labels("take_trace").observe(time.monotonic() - started)
+            except Exception as exc:
+                logger.error("Trace write failed (%d rows dropped): %s", len(rows), exc)
+
+
 def _tg_send_sync(chat_ids: Set[int], text: str) -> None:
     """Send a Telegram message synchronously via urllib (no asyncio required)."""
     if not chat_ids:
         logger.warning("_tg_send_sync: no chat_ids registered, cannot send")
         return
-    for chat_id in list(chat_ids):
+    chat_ids = list(chat_ids)   # inc and dec over the same chats, even if one registers meanwhile
+    metrics.NOTIFICATIONS_PENDING.inc(len(chat_ids))
+    for chat_id in chat_ids:
+        started = time.monotonic()
         try:
             payload = urllib.parse.urlencode(
                 {"chat_id": chat_id, "text": text, "parse_mode": "HTML"}
             ).encode()
             req = urllib.request.Request(
-                f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage",
+                f"{TELEGRAM_API_URL}/bot{BOT_TOKEN}/sendMessage",
                 data=payload,
             )
             urllib.request.urlopen(req, timeout=10)
             logger.info("Sync TG sent to chat_id=%s", chat_id)
         except Exception as exc:
             logger.warning("Sync TG send failed chat_id=%s: %s", chat_id, exc)
+        finally:
+            metrics.NOTIFICATIONS_PENDING.dec()
+            metrics.NOTIFICATION_SEND_SECONDS.labels("sync").observe(time.monotonic() - started)
 
 
 class OrderProcessor:
@@ -66,13 +151,43 @@ class OrderProcessor:
         self._loop: Optional[asyncio.AbstractEventLoop] = None
         self._chat_ids: Set[int] = set()
         self._notify_taken: bool = True
-        self._worker = SeleniumWorker(
-            on_order_taken=self._on_taken,
-            on_order_failed=self._on_failed,
-            on_startup_ok=self._on_startup,
-            headless=HEADLESS,
+        # Created on first use so that Selenium is not imported for bot-only work
+        self._worker_instance: Optional["SeleniumWorker"] = None
+        self._supervisor: Optional["WorkerSupervisor"] = None
+        self._metrics_server: Optional[metrics.MetricsServer] = None
+        self.start_error: str = ""
+        self._trace_writer = _TraceWriter(_DB_PATH)
+        metrics.WORKER_UP.set_function(lambda: 1.0 if self.is_running() else 0.0)
+        metrics.WORKER_RESTARTS.set_function(
+            lambda: self._supervisor.restarts if self._supervisor is not None else 0
         )
 
+    @property
+    def _worker(self) -> "SeleniumWorker":
+        if self._worker_instance is None:
+            from core.supervisor import WorkerSupervisor
+
+            if WORKER_MODE == "process":
+                from core.worker_process import ProcessWorker as worker_cls
+            else:
+                from core.selenium_worker import SeleniumWorker as worker_cls
+
+            self._worker_instance = worker_cls(
+                on_order_taken=self._on_taken,
+                on_order_failed=self._on_failed,
+                on_startup_ok=self._on_startup,
+                on_take_trace=self._on_take_trace,
+                headless=HEADLESS,
+            )
+            if SUPERVISOR_ENABLED:
+                self._supervisor = WorkerSupervisor(
+                    self._worker_instance,
+                    on_down=self._on_worker_down,
+                    on_restart=self._on_worker_restarted,
+                    on_give_up=self._on_worker_given_up,
+                )
+        return self._worker_instance
+
     def set_loop(self, loop: asyncio.AbstractEventLoop) -> None:
         self._loop = loop
 
@@ -95,14 +210,63 @@ class OrderProcessor:
             logger.warning("Failed to persist chat_id=%s: %s", chat_id, exc)
 
     def is_running(self) -> bool:
-        return self._worker.is_running()
+        # While the supervisor is restarting a crashed worker the bot is still "running"
+        if self._supervisor is not None and self._supervisor.is_active():
+            return True
+        return self._worker_instance is not None and self._worker_instance.is_running()
+
+    def prewarm(self) -> None:
+        """Start booting Firefox right away (PREWARM); login follows in prewarm_login()."""
+        self._worker.prewarm()
+
+    async def prewarm_login(self) -> None:
+        """Hand the saved credentials to the prewarming browser so it can log in early."""
+        async with get_session() as session:
+            settings = await SettingsRepository(session).get_or_create()
+        if not settings.login or not settings.password:
+            logger.info("Prewarm: no credentials saved yet — browser waits for start")
+            return
+        self._worker.provide_credentials(
+            settings.login, settings.password, settings.min_amount, settings.max_amount
+        )
+
+    def update_filters(self, min_amount: Optional[float], max_amount: Optional[float]) -> None:
+        """Push a new amount range to the running worker (no restart needed)."""
+        if self.is_running():
+            self._worker.reconfigure(min_amount, max_amount)
+
+    def request_retry(self, slug: str) -> None:
+        self._worker.request_retry(slug)
+
+    def supervisor_stats(self) -> Optional[dict]:
+        return self._supervisor.stats() if self._supervisor is not None else None
+
+    def start_metrics(self) -> None:
+        """Serve /metrics on METRICS_PORT from a background thread (no-op when 0)."""
+        if not METRICS_PORT or self._metrics_server is not None:
+            return
+        server = metrics.MetricsServer(METRICS_HOST, METRICS_PORT)
+        try:
+            server.start()
+        except OSError as exc:
+            logger.error("Metrics endpoint not started on %s:%s: %s", METRICS_HOST, METRICS_PORT, exc)
+            return
+        self._metrics_server = server
+
+    def take_stats(self) -> Optional[dict]:
+        """Take-path percentiles since the bot started (None before the worker exists)."""
+        if self._worker_instance is None:
+            return None
+        return self._worker_instance.take_stats.summary()
 
     async def start(self) -> bool:
+        """Start the worker; on False, start_error says why (for the user)."""
         async with get_session() as session:
             repo = SettingsRepository(session)
             settings = await repo.get_or_create()
 
         if not settings.login or not settings.password:
+            self.start_error = START_NO_CREDENTIALS
             return False
 
         # Cache notify_taken
@@ -113,17 +277,24 @@ class OrderProcessor:
             self._chat_ids.add(settings.chat_id)
             logger.info("Restored chat_id=%s from DB", settings.chat_id)
 
-        await self._set_active(True)
-        self._worker.start(
+        started = self._worker.start(
             login=settings.login,
             password=settings.password,
             min_amount=settings.min_amount,
             max_amount=settings.max_amount,
         )
+        if not started:
+            self.start_error = START_WORKER_BUSY
+            return False
+        await self._set_active(True)
+        if self._supervisor is not None:
+            self._supervisor.start()
         return True
 
     async def stop(self) -> None:
         await self._set_active(False)
+        if self._supervisor is not None:
+            self._supervisor.stop()
         self._worker.stop()
 
     async def _set_active(self, value: bool) -> None:
@@ -133,7 +304,13 @@ class OrderProcessor:
 
     # ── Callbacks called from the Selenium thread ────────────────────────────
 
-    def _on_startup(self, min_amount: Optional[float], max_amount: Optional[float]) -> None:
+    def _on_startup(
+        self,
+        min_amount: Optional[float],
+        max_amount: Optional[float],
+        startup_seconds: float,
+        session_restored: bool,
+    ) -> None:
         """Called once after the bot successfully logs in and applies filters.
 
         Sends a single startup summary to all registered chats.
@@ -151,15 +328,56 @@ class OrderProcessor:
             "<b>Бот успешно запущен</b>\n\n"
             "Страница заказов: открыта\n"
             f"{filter_line}\n"
+            f"Время запуска: {startup_seconds:.1f} с "
+            f"({'сессия восстановлена' if session_restored else 'вход по паролю'})\n"
             "Мониторинг новых ордеров начат"
         )
         _tg_send_sync(self._chat_ids, text)
 
+    def _on_worker_down(self, reason: str) -> None:
+        """Called from the supervisor thread when the worker crashed or hung."""
+        _tg_send_sync(
+            self._chat_ids,
+            f"<b>Воркер остановился</b>\n\nПричина: {reason}\nПерезапускаю браузер...",
+        )
+
+    def _on_worker_restarted(self, reason: str, downtime: float, restarts: int) -> None:
+        _tg_send_sync(
+            self._chat_ids,
+            "<b>Воркер перезапущен</b>\n\n"
+            f"Причина: {reason}\n"
+            f"Простой: {downtime:.0f} с\n"
+            f"Перезапусков с начала работы: {restarts}",
+        )
+
+    def _on_worker_given_up(self, reason: str) -> None:
+        """Called from the supervisor thread when it stops restarting the worker."""
+        # Not resumed on the next bot launch either: that would retry the same login
+        try:
+            con = sqlite3.connect(_DB_PATH)
+            con.execute("UPDATE settings SET is_active = 0 WHERE id = 1")
+            con.commit()
+            con.close()
+        except Exception as exc:
+            logger.warning("Failed to persist is_active=False: %s", exc)
+        if self._worker.fatal_error:
+            hint = "Сайт не принял логин и пароль. Проверьте их в настройках и запустите бота снова."
+        else:
+            hint = "Браузер так и не заработал после перезапусков. Запустите бота снова."
+        _tg_send_sync(
+            self._chat_ids,
+            f"<b>Воркер остановлен</b>\n\nПричина: {reason}\n{hint}",
+        )
+
+    def _on_take_trace(self, trace: TakeTrace) -> None:
+        self._trace_writer.add(trace)
+
     def _on_taken(self, slug: str, amount: Optional[float]) -> None:
         logger.info(
             "_on_taken: slug=%s amount=%s notify=%s chat_ids=%s loop_set=%s",
             slug, amount, self._notify_taken, self._chat_ids, self._loop is not None,
         )
+        metrics.ORDERS_TAKEN.inc()
         # 1. Write to DB synchronously — guaranteed, no asyncio dependency
         _db_add_sync(slug, amount, "taken")
 
@@ -171,6 +389,7 @@ class OrderProcessor:
 
     def _on_failed(self, slug: str, amount: Optional[float]) -> None:
         logger.info("_on_failed: slug=%s amount=%s", slug, amount)
+        metrics.ORDERS_FAILED.inc()
         # 1. Write to DB synchronously
         _db_add_sync(slug, amount, "failed")
 
@@ -218,8 +437,14 @@ class OrderProcessor:
     async def _broadcast(self, text: str, **kwargs) -> None:
         if not self._chat_ids:
             logger.warning("_broadcast: no registered chats")
-        for chat_id in list(self._chat_ids):
+        chat_ids = list(self._chat_ids)
+        metrics.NOTIFICATIONS_PENDING.inc(len(chat_ids))
+        for chat_id in chat_ids:
+            started = time.monotonic()
             try:
                 await self._bot.send_message(chat_id, text, parse_mode="HTML", **kwargs)
             except Exception as exc:
                 logger.warning("_broadcast failed chat_id=%s: %s", chat_id, exc)
+            finally:
+                metrics.NOTIFICATIONS_PENDING.dec()
+                metrics.NOTIFICATION_SEND_SECONDS.labels("async").observe(time.monotonic() - started)
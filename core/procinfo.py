@@ -0,0 +1,108 @@
+"""Small /proc helpers for the geckodriver/Firefox process tree (Linux only).
+
+All functions degrade to empty results on platforms without /proc, so callers
+never need to special-case Windows development machines.
+"""
+import logging
+import os
+import signal
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+def _ppid_map() -> Dict[int, int]:
+    """Return {pid: ppid} for every process visible in /proc."""
+    result: Dict[int, int] = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return result
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # comm (field 2) may contain spaces/parens — split after the last ')'
+        fields = stat[stat.rfind(")") + 2:].split()
+        if len(fields) >= 2:
+            result[int(entry)] = int(fields[1])
+    return result
+
+
+def process_tree(pid: int) -> List[int]:
+    """Return pid followed by all of its descendants (geckodriver → firefox → content)."""
+    parents = _ppid_map()
+    if pid not in parents:
+        return []
+    tree = [pid]
+    i = 0
+    while i < len(tree):
+        current = tree[i]
+        tree.extend(child for child, parent in parents.items() if parent == current)
+        i += 1
+    return tree
+
+
+def kill_tree(pid: int) -> int:
+    """SIGKILL pid and every descendant, children first. Returns how many were signalled."""
+    killed = 0
+    for target in reversed(process_tree(pid)):
+        try:
+            os.kill(target, signal.SIGKILL)
+            killed += 1
+        except OSError:
+            pass
+    if killed:
+        logger.warning("Killed %d browser process(es) rooted at pid=%s", killed, pid)
+    return killed
+
+
+def rss_bytes(pid: int) -> int:
+    """Resident set size of one process in bytes (0 if it is gone or /proc is missing)."""
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0
+
+
+def tree_rss(pid: int) -> int:
+    """Summed RSS of pid and all of its descendants, in bytes."""
+    return sum(rss_bytes(p) for p in process_tree(pid))
+
+
+def cpu_seconds(pid: int) -> float:
+    """User + system CPU time consumed so far by one process."""
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            stat = f.read()
+    except OSError:
+        return 0.0
+    fields = stat[stat.rfind(")") + 2:].split()
+    # utime and stime are fields 14 and 15 of stat, i.e. 11 and 12 after comm/state
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def tree_cpu_seconds(pid: int) -> float:
+    """Summed CPU time of pid and all of its (still living) descendants."""
+    return sum(cpu_seconds(p) for p in process_tree(pid))
+
+
+def open_fds(pid: int) -> int:
+    """Number of open file descriptors of one process (0 if unknown)."""
+    try:
+        return len(os.listdir(f"/proc/{pid}/fd"))
+    except OSError:
+        return 0
+
+
+def tree_open_fds(pid: int) -> int:
+    """Summed open file descriptors of pid and all of its descendants."""
+    return sum(open_fds(p) for p in process_tree(pid))
@@ -0,0 +1,195 @@
+"""Retention for order_log: roll up, archive, delete, compact (RETENTION_DAYS > 0).
+
+Every RETENTION_INTERVAL_H hours, RetentionJob moves order_log rows older than
+RETENTION_DAYS out of the database, RETENTION_BATCH_ROWS at a time:
+  1. the oldest rows are appended to RETENTION_ARCHIVE_DIR/order_log-YYYY-MM.csv.gz
+     (one gzip member per batch) and fsynced;
+  2. in one short BEGIN IMMEDIATE transaction, their per-day totals are added to
+     order_log_daily and the rows are deleted.
+Between batches the job sleeps RETENTION_BATCH_PAUSE seconds. A batch holds the
+write lock for tens of milliseconds, well inside the busy timeout of the bot's
+own writers (_db_add_sync, the repositories). A crash between steps 1 and 2
+can leave a batch archived twice, never counted twice: archive readers should
+keep the first row per id.
+
+Freed pages are then handed back to the file system with PRAGMA
+incremental_vacuum in small steps. This needs auto_vacuum=INCREMENTAL, which
+prepare_database() sets once at startup, before any writer starts. On an
+existing database that means one full VACUUM.
+"""
+import csv
+import gzip
+import io
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from config import (
+    DATABASE_URL,
+    RETENTION_ARCHIVE_DIR,
+    RETENTION_BATCH_PAUSE,
+    RETENTION_BATCH_ROWS,
+    RETENTION_DAYS,
+    RETENTION_INTERVAL_H,
+)
+
+logger = logging.getLogger(__name__)
+
+_DB_PATH = DATABASE_URL.replace("sqlite+aiosqlite:///", "")
+_COLUMNS = ("id", "order_slug", "amount", "status", "taken_at")
+_VACUUM_STEP_PAGES = 256
+_FIRST_RUN_DELAY = 60.0   # let the bot finish starting up first
+
+_UPSERT_DAILY = """
+INSERT INTO order_log_daily (day, status, orders, volume, min_amount, max_amount)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (day, status) DO UPDATE SET
+    orders = orders + excluded.orders,
+    volume = volume + excluded.volume,
+    min_amount = min(coalesce(min_amount, excluded.min_amount), coalesce(excluded.min_amount, min_amount)),
+    max_amount = max(coalesce(max_amount, excluded.max_amount), coalesce(excluded.max_amount, max_amount))
+"""
+
+
+def prepare_database(db_path: str = _DB_PATH) -> None:
+    """Switch the database to auto_vacuum=INCREMENTAL (a full VACUUM, once)."""
+    con = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        if con.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return
+        started = time.monotonic()
+        con.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        con.execute("VACUUM")
+        logger.info("Database switched to incremental auto-vacuum in %.1fs", time.monotonic() - started)
+    finally:
+        con.close()
+
+
+class RetentionJob:
+    def __init__(
+        self,
+        db_path: str = _DB_PATH,
+        days: int = RETENTION_DAYS,
+        archive_dir: str = RETENTION_ARCHIVE_DIR,
+        interval_h: float = RETENTION_INTERVAL_H,
+        batch_rows: int = RETENTION_BATCH_ROWS,
+        batch_pause: float = RETENTION_BATCH_PAUSE,
+    ) -> None:
+        self._db_path = db_path
+        self._days = days
+        self._archive_dir = archive_dir
+        self._interval = interval_h * 3600
+        self._batch_rows = batch_rows
+        self._batch_pause = batch_pause
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_run: Dict[str, float] = {}
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="retention", daemon=True)
+        self._thread.start()
+        logger.info("Retention started: order_log rows older than %d days are archived", self._days)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+
+    def _loop(self) -> None:
+        delay = _FIRST_RUN_DELAY
+        while not self._stop_event.wait(delay):
+            try:
+                self.run_once()
+            except Exception as exc:
+                logger.exception("Retention run failed: %s", exc)
+            delay = self._interval
+
+    def run_once(self) -> Dict[str, float]:
+        """Archive and delete everything past the cutoff, then compact (blocking)."""
+        started = time.monotonic()
+        cutoff = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(time.time() - self._days * 86400))
+        con = sqlite3.connect(self._db_path, timeout=30, isolation_level=None)
+        try:
+            archived = batches = 0
+            while not self._stop_event.is_set():
+                rows = con.execute(
+                    f"SELECT {', '.join(_COLUMNS)} FROM order_log WHERE taken_at < ? "
+                    "ORDER BY taken_at, id LIMIT ?",
+                    (cutoff, self._batch_rows),
+                ).fetchall()
+                if not rows:
+                    break
+                self._archive(rows)
+                self._remove(con, rows)
+                archived += len(rows)
+                batches += 1
+                self._stop_event.wait(self._batch_pause)
+            freed = self._vacuum(con)
+        finally:
+            con.close()
+        self.last_run = {
+            "archived": archived,
+            "batches": batches,
+            "freed_pages": freed,
+            "seconds": time.monotonic() - started,
+        }
+        if archived or freed:
+            logger.info(
+                "Retention: %d order_log rows archived in %d batches, %d pages freed (%.1fs)",
+                archived, batches, freed, self.last_run["seconds"],
+            )
+        return self.last_run
+
+    def _archive(self, rows: List[tuple]) -> None:
+        by_month: Dict[str, List[tuple]] = {}
+        for row in rows:
+            by_month.setdefault(row[4][:7], []).append(row)
+        os.makedirs(self._archive_dir, exist_ok=True)
+        for month, month_rows in by_month.items():
+            path = os.path.join(self._archive_dir, f"order_log-{month}.csv.gz")
+            text = io.StringIO()
+            writer = csv.writer(text)
+            if not os.path.exists(path):
+                writer.writerow(_COLUMNS)
+            writer.writerows(month_rows)
+            # A new gzip member per batch: appending never rewrites what is archived
+            with open(path, "ab") as f:
+                f.write(gzip.compress(text.getvalue().encode("utf-8")))
+                f.flush()
+                os.fsync(f.fileno())
+
+    @staticmethod
+    def _remove(con: sqlite3.Connection, rows: List[tuple]) -> None:
+        totals: Dict[tuple, list] = {}
+        for _, _, amount, status, taken_at in rows:
+            day = totals.setdefault((taken_at[:10], status), [0, 0.0, None, None])
+            day[0] += 1
+            if amount is not None:
+                day[1] += amount
+                day[2] = amount if day[2] is None else min(day[2], amount)
+                day[3] = amount if day[3] is None else max(day[3], amount)
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            con.executemany(_UPSERT_DAILY, [(*key, *values) for key, values in totals.items()])
+            con.executemany("DELETE FROM order_log WHERE id = ?", [(row[0],) for row in rows])
+            con.execute("COMMIT")
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+
+    def _vacuum(self, con: sqlite3.Connection) -> int:
+        if con.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            return 0
+        initial = free = con.execute("PRAGMA freelist_count").fetchone()[0]
+        while free and not self._stop_event.is_set():
+            # execute() would step the pragma once, freeing a single page
+            con.executescript(f"PRAGMA incremental_vacuum({_VACUUM_STEP_PAGES});")
+            free = con.execute("PRAGMA freelist_count").fetchone()[0]
+            self._stop_event.wait(self._batch_pause)
+        return initial - free
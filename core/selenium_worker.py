@@ -1,4 +1,8 @@
+import base64
+import contextlib
+import functools
 import glob
+import json
 import logging
 import os
 import re
@@ -6,7 +10,7 @@ import threading
 import time
 import urllib.parse
 from datetime import datetime, timedelta, timezone
-from typing import Callable, List, Optional, Set
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
 from selenium import webdriver
 from selenium.common.exceptions import (
@@ -25,11 +29,47 @@ from selenium.webdriver.support.ui import Select, WebDriverWait
 
 from config import (
     ALERT_WAIT_TIMEOUT,
+    BASE_URL,
+    COVERAGE_SCROLL_DELAY_MS,
     ELEMENT_WAIT_TIMEOUT,
+    FULL_TABLE_COVERAGE,
+    INCREMENTAL_WINDOW,
+    LEAN_ALLOWED_HOSTS,
+    LEAN_PROFILE,
+    LEDGER_DIR,
+    LEDGER_ENABLED,
+    LEDGER_FLUSH_INTERVAL,
+    LEDGER_GONE_AFTER,
+    LEDGER_REOPEN_WITHIN,
+    LEDGER_SEGMENT_MB,
     ORDERS_BASE_URL,
+    ORDERS_WINDOW_OVERLAP_MIN,
     PAGE_LOAD_TIMEOUT,
     POLL_INTERVAL,
+    RECYCLE_CHECK_INTERVAL,
+    RECYCLE_MAX_AGE_MIN,
+    RECYCLE_RSS_MB,
+    SESSION_CHECK_INTERVAL,
+    SESSION_FILE,
+    SESSION_KEEPALIVE,
+    SESSION_MAX_AGE_MIN,
+    SESSION_QUIET_SECONDS,
+    SESSION_REFRESH_MARGIN,
+    SESSION_REUSE,
+    SNAPSHOT_CAPTURE,
+    SNAPSHOT_DIR,
+    SNAPSHOT_INTERVAL,
+    SNAPSHOT_MAX_FILES,
+    WEBDRIVER_TRACE,
+    WEBDRIVER_TRACE_FILE,
+    WEBDRIVER_TRACE_SLOW_MS,
 )
+from core import metrics
+from core.ledger import SeenLedger
+from core.procinfo import kill_tree, tree_rss
+from core.snapshots import SnapshotRecorder
+from core.take_trace import TakeStats, TakeTrace
+from core.webdriver_trace import WebDriverTracer
 
 logger = logging.getLogger(__name__)
 
@@ -71,16 +111,265 @@ SEL_FILTER_SUBMIT  = (By.XPATH,
     "or normalize-space(.)='Apply' or normalize-space(.)='OK']"
 )
 
+# Retry control rendered by an error boundary ("Попробовать снова" / "Try again")
+SEL_ERROR_RETRY_BUTTON = (By.XPATH,
+    "//button[normalize-space(.)='Попробовать снова' or normalize-space(.)='Попробовать еще раз' "
+    "or normalize-space(.)='Повторить' or normalize-space(.)='Try again' "
+    "or normalize-space(.)='Retry' or normalize-space(.)='Reload']"
+)
+
 SEL_TABLE_BODY     = (By.CSS_SELECTOR, "div[role='rowgroup']")
 SEL_ORDER_ROWS     = (By.CSS_SELECTOR, "div[role='row'].tr")
 
 # Take/Взять button — search by text since class changes between sessions
 SEL_TAKE_BUTTON    = (By.XPATH, ".//button[normalize-space(.)='Take' or normalize-space(.)='Взять']")
+# The one the take path waits for: a global search, any Russian/English variant
+SEL_MODAL_TAKE_BUTTON = (By.XPATH,
+    "//button["
+    "normalize-space(.)='Взять' or "
+    "normalize-space(.)='Take' or "
+    "normalize-space(.)='Принять' or "
+    "normalize-space(.)='Accept' or "
+    "normalize-space(.)='Взять ордер'"
+    "]"
+)
+
+# Full-coverage scan of the virtualized orders list (async script, one round trip).
+# Finds the scrollable ancestor of the rowgroup, records what is rendered right now
+# ("visible"), then scrolls from the top in viewport-sized steps — giving React
+# `delay` ms to render each window — and collects every row keyed by slug.
+# The original scroll position is restored before returning.
+_COLLECT_ALL_ROWS_JS = """
+var delay = arguments[0];
+var done = arguments[arguments.length - 1];
+var body = document.querySelector("div[role='rowgroup']");
+if (!body) { done({visible: 0, rows: []}); return; }
+var scroller = body;
+while (scroller && scroller !== document.body && scroller.scrollHeight <= scroller.clientHeight) {
+    scroller = scroller.parentElement;
+}
+if (!scroller || scroller === document.body) { scroller = document.scrollingElement; }
+var startTop = scroller.scrollTop;
+var seen = {};
+var rows = [];
+function titlesOf(nodes) {
+    var out = [];
+    for (var i = 0; i < nodes.length; i++) { out.push(nodes[i].getAttribute('title') || ''); }
+    return out;
+}
+function collect() {
+    var count = 0;
+    var nodes = body.querySelectorAll("div[role='row'].tr");
+    for (var i = 0; i < nodes.length; i++) {
+        var r = nodes[i];
+        if ((r.getAttribute('style') || '').indexOf('position: absolute') === -1) { continue; }
+        var a = r.querySelector("a[href*='/trader/orders/']");
+        var m = a ? /\\/trader\\/orders\\/(trade-[^\\/?]+)/.exec(a.getAttribute('href') || '') : null;
+        if (!m) { continue; }
+        count++;
+        if (seen[m[1]]) { continue; }
+        seen[m[1]] = true;
+        rows.push({
+            slug: m[1],
+            scrollTop: scroller.scrollTop,
+            cellTitles: titlesOf(r.querySelectorAll("div[role='cell']")),
+            cellTexts: Array.prototype.map.call(
+                r.querySelectorAll("div[role='cell']"), function (c) { return c.innerText || ''; }),
+            titles: titlesOf(r.querySelectorAll("div[title]"))
+        });
+    }
+    return count;
+}
+var visible = collect();
+var top = 0;
+function step() {
+    scroller.scrollTop = top;
+    setTimeout(function () {
+        collect();
+        var viewport = Math.max(scroller.clientHeight * 0.9, 1);
+        if (top + scroller.clientHeight >= scroller.scrollHeight) {
+            scroller.scrollTop = startTop;
+            done({visible: visible, rows: rows});
+            return;
+        }
+        top += viewport;
+        step();
+    }, delay);
+}
+step();
+"""
+
+# Scroll the virtualized list so the row for `slug` is rendered, then return it.
+_SCROLL_TO_ROW_JS = """
+var slug = arguments[0], top = arguments[1], delay = arguments[2];
+var done = arguments[arguments.length - 1];
+var body = document.querySelector("div[role='rowgroup']");
+if (!body) { done(null); return; }
+var scroller = body;
+while (scroller && scroller !== document.body && scroller.scrollHeight <= scroller.clientHeight) {
+    scroller = scroller.parentElement;
+}
+if (!scroller || scroller === document.body) { scroller = document.scrollingElement; }
+scroller.scrollTop = top;
+setTimeout(function () {
+    var links = body.querySelectorAll("a[href*='/trader/orders/']");
+    for (var i = 0; i < links.length; i++) {
+        var m = /\\/trader\\/orders\\/(trade-[^\\/?]+)/.exec(links[i].getAttribute('href') || '');
+        if (m && m[1] === slug) { done(links[i].closest("div[role='row']")); return; }
+    }
+    done(null);
+}, delay);
+"""
+
+# Lean profile prefs: everything the orders table does not need to render or work.
+# Inline SVG icons (which our selectors match on) are unaffected by the image pref.
+_LEAN_PREFS = {
+    "permissions.default.image": 2,                 # no raster images
+    "image.animation_mode": "none",
+    "gfx.downloadable_fonts.enabled": False,        # no web fonts
+    "browser.display.use_document_fonts": 0,
+    "ui.prefersReducedMotion": 1,                   # CSS animations/transitions
+    "toolkit.cosmeticAnimations.enabled": False,
+    "media.autoplay.default": 5,
+    "datareporting.healthreport.uploadEnabled": False,
+    "datareporting.policy.dataSubmissionEnabled": False,
+    "toolkit.telemetry.enabled": False,
+    "toolkit.telemetry.unified": False,
+    "toolkit.telemetry.archive.enabled": False,
+    "app.normandy.enabled": False,
+    "app.shield.optoutstudies.enabled": False,
+    "app.update.auto": False,
+    "extensions.update.enabled": False,
+    "browser.safebrowsing.malware.enabled": False,
+    "browser.safebrowsing.phishing.enabled": False,
+    "browser.safebrowsing.downloads.enabled": False,
+    "network.prefetch-next": False,
+    "network.dns.disablePrefetch": True,
+    "network.http.speculative-parallel-limit": 0,
+    "privacy.trackingprotection.enabled": True,
+    "dom.ipc.processCount": 1,                      # one content process is enough
+    "fission.autostart": False,
+}
+
+# Proxy auto-config used as a host allowlist: allowed hosts go DIRECT, everything
+# else is sent to a closed local port and fails immediately.
+_LEAN_PAC_TEMPLATE = """function FindProxyForURL(url, host) {
+  var allowed = %s;
+  for (var i = 0; i < allowed.length; i++) {
+    if (host == allowed[i] || dnsDomainIs(host, "." + allowed[i])) { return "DIRECT"; }
+  }
+  return "PROXY 127.0.0.1:9";
+}"""
+
+
+def _lean_allowed_hosts() -> List[str]:
+    hosts = [h.strip() for h in LEAN_ALLOWED_HOSTS.split(",") if h.strip()]
+    dashboard = urllib.parse.urlparse(BASE_URL).hostname
+    if dashboard and dashboard not in hosts:
+        hosts.append(dashboard)
+    return hosts
+
+
+# Cookie / storage names that look like they carry the login
+_AUTH_NAME_RE = re.compile(r"token|auth|session|jwt|sid|access", re.IGNORECASE)
+_JWT_RE = re.compile(r"eyJ[\w-]+\.eyJ[\w-]+\.[\w-]*")
+
+# Nudge the page without reloading it: a credentialed request renews sliding
+# server sessions, and focus/visibility events make SPAs run their token refresh.
+_SOFT_SESSION_REFRESH_JS = """
+var done = arguments[arguments.length - 1];
+window.dispatchEvent(new Event('focus'));
+document.dispatchEvent(new Event('visibilitychange'));
+fetch(window.location.href, {credentials: 'include', cache: 'no-store'})
+    .then(function (r) { done(r.status); })
+    .catch(function () { done(0); });
+"""
+
+_LOCAL_STORAGE_JS = (
+    "var out = {};"
+    "for (var i = 0; i < window.localStorage.length; i++) {"
+    "  var k = window.localStorage.key(i); out[k] = window.localStorage.getItem(k);"
+    "}"
+    "return out;"
+)
+
 
+def _jwt_claims(token: str) -> dict:
+    """Decode the (unverified) payload of a JWT; {} if it is not one."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload))
+    except (IndexError, ValueError):
+        return {}
+
+
+# Title and visible text of every cell, per row, for a list of rows in one round trip
+_ROWS_CELL_TEXTS_JS = (
+    "return arguments[0].map(function (row) {"
+    " return Array.prototype.map.call(row.querySelectorAll(\"div[role='cell']\"),"
+    " function (c) { return (c.getAttribute('title') || '') + '\\n' + (c.innerText || ''); }); });"
+)
 
-def _build_orders_url() -> str:
-    tz = timezone(timedelta(hours=3))
-    from_date = datetime.now(tz).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+# The dashboard works in Moscow time; naive timestamps in the table are read as +03:00
+_SITE_TZ = timezone(timedelta(hours=3))
+
+_CREATED_PATTERNS = [
+    # 2026-02-03T12:34:56 / 2026-02-03 12:34
+    (re.compile(r"(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2})(?::(\d{2}))?"), ("y", "m", "d")),
+    # 03.02.2026 12:34:56 / 03.02.2026, 12:34
+    (re.compile(r"(\d{2})\.(\d{2})\.(\d{4}),?\s+(\d{2}):(\d{2})(?::(\d{2}))?"), ("d", "m", "y")),
+]
+
+
+def _month_start() -> datetime:
+    return datetime.now(_SITE_TZ).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+class WorkerInterrupted(BaseException):
+    """Raised out of any worker wait once stop() is requested.
+
+    Derives from BaseException (like KeyboardInterrupt) so the many broad
+    `except Exception` guards in the worker do not swallow it on the way out.
+    """
+
+
+class AuthenticationFailed(Exception):
+    """The site rejected the login: retrying with the same credentials cannot help.
+
+    Lets the worker thread end with fatal_error set instead of being retried by
+    the poll loop or relaunched by WorkerSupervisor (which could lock the account).
+    """
+
+
+class _InterruptibleWait(WebDriverWait):
+    """WebDriverWait whose polling sleep aborts with WorkerInterrupted on stop."""
+
+    def __init__(self, driver, timeout: float, stop_event: threading.Event) -> None:
+        super().__init__(driver, timeout)
+        self._stop_event = stop_event
+
+    def until(self, method, message: str = ""):
+        end_time = time.monotonic() + self._timeout
+        while True:
+            try:
+                value = method(self._driver)
+                if value:
+                    return value
+            except self._ignored_exceptions:
+                pass
+            if time.monotonic() > end_time:
+                break
+            if self._stop_event.wait(self._poll):
+                raise WorkerInterrupted()
+        raise TimeoutException(message)
+
+
+def _build_orders_url(from_date: Optional[datetime] = None) -> str:
+    """Orders query URL; from= defaults to the first day of the current month."""
+    if from_date is None:
+        from_date = _month_start()
+    from_date = from_date.astimezone(_SITE_TZ).replace(microsecond=0)
     from_str = urllib.parse.quote(from_date.strftime("%Y-%m-%dT%H:%M:%S+03:00"), safe="")
     t = "22314268-b9f0-48fd-8901-30419acd2419"
     return f"{ORDERS_BASE_URL}?from={from_str}&status=new&t={t}"
@@ -127,6 +416,56 @@ def _extract_amount(row) -> Optional[float]:
         return None
 
 
+def _parse_created_text(text: str) -> Optional[datetime]:
+    """Find an order creation timestamp in a cell's title/text, e.g. '03.02.2026 12:34'."""
+    for pattern, order in _CREATED_PATTERNS:
+        match = pattern.search(text or "")
+        if not match:
+            continue
+        parts = dict(zip(order, (int(g) for g in match.groups()[:3])))
+        try:
+            return datetime(
+                parts["y"], parts["m"], parts["d"],
+                int(match.group(4)), int(match.group(5)), int(match.group(6) or 0),
+                tzinfo=_SITE_TZ,
+            )
+        except ValueError:
+            continue
+    return None
+
+
+def _amount_from_titles(cell_titles: List[str], titles: List[str]) -> Optional[float]:
+    """Same rules as _extract_amount, applied to titles already read in the browser."""
+    for title in cell_titles:
+        if "RUB" in (title or ""):
+            return _parse_amount_title(title)
+    for title in titles:
+        if title and title.strip():
+            result = _parse_amount_title(title)
+            if result is not None:
+                return result
+    return None
+
+
+_ERROR_PAGE_MARKERS = (
+    # Russian error boundary phrases
+    "возникла проблема", "произошла ошибка", "что-то пошло не так",
+    "попробуйте обновить",
+    # English error boundary / server error phrases
+    "something went wrong", "an error occurred",
+    "there was a problem",   # "Sorry there was a problem loading this page"
+    "problem loading",
+    "try refreshing",
+    "unexpected error", "application error",
+)
+
+
+def _is_error_text(text: str) -> bool:
+    """True if a page's visible text (innerText) looks like an error boundary/crash page."""
+    tl = text.lower()
+    return any(m in tl for m in _ERROR_PAGE_MARKERS)
+
+
 def _extract_slug(row) -> Optional[str]:
     try:
         link = row.find_element(By.CSS_SELECTOR, "a[href*='/trader/orders/']")
@@ -143,13 +482,17 @@ class SeleniumWorker:
         self,
         on_order_taken: Callable[[str, Optional[float]], None],
         on_order_failed: Callable[[str, Optional[float]], None],
-        on_startup_ok: Optional[Callable[[Optional[float], Optional[float]], None]] = None,
+        on_startup_ok: Optional[Callable[[Optional[float], Optional[float], float, bool], None]] = None,
+        on_take_trace: Optional[Callable[[TakeTrace], None]] = None,
         headless: bool = True,
+        lean_profile: bool = LEAN_PROFILE,
     ) -> None:
         self._on_order_taken = on_order_taken
         self._on_order_failed = on_order_failed
         self._on_startup_ok = on_startup_ok
+        self._on_take_trace = on_take_trace
         self._headless = headless
+        self._lean_profile = lean_profile
         self._stop_event = threading.Event()
         self._thread: Optional[threading.Thread] = None
         self._driver: Optional[webdriver.Firefox] = None
@@ -162,47 +505,283 @@ class SeleniumWorker:
         # True when amount filter is currently active in the browser UI.
         # Cleared whenever a full page reload wipes React state.
         self._filter_applied: bool = False
+        # Bumped whenever the wanted range changes; _apply_amount_filter only marks the
+        # filter applied if no change came in while it was filling the form
+        self._filter_generation: int = 0
+        self._filter_clear_pending: bool = False   # a range is in the UI but none is wanted
+        # Full-coverage scan results of the last cycle: rows React had rendered
+        # vs. distinct orders present in the whole virtual list.
+        self.coverage_visible: int = 0
+        self.coverage_present: int = 0
+        # Incremental orders window: newest order creation time seen, the from= currently
+        # in the URL, and table render times (ms) measured since that window was set.
+        self._created_hwm: Optional[datetime] = None
+        self._window_from: Optional[datetime] = None
+        self._created_seen: Set[str] = set()
+        # Rows of this cycle whose creation time is still to be read: (slug, row)
+        self._created_pending: List[Tuple[str, object]] = []
+        self._render_ms: List[float] = []
+        # Liveness for WorkerSupervisor: monotonic time of the last completed poll
+        # cycle (0.0 until the first one) and of the last thread launch.
+        self.last_heartbeat: float = 0.0
+        self.launched_at: float = 0.0
+        # Why the worker stopped for good (rejected login); WorkerSupervisor gives up on it
+        self.fatal_error: str = ""
+        # The startup message is sent once per start(), not on supervisor restarts
+        self._announce_startup: bool = False
+        # Time-to-first-poll: when start() was called and whether a saved session was used
+        self._start_requested_at: float = 0.0
+        self._session_restored: bool = False
+        # Session keep-alive: when the current session was established, when its expiry
+        # was last checked, when we last saw a candidate order, and outcome counters.
+        self._session_started_at: float = 0.0
+        self._session_checked_at: float = 0.0
+        self._last_candidate_at: float = 0.0
+        # (cookie name, expiry) → epoch seconds it was first seen, to tell short-lived cookies
+        self._cookie_first_seen: Dict[Tuple[str, float], float] = {}
+        self.reactive_reauths: int = 0
+        self.proactive_refreshes: int = 0      # re-auths avoided: soft + full
+        self.soft_refreshes: int = 0           # of which needed no page reload
+        # Error-page recovery per tier: attempts, successes, recent durations (s)
+        self.recovery_stats: Dict[str, dict] = {}
+        # Browser recycling: when the current driver was created, when memory was last
+        # checked, and the replacement being prepared / ready for the hot swap.
+        self._driver_started_at: float = 0.0
+        self._recycle_checked_at: float = 0.0
+        self._replacement_lock = threading.Lock()
+        self._replacement_worker: Optional["SeleniumWorker"] = None
+        self._replacement_ready: bool = False
+        # Prewarm: the thread may boot the browser before credentials are known and
+        # log in before start() — it then waits on these events before going on.
+        self._credentials_ready = threading.Event()
+        self._activate_event = threading.Event()
+        # Cuts the poll-interval wait short (stop, reconfigure, retry requests)
+        self._wake_event = threading.Event()
+        self._retry_requests: List[str] = []
+        # Take-path timing: when the current cycle read the table, when each pending
+        # candidate was first seen (kept across retries), and stage histograms.
+        self._rows_read_at: float = 0.0
+        self._first_seen: Dict[str, float] = {}
+        self.take_stats = TakeStats()
+        # WebDriver round-trip tracer (WEBDRIVER_TRACE), shared with replacement browsers
+        self._tracer: Optional[WebDriverTracer] = (
+            WebDriverTracer(WEBDRIVER_TRACE_FILE, WEBDRIVER_TRACE_SLOW_MS) if WEBDRIVER_TRACE else None
+        )
+        # Page snapshots for offline replay (SNAPSHOT_CAPTURE), also shared
+        self._snapshots: Optional[SnapshotRecorder] = (
+            SnapshotRecorder(SNAPSHOT_DIR, SNAPSHOT_INTERVAL, SNAPSHOT_MAX_FILES) if SNAPSHOT_CAPTURE else None
+        )
+        # Ledger of every order seen in the table (LEDGER_ENABLED), also shared
+        self._ledger: Optional[SeenLedger] = (
+            SeenLedger(
+                LEDGER_DIR, int(LEDGER_SEGMENT_MB * 2**20), LEDGER_FLUSH_INTERVAL,
+                LEDGER_GONE_AFTER, LEDGER_REOPEN_WITHIN,
+            )
+            if LEDGER_ENABLED else None
+        )
 
-    def start(self, login: str, password: str, min_amount: Optional[float], max_amount: Optional[float]) -> None:
+    def start(self, login: str, password: str, min_amount: Optional[float], max_amount: Optional[float]) -> bool:
+        """Start polling; False if the worker could not be started."""
+        if self._thread and self._thread.is_alive():
+            if self._activate_event.is_set():
+                logger.warning("Worker already running")
+                return True
+            if self._credentials_ready.is_set() and (login, password) != (self.login, self.password):
+                logger.info("Credentials changed since prewarm — discarding the prewarmed browser")
+                self.stop()
+                # _launch() must not reset _stop_event under a thread still using the driver
+                if self._thread.is_alive() and not self.kill():
+                    logger.error("Prewarmed worker thread did not exit — start aborted")
+                    return False
+            else:
+                self._activate_prewarmed(login, password, min_amount, max_amount)
+                return True
+        self.login = login
+        self.password = password
+        self._set_range(min_amount, max_amount)
+        self._announce_startup = True
+        self._start_requested_at = time.monotonic()
+        self._launch()
+        logger.info("SeleniumWorker started")
+        return True
+
+    def prewarm(self) -> None:
+        """Boot the browser now; it logs in once provide_credentials() is called
+        and starts polling only after start()."""
         if self._thread and self._thread.is_alive():
-            logger.warning("Worker already running")
             return
+        self._launch(prewarm=True)
+        logger.info("SeleniumWorker prewarming")
+
+    def provide_credentials(
+        self, login: str, password: str, min_amount: Optional[float], max_amount: Optional[float]
+    ) -> None:
+        """Let a prewarming worker log in and apply the filter ahead of start()."""
         self.login = login
         self.password = password
-        self.min_amount = min_amount
-        self.max_amount = max_amount
+        self._set_range(min_amount, max_amount)
+        self._credentials_ready.set()
+
+    def _activate_prewarmed(
+        self, login: str, password: str, min_amount: Optional[float], max_amount: Optional[float]
+    ) -> None:
+        # If prewarm applied (or is applying) another range, _run re-applies it on activation
+        self._set_range(min_amount, max_amount)
+        self.login = login
+        self.password = password
+        self._announce_startup = True
+        self._start_requested_at = time.monotonic()
+        self.launched_at = self._start_requested_at   # supervisor's startup timeout runs from here
+        self._credentials_ready.set()
+        self._activate_event.set()
+        logger.info("SeleniumWorker started (prewarmed browser)")
+
+    def restart(self) -> bool:
+        """Relaunch the worker thread with the current credentials and filter.
+
+        _processed_slugs and the amount filter survive; the browser is new.
+        Returns False if the previous thread is still alive.
+        """
+        if self._thread and self._thread.is_alive():
+            logger.warning("Cannot restart: previous worker thread is still alive")
+            return False
+        self._launch()
+        logger.info("SeleniumWorker restarted")
+        return True
+
+    def _launch(self, prewarm: bool = False) -> None:
         self._stop_event.clear()
+        if prewarm:
+            self._credentials_ready.clear()
+            self._activate_event.clear()
+        else:
+            self._credentials_ready.set()
+            self._activate_event.set()
+        self.last_heartbeat = 0.0
+        self.launched_at = time.monotonic()
+        self.fatal_error = ""
         self._thread = threading.Thread(target=self._run, daemon=True)
         self._thread.start()
-        logger.info("SeleniumWorker started")
 
     def stop(self) -> None:
         self._stop_event.set()
+        self._wake_event.set()
+        with self._replacement_lock:
+            if self._replacement_worker is not None:
+                self._replacement_worker._stop_event.set()
         if self._thread:
             self._thread.join(timeout=15)
         logger.info("SeleniumWorker stopped")
 
+    def reconfigure(self, min_amount: Optional[float], max_amount: Optional[float]) -> None:
+        """Change the amount range of a running worker; applied on the next poll tick."""
+        self._set_range(min_amount, max_amount)   # proactive filter check re-applies it
+        self._wake_event.set()
+        logger.info("Amount filter reconfigured: min=%s max=%s", min_amount, max_amount)
+
+    def _set_range(self, min_amount: Optional[float], max_amount: Optional[float]) -> None:
+        if (min_amount, max_amount) == (self.min_amount, self.max_amount):
+            return
+        if min_amount is None and max_amount is None:
+            self._filter_clear_pending = True
+        self.min_amount = min_amount
+        self.max_amount = max_amount
+        self._filter_generation += 1
+        self._filter_applied = False
+
+    def request_retry(self, slug: str) -> None:
+        """Make a failed/skipped order eligible again and wake the poll loop."""
+        self._retry_requests.append(slug)
+        self._wake_event.set()
+
+    def kill(self, timeout: float = 15) -> bool:
+        """Stop a crashed or hung worker: SIGKILL the browser tree, then join.
+
+        Killing geckodriver makes any WebDriver call the thread is blocked in fail
+        immediately, so the thread can unwind. Returns True once it has exited.
+        """
+        self._stop_event.set()
+        drivers = [self._driver]
+        with self._replacement_lock:
+            if self._replacement_worker is not None:
+                self._replacement_worker._stop_event.set()
+                drivers.append(self._replacement_worker._driver)
+        for driver in drivers:
+            pid = self._driver_pid(driver)
+            if pid:
+                kill_tree(pid)
+        if self._thread:
+            self._thread.join(timeout=timeout)
+        return self._thread is None or not self._thread.is_alive()
+
     def is_running(self) -> bool:
-        return self._thread is not None and self._thread.is_alive()
+        """True once started; a prewarmed browser waiting for start() does not count."""
+        return self._thread is not None and self._thread.is_alive() and self._activate_event.is_set()
+
+    def _wait_for(self, event: threading.Event) -> bool:
+        """Block until event is set; False if the worker is stopped first."""
+        while not event.wait(0.5):
+            if self._stop_event.is_set():
+                return False
+        return not self._stop_event.is_set()
+
+    @staticmethod
+    def _driver_pid(driver) -> Optional[int]:
+        """PID of the geckodriver process behind a driver (Firefox runs as its child)."""
+        try:
+            return driver.service.process.pid if driver else None
+        except Exception:
+            return None
 
     def _run(self) -> None:
         try:
             self._driver = self._create_driver()
+            self._driver_started_at = time.monotonic()
+            if not self._wait_for(self._credentials_ready):
+                return
+            self._session_restored = self._restore_session()
             self._navigate_to_orders()   # handles login internally if needed
             self._apply_amount_filter()
+            if not self._wait_for(self._activate_event):
+                return
+            if not self._filter_applied:
+                # start() brought another range than the one prewarm applied
+                self._apply_amount_filter()
             # One-time startup notification (only fires here, not on re-auth cycles)
-            if self._on_startup_ok:
+            if self._on_startup_ok and self._announce_startup:
+                self._announce_startup = False
+                startup_seconds = time.monotonic() - self._start_requested_at
+                logger.info(
+                    "Time to first poll: %.1fs (session %s)",
+                    startup_seconds, "restored" if self._session_restored else "from login",
+                )
                 try:
-                    self._on_startup_ok(self.min_amount, self.max_amount)
+                    self._on_startup_ok(
+                        self.min_amount, self.max_amount, startup_seconds, self._session_restored
+                    )
                 except Exception as exc:
                     logger.warning("Startup notification failed: %s", exc)
             self._poll_loop()
+        except WorkerInterrupted:
+            logger.info("Worker interrupted by stop")
+        except AuthenticationFailed as exc:
+            logger.error("Worker stopped: %s", exc)
+            self.fatal_error = str(exc)
         except Exception as exc:
             logger.exception("Worker crashed: %s", exc)
         finally:
+            self._discard_replacement()
             self._quit_driver()
-
+            if self._tracer is not None:
+                self._tracer.dump()
+            if self._snapshots is not None:
+                self._snapshots.close()
+            if self._ledger is not None:
+                self._ledger.flush()   # open entries carry over to a restart; closed at exit
+
+    # Both lookups glob through ~/.cache/selenium — resolve once per process
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def _find_geckodriver() -> Optional[str]:
         """Return path to geckodriver without relying on Selenium Manager network calls."""
         candidates: List[str] = []
@@ -234,6 +813,7 @@ class SeleniumWorker:
         return None
 
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def _find_firefox_binary() -> Optional[str]:
         """Return path to Firefox binary (prefer Selenium Manager cache over system)."""
         candidates: List[str] = []
@@ -272,6 +852,16 @@ class SeleniumWorker:
         options.add_argument("--height=1080")
         options.set_preference("dom.webdriver.enabled", False)
         options.set_preference("useAutomationExtension", False)
+        if self._lean_profile:
+            for name, value in _LEAN_PREFS.items():
+                options.set_preference(name, value)
+            pac = _LEAN_PAC_TEMPLATE % json.dumps(_lean_allowed_hosts())
+            options.set_preference("network.proxy.type", 2)
+            options.set_preference(
+                "network.proxy.autoconfig_url",
+                "data:application/x-ns-proxy-autoconfig," + urllib.parse.quote(pac),
+            )
+            logger.info("Using lean browser profile (allowed hosts: %s)", _lean_allowed_hosts())
 
         gecko = self._find_geckodriver()
         firefox_bin = self._find_firefox_binary()
@@ -295,11 +885,30 @@ class SeleniumWorker:
             driver = webdriver.Firefox(options=options)
 
         driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+        driver.set_script_timeout(PAGE_LOAD_TIMEOUT)
         driver.implicitly_wait(0)
+        if self._tracer is not None:
+            self._tracer.attach(driver)
         return driver
 
-    def _wait(self, timeout: int = ELEMENT_WAIT_TIMEOUT) -> WebDriverWait:
-        return WebDriverWait(self._driver, timeout)
+    def _trace_span(self, name: str, **args):
+        """Group the WebDriver commands issued inside into a tracer span (no-op untraced)."""
+        if self._tracer is None:
+            return contextlib.nullcontext()
+        return self._tracer.span(name, **args)
+
+    def _snapshot(self, kind: str, **meta) -> None:
+        """Store a sanitized copy of the page if a `kind` snapshot is due (see core/snapshots.py)."""
+        if self._snapshots is not None:
+            self._snapshots.capture(self._driver, kind, redact=(self.login,), **meta)
+
+    def _wait(self, timeout: float = ELEMENT_WAIT_TIMEOUT) -> WebDriverWait:
+        return _InterruptibleWait(self._driver, timeout, self._stop_event)
+
+    def _sleep(self, seconds: float) -> None:
+        """time.sleep() that raises WorkerInterrupted as soon as the worker is stopped."""
+        if self._stop_event.wait(seconds):
+            raise WorkerInterrupted()
 
     def _login(self) -> None:
         """Fill in and submit the login form on the CURRENT page.
@@ -309,7 +918,7 @@ class SeleniumWorker:
         """
         logger.info("Filling login form at: %s", self._driver.current_url)
         # Brief pause so React can attach its event handlers to the form
-        time.sleep(0.8)
+        self._sleep(0.8)
         # Use element_to_be_clickable so we know the field is interactive
         email_input = self._wait().until(EC.element_to_be_clickable(SEL_EMAIL_INPUT))
         email_input.click()
@@ -327,7 +936,75 @@ class SeleniumWorker:
             lambda d: "/login" not in d.current_url
         )
         logger.info("Login successful → now at: %s", self._driver.current_url)
-        time.sleep(1.5)  # let React auth context finish initialising
+        self._sleep(1.5)  # let React auth context finish initialising
+        self._session_restored = False
+        self._session_started_at = time.monotonic()
+        self._save_session()
+
+    def _restore_session(self) -> bool:
+        """Load cookies and localStorage saved by a previous login into the new browser.
+
+        Only sets state — _navigate_to_orders then tells whether it is still valid
+        (it falls back to _login when the site redirects to /login anyway).
+        """
+        if not SESSION_REUSE or not os.path.isfile(SESSION_FILE):
+            return False
+        try:
+            with open(SESSION_FILE, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as exc:
+            logger.warning("Could not read saved session: %s", exc)
+            return False
+        if saved.get("login") != self.login:
+            logger.info("Saved session belongs to another login — ignoring it")
+            return False
+
+        try:
+            # Cookies and storage can only be set on a page of the same origin;
+            # the favicon is the cheapest document the dashboard serves.
+            self._driver.get(f"{BASE_URL}/favicon.ico")
+            restored = 0
+            for cookie in saved.get("cookies") or []:
+                if cookie.get("sameSite") not in ("Strict", "Lax", "None"):
+                    cookie.pop("sameSite", None)   # geckodriver rejects anything else
+                try:
+                    self._driver.add_cookie(cookie)
+                    restored += 1
+                except WebDriverException as exc:
+                    logger.debug("Cookie %s not restored: %s", cookie.get("name"), exc)
+            storage = saved.get("local_storage") or {}
+            if storage:
+                self._driver.execute_script(
+                    "var items = arguments[0];"
+                    "for (var k in items) { window.localStorage.setItem(k, items[k]); }",
+                    storage,
+                )
+        except WebDriverException as exc:
+            # Timeout or a broken page: log in with the password as usual
+            logger.warning("Could not restore saved session: %s", exc)
+            return False
+        logger.info("Restored saved session: %d cookie(s), %d storage key(s)", restored, len(storage))
+        return bool(restored or storage)
+
+    def _save_session(self) -> None:
+        """Persist cookies and localStorage of the logged-in browser to SESSION_FILE."""
+        if not SESSION_REUSE:
+            return
+        try:
+            saved = {
+                "login": self.login,
+                "saved_at": datetime.now(timezone.utc).isoformat(),
+                "cookies": self._driver.get_cookies(),
+                "local_storage": self._driver.execute_script(_LOCAL_STORAGE_JS) or {},
+            }
+            tmp = SESSION_FILE + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(saved, f)
+            os.chmod(tmp, 0o600)   # holds live auth tokens
+            os.replace(tmp, SESSION_FILE)
+            logger.info("Session saved (%d cookies)", len(saved["cookies"]))
+        except Exception as exc:
+            logger.warning("Could not save session: %s", exc)
 
     def _is_on_login_page(self) -> bool:
         try:
@@ -347,38 +1024,128 @@ class SeleniumWorker:
             text = self._driver.execute_script(
                 "return document.body ? document.body.innerText : ''"
             ) or ""
-            markers = [
-                # Russian error boundary phrases
-                "возникла проблема", "произошла ошибка", "что-то пошло не так",
-                "попробуйте обновить",
-                # English error boundary / server error phrases
-                "something went wrong", "an error occurred",
-                "there was a problem",   # "Sorry there was a problem loading this page"
-                "problem loading",
-                "try refreshing",
-                "unexpected error", "application error",
-            ]
-            tl = text.lower()
-            return any(m in tl for m in markers)
+            return _is_error_text(text)
         except Exception:
             return False
 
     def _recover_from_error_page(self) -> None:
-        """Navigate back to orders URL to recover from a crash/error page."""
-        logger.warning("Recovering from error page — navigating to orders")
-        try:
-            self._filter_applied = False
-            self._driver.get(self._orders_url)
-            time.sleep(0.8)
-            if self._is_on_login_page():
-                self._re_authenticate()
+        """Get from a crash/error page back to the orders table, cheapest fix first.
+
+        Tiers:
+          1. boundary_retry  — click the error boundary's own retry button;
+          2. router          — in-app navigation (history.pushState + popstate) to the
+                               orders route, which remounts the route without a reload;
+          3. soft_reload     — the toolbar refresh button, if it survived;
+          4. full_navigation — driver.get(orders URL), wiping React state and the filter.
+        Tiers 1–3 keep React state, so the amount filter usually survives them. A
+        document marker tells us when one of them did a full page load after all.
+        """
+        logger.warning("Recovering from error page")
+        self._snapshot("error")
+        started = time.monotonic()
+        tiers = (
+            ("boundary_retry", self._recover_boundary_retry),
+            ("router", self._recover_router),
+            ("soft_reload", self._recover_soft_reload),
+            ("full_navigation", self._recover_full_navigation),
+        )
+        for tier, attempt in tiers:
+            tier_started = time.monotonic()
+            try:
+                recovered = attempt()
+            except Exception as exc:
+                logger.debug("Recovery tier %s raised: %s", tier, exc)
+                recovered = False
+            self._record_recovery(tier, recovered, time.monotonic() - tier_started)
+            if recovered:
+                elapsed = time.monotonic() - started
+                logger.info("Recovered from error page via %s in %.2fs", tier, elapsed)
                 return
-            self._wait_for_table()
-            if self.min_amount is not None or self.max_amount is not None:
-                self._apply_amount_filter()
-            logger.info("Recovered from error page successfully")
-        except Exception as exc:
-            logger.error("Recovery from error page failed: %s", exc)
+        logger.error("Recovery from error page failed at every tier")
+
+    def _record_recovery(self, tier: str, recovered: bool, seconds: float) -> None:
+        stats = self.recovery_stats.setdefault(
+            tier, {"attempts": 0, "successes": 0, "seconds": []}
+        )
+        stats["attempts"] += 1
+        metrics.RECOVERIES.labels(tier, "ok" if recovered else "failed").inc()
+        if recovered:
+            stats["successes"] += 1
+            stats["seconds"].append(seconds)
+            del stats["seconds"][:-200]
+            samples = sorted(stats["seconds"])
+            logger.info(
+                "Recovery tier %s: %d/%d successful, p50 %.2fs, max %.2fs",
+                tier, stats["successes"], stats["attempts"],
+                samples[len(samples) // 2], samples[-1],
+            )
+
+    def _page_recovered(self) -> bool:
+        if self._is_on_login_page() or self._is_error_page():
+            return False
+        return bool(self._driver.find_elements(*SEL_TABLE_BODY))
+
+    def _wait_recovered(self, timeout: float) -> bool:
+        end_time = time.monotonic() + timeout
+        while time.monotonic() < end_time:
+            if self._page_recovered():
+                return True
+            self._sleep(0.25)
+        return False
+
+    def _mark_document(self) -> None:
+        self._driver.execute_script("window.__c2cRecoveryMarker = true;")
+
+    def _after_in_page_recovery(self, recovered: bool) -> bool:
+        """Finish tiers 1–3: if the marker is gone the page was fully reloaded."""
+        if not recovered:
+            return False
+        if not self._driver.execute_script("return window.__c2cRecoveryMarker === true;"):
+            logger.info("In-page recovery caused a full page load — filter needs re-applying")
+            self._filter_applied = False
+        self._wait_for_table()
+        return True
+
+    def _recover_boundary_retry(self) -> bool:
+        buttons = self._driver.find_elements(*SEL_ERROR_RETRY_BUTTON)
+        if not buttons:
+            return False
+        self._mark_document()
+        self._driver.execute_script("arguments[0].click();", buttons[0])
+        return self._after_in_page_recovery(self._wait_recovered(3.0))
+
+    def _recover_router(self) -> bool:
+        parsed = urllib.parse.urlparse(self._orders_url)
+        route = parsed.path + ("?" + parsed.query if parsed.query else "")
+        self._mark_document()
+        self._driver.execute_script(
+            "window.history.pushState({}, '', arguments[0]);"
+            "window.dispatchEvent(new PopStateEvent('popstate', {state: {}}));",
+            route,
+        )
+        return self._after_in_page_recovery(self._wait_recovered(3.0))
+
+    def _recover_soft_reload(self) -> bool:
+        buttons = self._driver.find_elements(*SEL_REFRESH_BUTTON)
+        if not buttons:
+            return False
+        self._mark_document()
+        self._driver.execute_script("arguments[0].click();", buttons[0])
+        return self._after_in_page_recovery(self._wait_recovered(3.0))
+
+    def _recover_full_navigation(self) -> bool:
+        self._filter_applied = False
+        self._filter_clear_pending = False
+        self._orders_url = self._current_orders_url()
+        self._driver.get(self._orders_url)
+        self._sleep(0.8)
+        if self._is_on_login_page():
+            self._re_authenticate()
+            return self._page_recovered()
+        self._wait_for_table()
+        if self.min_amount is not None or self.max_amount is not None:
+            self._apply_amount_filter()
+        return not self._is_error_page()
 
     def _navigate_to_orders(self) -> None:
         """Navigate the browser to the orders page, logging in along the way if needed.
@@ -392,12 +1159,13 @@ class SeleniumWorker:
              mechanism which may have double-encoded params).
           4. Wait for the orders table to render.
         """
-        self._orders_url = _build_orders_url()
+        self._orders_url = self._current_orders_url()
         self._filter_applied = False   # full navigation wipes React state
+        self._filter_clear_pending = False
         logger.info("Navigating to orders: %s", self._orders_url)
         self._driver.get(self._orders_url)
         # Give React Router a moment to evaluate the auth state and redirect if needed
-        time.sleep(0.8)
+        self._sleep(0.8)
 
         if self._is_on_login_page():
             logger.info("Redirected to login — authenticating")
@@ -414,25 +1182,31 @@ class SeleniumWorker:
                     current_url,
                 )
                 self._driver.get(self._orders_url)
-                time.sleep(1.0)
+                self._sleep(1.0)
             else:
                 logger.info("Login succeeded and already on orders page — skipping extra navigation")
 
         if self._is_on_login_page():
-            raise RuntimeError(
+            raise AuthenticationFailed(
                 "Still on login page after authentication attempt — check credentials"
             )
 
         self._wait_for_table()
+        if not self._session_started_at:
+            self._session_started_at = time.monotonic()   # restored session of unknown age
         logger.info("Orders page loaded: %s", self._driver.current_url)
 
     def _re_authenticate(self) -> None:
         """Re-navigate to the orders page, logging in if the session has expired."""
         logger.warning("Session expired — re-authenticating")
+        self.reactive_reauths += 1
+        metrics.REAUTHS.inc()
         try:
             self._navigate_to_orders()
             self._apply_amount_filter()
             logger.info("Re-authentication successful")
+        except AuthenticationFailed:
+            raise
         except Exception as exc:
             logger.error("Re-authentication failed: %s", exc)
 
@@ -441,12 +1215,19 @@ class SeleniumWorker:
             "FILTER ENTRY: min_amount=%s max_amount=%s url=%s",
             self.min_amount, self.max_amount, self._driver.current_url
         )
+        generation = self._filter_generation
         if self.min_amount is None and self.max_amount is None:
-            logger.info("No amount filter configured, skipping")
-            self._filter_applied = True   # nothing to apply = filter is "done"
+            if self._filter_clear_pending:
+                # The form has no "off" state we drive; a full navigation drops the old range
+                logger.info("Amount filter removed — reloading the orders page")
+                self._navigate_to_orders()
+            else:
+                logger.info("No amount filter configured, skipping")
+            self._filter_applied = generation == self._filter_generation   # nothing to apply = "done"
             return
 
         logger.info("Applying amount filter: min=%s max=%s", self.min_amount, self.max_amount)
+        metrics.FILTER_APPLIES.inc()
 
         try:
             all_btns = self._driver.find_elements(By.XPATH, "//button")
@@ -454,7 +1235,7 @@ class SeleniumWorker:
             filter_btn = self._wait().until(EC.element_to_be_clickable(SEL_FILTER_BUTTON))
             logger.info("FILTER DEBUG: filter button found, text=%r", filter_btn.text)
             self._driver.execute_script("arguments[0].click();", filter_btn)
-            time.sleep(1.2)
+            self._sleep(1.2)
         except TimeoutException:
             logger.warning("Filter button not found (XPath=%s), skipping", SEL_FILTER_BUTTON[1])
             # dump all button texts to help diagnose
@@ -497,7 +1278,7 @@ class SeleniumWorker:
         logger.info("Amount checkbox found, checked=%s", is_checked)
         if not is_checked:
             self._driver.execute_script("arguments[0].click();", checkbox)
-            time.sleep(0.8)
+            self._sleep(0.8)
             logger.info("Amount checkbox activated")
 
         # After clicking, the expanded section appears as a sibling or child of the row's parent.
@@ -507,7 +1288,7 @@ class SeleniumWorker:
 
         try:
             # Find <select> within the Amount filter block
-            select_el = WebDriverWait(self._driver, ELEMENT_WAIT_TIMEOUT).until(
+            select_el = self._wait(ELEMENT_WAIT_TIMEOUT).until(
                 lambda d: self._find_in_parent(amount_parent, "select")
             )
             current_val = select_el.get_attribute("value") or ""
@@ -520,7 +1301,7 @@ class SeleniumWorker:
                     nativeInputValueSetter.call(sel, 'is_between');
                     sel.dispatchEvent(new Event('change', {bubbles: true}));
                 """, select_el)
-                time.sleep(0.5)
+                self._sleep(0.5)
                 logger.info("Amount select set to is_between via JS")
             else:
                 logger.info("Amount select already at is_between, no change needed")
@@ -528,7 +1309,7 @@ class SeleniumWorker:
             logger.warning("Could not find/set amount select: %s", exc)
 
         # Wait a moment for the two text inputs to appear inside the Amount block
-        time.sleep(0.3)
+        self._sleep(0.3)
         try:
             # Find all visible text inputs WITHIN the Amount filter parent block only
             all_inputs = amount_parent.find_elements(By.CSS_SELECTOR, "input[type='text'], input:not([type='checkbox'])")
@@ -553,12 +1334,14 @@ class SeleniumWorker:
             logger.warning("Could not fill amount inputs: %s", exc)
             return
 
+        self._snapshot("filter", min_amount=self.min_amount, max_amount=self.max_amount)
         try:
             submit_btn = self._wait().until(EC.element_to_be_clickable(SEL_FILTER_SUBMIT))
             self._driver.execute_script("arguments[0].click();", submit_btn)
-            time.sleep(0.5)
+            self._sleep(0.5)
             self._wait_for_table()
-            self._filter_applied = True
+            # The range may have changed while the form was being filled: then re-apply
+            self._filter_applied = generation == self._filter_generation
             logger.info("Filter applied successfully")
         except TimeoutException:
             self._filter_applied = False
@@ -628,18 +1411,243 @@ class SeleniumWorker:
         logger.info("Starting poll loop")
         while not self._stop_event.is_set():
             try:
-                self._poll_once()
+                with self._trace_span("cycle"):
+                    self._drain_retry_requests()
+                    self._maybe_recycle_driver()
+                    self._maybe_refresh_session()
+                    cycle_started = time.monotonic()
+                    self._poll_once()
+                self.last_heartbeat = time.monotonic()
+                metrics.POLL_CYCLES.inc()
+                metrics.POLL_CYCLE_SECONDS.observe(self.last_heartbeat - cycle_started)
+            except WorkerInterrupted:
+                break
+            except AuthenticationFailed:
+                raise   # terminal: ends the worker thread with fatal_error set
             except WebDriverException as exc:
                 if self._stop_event.is_set():
                     break
                 logger.error("WebDriverException in poll loop: %s", exc)
-                time.sleep(2)
+                self._stop_event.wait(2)
             except Exception as exc:
                 if self._stop_event.is_set():
                     break
                 logger.exception("Unexpected error in poll loop: %s", exc)
-                time.sleep(2)
-            self._stop_event.wait(POLL_INTERVAL)
+                self._stop_event.wait(2)
+            # Poll tick: stop, reconfigure() and request_retry() cut it short
+            self._wake_event.wait(POLL_INTERVAL)
+            self._wake_event.clear()
+
+    def _drain_retry_requests(self) -> None:
+        while self._retry_requests:
+            slug = self._retry_requests.pop()
+            if slug in self._processed_slugs:
+                self._processed_slugs.discard(slug)
+                logger.info("Retry requested for order %s — will try again this cycle", slug)
+
+    # ── Session keep-alive ───────────────────────────────────────────────────
+
+    def _session_expiry(self) -> Optional[float]:
+        """Earliest expiry (epoch seconds) of the auth cookies / JWTs the page holds.
+
+        Cookies and JWTs that live shorter than twice the refresh margin are
+        skipped — access tokens, CSRF or analytics cookies the site renews by
+        itself. A cookie's lifetime is measured from when it was first seen.
+        """
+        now = time.time()
+        expiries: List[float] = []
+        values: List[str] = []
+        for cookie in self._driver.get_cookies():
+            name = cookie.get("name", "")
+            if not _AUTH_NAME_RE.search(name):
+                continue
+            if cookie.get("expiry"):
+                expiry = float(cookie["expiry"])
+                first_seen = self._cookie_first_seen.setdefault((name, expiry), now)
+                if expiry - first_seen >= 2 * SESSION_REFRESH_MARGIN:
+                    expiries.append(expiry)
+            values.append(cookie.get("value") or "")
+        self._cookie_first_seen = {key: t for key, t in self._cookie_first_seen.items() if key[1] > now}
+        storage = self._driver.execute_script(_LOCAL_STORAGE_JS) or {}
+        values.extend(v for k, v in storage.items() if _AUTH_NAME_RE.search(k) and v)
+        for value in values:
+            for token in _JWT_RE.findall(value):
+                claims = _jwt_claims(token)
+                exp, iat = claims.get("exp"), claims.get("iat")
+                if not isinstance(exp, (int, float)):
+                    continue
+                if isinstance(iat, (int, float)) and exp - iat < 2 * SESSION_REFRESH_MARGIN:
+                    continue
+                expiries.append(float(exp))
+        return min(expiries) if expiries else None
+
+    def _maybe_refresh_session(self) -> None:
+        """Renew the session ahead of expiry, but only during a quiet moment."""
+        if not SESSION_KEEPALIVE or not self._session_started_at:
+            return
+        now = time.monotonic()
+        if now - self._session_checked_at < SESSION_CHECK_INTERVAL:
+            return
+        if now - self._last_candidate_at < SESSION_QUIET_SECONDS:
+            return   # orders are flowing — check again next cycle
+        self._session_checked_at = now
+
+        expiry = self._session_expiry()
+        age_min = (now - self._session_started_at) / 60
+        if expiry is not None:
+            remaining = expiry - time.time()
+            if remaining > SESSION_REFRESH_MARGIN:
+                return
+            reason = f"token expires in {remaining:.0f}s"
+        elif SESSION_MAX_AGE_MIN and age_min > SESSION_MAX_AGE_MIN:
+            reason = f"session age {age_min:.0f} min"
+        else:
+            return
+
+        logger.info("Refreshing session proactively (%s)", reason)
+        status = self._driver.execute_async_script(_SOFT_SESSION_REFRESH_JS)
+        new_expiry = self._session_expiry()
+        if (
+            status and 200 <= status < 400
+            and not self._is_on_login_page()
+            and new_expiry is not None
+            and new_expiry - time.time() > SESSION_REFRESH_MARGIN
+        ):
+            self.soft_refreshes += 1
+            self.proactive_refreshes += 1
+            metrics.SESSION_REFRESHES.labels("soft").inc()
+            self._session_started_at = time.monotonic()
+            self._save_session()
+            logger.info("Session renewed without reload (avoided re-auths: %d)", self.proactive_refreshes)
+            return
+
+        # No in-page renewal — log in again now, while nothing is waiting to be taken.
+        # Clearing the old session is what makes _navigate_to_orders go through _login.
+        self._driver.delete_all_cookies()
+        self._driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        try:
+            self._navigate_to_orders()
+            self._apply_amount_filter()
+        except AuthenticationFailed:
+            raise
+        except Exception as exc:
+            logger.error("Proactive re-login failed: %s", exc)
+            return
+        self.proactive_refreshes += 1
+        metrics.SESSION_REFRESHES.labels("relogin").inc()
+        logger.info(
+            "Session renewed by re-login (avoided re-auths: %d, reactive re-auths: %d)",
+            self.proactive_refreshes, self.reactive_reauths,
+        )
+
+    # ── Browser recycling (hot handoff) ─────────────────────────────────────
+
+    def _maybe_recycle_driver(self) -> None:
+        """Swap in a ready replacement, or start preparing one when the browser is due.
+
+        Called between poll cycles on the worker thread, so the swap itself is a
+        plain attribute assignment that no other code can observe half-done.
+        """
+        with self._replacement_lock:
+            ready = self._replacement_worker if self._replacement_ready else None
+            if ready is not None:
+                self._replacement_worker = None
+                self._replacement_ready = False
+        if ready is not None:
+            self._swap_driver(ready)
+            return
+
+        now = time.monotonic()
+        if now - self._recycle_checked_at < RECYCLE_CHECK_INTERVAL:
+            return
+        self._recycle_checked_at = now
+        with self._replacement_lock:
+            if self._replacement_worker is not None:
+                return   # already preparing
+
+        age_min = (now - self._driver_started_at) / 60
+        pid = self._driver_pid(self._driver)
+        rss_mb = tree_rss(pid) / (1024 * 1024) if pid else 0.0
+        logger.debug("Browser memory: %.0f MB, age %.0f min", rss_mb, age_min)
+        reason = None
+        if RECYCLE_RSS_MB and rss_mb > RECYCLE_RSS_MB:
+            reason = f"RSS {rss_mb:.0f} MB > {RECYCLE_RSS_MB} MB"
+        elif RECYCLE_MAX_AGE_MIN and age_min > RECYCLE_MAX_AGE_MIN:
+            reason = f"age {age_min:.0f} min > {RECYCLE_MAX_AGE_MIN} min"
+        if reason is None:
+            return
+
+        logger.info("Recycling browser (%s) — preparing replacement in background", reason)
+        replacement = SeleniumWorker(
+            on_order_taken=self._on_order_taken,
+            on_order_failed=self._on_order_failed,
+            headless=self._headless,
+            lean_profile=self._lean_profile,
+        )
+        replacement._tracer = self._tracer
+        replacement._snapshots = self._snapshots
+        replacement._ledger = self._ledger
+        replacement.login = self.login
+        replacement.password = self.password
+        replacement.min_amount = self.min_amount
+        replacement.max_amount = self.max_amount
+        replacement._created_hwm = self._created_hwm
+        replacement._window_from = self._window_from
+        with self._replacement_lock:
+            self._replacement_worker = replacement
+        threading.Thread(
+            target=self._prepare_replacement, args=(replacement,), daemon=True
+        ).start()
+
+    def _prepare_replacement(self, replacement: "SeleniumWorker") -> None:
+        """Boot, log in and filter a second browser without touching the live one."""
+        started = time.monotonic()
+        try:
+            replacement._driver = replacement._create_driver()
+            replacement._restore_session()
+            replacement._navigate_to_orders()
+            replacement._apply_amount_filter()
+            if replacement._stop_event.is_set():
+                raise RuntimeError("worker stopped while preparing replacement")
+        except (Exception, WorkerInterrupted) as exc:
+            logger.error("Replacement browser failed to start: %s", exc)
+            replacement._quit_driver()
+            with self._replacement_lock:
+                if self._replacement_worker is replacement:
+                    self._replacement_worker = None
+            return
+        with self._replacement_lock:
+            if self._replacement_worker is not replacement:
+                replacement._quit_driver()   # discarded while we were booting it
+                return
+            self._replacement_ready = True
+        logger.info("Replacement browser ready in %.1fs", time.monotonic() - started)
+
+    def _swap_driver(self, replacement: "SeleniumWorker") -> None:
+        old = self._driver
+        self._driver = replacement._driver
+        self._orders_url = replacement._orders_url
+        self._filter_applied = replacement._filter_applied
+        self._driver_started_at = time.monotonic()
+        replacement._driver = None
+        logger.info("Browser swapped to replacement — quitting the old one")
+        threading.Thread(target=self._quit_quietly, args=(old,), daemon=True).start()
+
+    def _discard_replacement(self) -> None:
+        with self._replacement_lock:
+            replacement = self._replacement_worker
+            self._replacement_worker = None
+            self._replacement_ready = False
+        if replacement is not None:
+            replacement._stop_event.set()
+            replacement._quit_driver()
+
+    @staticmethod
+    def _quit_quietly(driver) -> None:
+        try:
+            driver.quit()
+        except Exception:
+            pass
 
     def _poll_once(self) -> None:
         # --- Detect session expiry ---
@@ -654,8 +1662,8 @@ class SeleniumWorker:
             self._recover_from_error_page()
             return
 
-        # --- Proactive filter check: re-apply if filter was lost ---
-        if not self._filter_applied and (self.min_amount is not None or self.max_amount is not None):
+        # --- Proactive filter check: re-apply if filter was lost or changed ---
+        if not self._filter_applied:
             logger.warning("Filter not applied — re-applying before poll")
             self._apply_amount_filter()
 
@@ -668,6 +1676,7 @@ class SeleniumWorker:
         except (NoSuchElementException, TimeoutException):
             logger.warning("Refresh button not found — full page reload (will re-apply filter)")
             self._filter_applied = False
+            self._orders_url = self._current_orders_url()
             self._driver.get(self._orders_url)
             _full_reload = True
 
@@ -682,16 +1691,34 @@ class SeleniumWorker:
             self._recover_from_error_page()
             return
 
+        render_started = time.monotonic()
         self._wait_for_table()
+        if not _full_reload:
+            self._record_render_time((time.monotonic() - render_started) * 1000)
 
         # --- Re-apply filter if full reload wiped React state ---
         if _full_reload and (self.min_amount is not None or self.max_amount is not None):
             logger.info("Re-applying amount filter after full page reload")
             self._apply_amount_filter()
 
+        if FULL_TABLE_COVERAGE:
+            self._poll_full_coverage()
+        else:
+            self._poll_rendered_rows()
+        # Only once the rows are handled: serializing the DOM must not delay a take
+        if not self._stop_event.is_set():
+            self._snapshot("table", filter_applied=self._filter_applied)
+
+    def _poll_rendered_rows(self) -> None:
         rows = self._get_order_rows()
+        self._rows_read_at = time.monotonic()
+        metrics.ROWS_SCANNED.inc(len(rows))
         if not rows:
             return
+        if self._ledger is not None:
+            self._ledger.begin_cycle(self._shown_range())
+        complete = True
+        self._created_pending = []
         for row in rows:
             if self._stop_event.is_set():
                 return
@@ -699,7 +1726,16 @@ class SeleniumWorker:
             if taken:
                 # Order was just taken — stop iterating (row list may be stale after
                 # modal close / React re-render) and let the next poll cycle refresh.
+                complete = False
                 break
+        if complete:
+            self._note_created_rows()
+        if self._ledger is not None:
+            self._ledger.end_cycle(complete)
+
+    def _shown_range(self) -> Optional[Tuple[Optional[float], Optional[float]]]:
+        """The amount filter the table is listed with, None if it may not match the settings."""
+        return (self.min_amount, self.max_amount) if self._filter_applied else None
 
     def _get_order_rows(self) -> list:
         try:
@@ -711,6 +1747,150 @@ class SeleniumWorker:
         except WebDriverException:
             return []
 
+    def _poll_full_coverage(self) -> None:
+        """Consider every order in the virtual list, not just the rendered window.
+
+        Candidates are chosen from the data collected by a single scroll pass;
+        only a candidate's own row is brought back into view (one more round trip)
+        before it goes through the regular _process_row path.
+        """
+        try:
+            entries = self._collect_all_rows()
+        except WebDriverException as exc:
+            logger.warning("Full-coverage scan failed (%s) — falling back to rendered rows", exc)
+            entries = None
+        self._rows_read_at = time.monotonic()
+        ledger = self._ledger
+        if ledger is not None:
+            ledger.begin_cycle(self._shown_range())
+        if entries is None:
+            rows = self._get_order_rows()
+            metrics.ROWS_SCANNED.inc(len(rows))
+            for row in rows:
+                if self._stop_event.is_set() or self._process_row(row):
+                    return
+            if ledger is not None:
+                ledger.end_cycle()
+            return
+
+        metrics.ROWS_SCANNED.inc(len(entries))
+        if ledger is not None:
+            # Observe the whole list first: the loop below stops at a take
+            for entry in entries:
+                ledger.observe(entry["slug"], _amount_from_titles(entry["cellTitles"], entry["titles"]))
+            ledger.end_cycle(full_coverage=True)
+        for entry in entries:
+            if self._stop_event.is_set():
+                return
+            slug = entry["slug"]
+            if INCREMENTAL_WINDOW and slug not in self._created_seen:
+                self._note_created(slug, [
+                    title + "\n" + text
+                    for title, text in zip(entry["cellTitles"], entry.get("cellTexts") or [])
+                ])
+            if slug in self._processed_slugs:
+                continue
+            amount = _amount_from_titles(entry["cellTitles"], entry["titles"])
+            if not self._amount_in_range(amount):
+                continue
+            row = self._driver.execute_async_script(
+                _SCROLL_TO_ROW_JS, slug, entry["scrollTop"], COVERAGE_SCROLL_DELAY_MS
+            )
+            if row is None:
+                logger.debug("Order %s left the list before it could be opened", slug)
+                continue
+            if self._process_row(row):
+                break
+
+    def _collect_all_rows(self) -> List[dict]:
+        """Return one entry per distinct slug in the virtual list and record coverage."""
+        result = self._driver.execute_async_script(
+            _COLLECT_ALL_ROWS_JS, COVERAGE_SCROLL_DELAY_MS
+        ) or {}
+        entries = result.get("rows") or []
+        visible = int(result.get("visible") or 0)
+        present = len(entries)
+        if present > visible and present != self.coverage_present:
+            logger.info(
+                "Coverage: %d orders present, %d rendered (%d outside the rendered window)",
+                present, visible, present - visible,
+            )
+        else:
+            logger.debug("Coverage: %d orders present, %d rendered", present, visible)
+        self.coverage_visible = visible
+        self.coverage_present = present
+        return entries
+
+    # ── Incremental orders window ────────────────────────────────────────────
+
+    def _note_created_rows(self) -> None:
+        """Read the creation times of this cycle's new rows with a single script."""
+        pending, self._created_pending = self._created_pending, []
+        if not pending:
+            return
+        try:
+            texts = self._driver.execute_script(_ROWS_CELL_TEXTS_JS, [row for _, row in pending]) or []
+        except WebDriverException as exc:
+            logger.debug("Creation times not read (%s) — retrying next cycle", exc)
+            return
+        for (slug, _), cell_texts in zip(pending, texts):
+            self._note_created(slug, cell_texts or [])
+
+    def _note_created(self, slug: str, cell_texts: List[str]) -> None:
+        """Advance the creation-time high-water mark from a row seen for the first time."""
+        if len(self._created_seen) > 10000:
+            self._created_seen.clear()
+        self._created_seen.add(slug)
+        for text in cell_texts:
+            created = _parse_created_text(text)
+            if created is not None:
+                if self._ledger is not None:
+                    self._ledger.set_created(slug, created.timestamp())
+                if self._created_hwm is None or created > self._created_hwm:
+                    self._created_hwm = created
+                return
+        logger.debug("No creation time found in row for order %s", slug)
+
+    def _current_orders_url(self) -> str:
+        """Orders URL for the next full navigation.
+
+        With INCREMENTAL_WINDOW the from= window only ever moves forward, to the
+        high-water mark minus ORDERS_WINDOW_OVERLAP_MIN; it never goes back past
+        the first day of the month, which is where the default query starts.
+        """
+        if INCREMENTAL_WINDOW and self._created_hwm is not None:
+            candidate = self._created_hwm - timedelta(minutes=ORDERS_WINDOW_OVERLAP_MIN)
+            if self._window_from is None or candidate > self._window_from:
+                logger.info(
+                    "Orders window moved: from=%s -> %s (table render at previous window: %s)",
+                    self._window_from.isoformat() if self._window_from else "month start",
+                    candidate.isoformat(),
+                    self._render_summary(),
+                )
+                self._window_from = candidate
+                self._render_ms = []
+        if self._window_from is None:
+            return _build_orders_url()
+        return _build_orders_url(max(_month_start(), self._window_from))
+
+    def _record_render_time(self, elapsed_ms: float) -> None:
+        self._render_ms.append(elapsed_ms)
+        if len(self._render_ms) >= 500:
+            logger.info(
+                "Table render (from=%s): %s",
+                self._window_from.isoformat() if self._window_from else "month start",
+                self._render_summary(),
+            )
+            self._render_ms = []
+
+    def _render_summary(self) -> str:
+        if not self._render_ms:
+            return "no samples"
+        samples = sorted(self._render_ms)
+        avg = sum(samples) / len(samples)
+        p95 = samples[int(0.95 * (len(samples) - 1))]
+        return f"avg {avg:.0f} ms, p95 {p95:.0f} ms over {len(samples)} refreshes"
+
     def _amount_in_range(self, amount: Optional[float]) -> bool:
         """Return True if amount satisfies the configured min/max filter."""
         if self.min_amount is None and self.max_amount is None:
@@ -737,12 +1917,20 @@ class SeleniumWorker:
         """
         slug = None
         amount = None
+        trace: Optional[TakeTrace] = None
+        outcome = "aborted"
         try:
             slug = _extract_slug(row)
             amount = _extract_amount(row)
+            parsed_at = time.monotonic()
 
             if slug is None:
                 return False
+            if self._ledger is not None:
+                self._ledger.observe(slug, amount)
+
+            if INCREMENTAL_WINDOW and slug not in self._created_seen:
+                self._created_pending.append((slug, row))   # read after the rows, in one round trip
 
             if slug in self._processed_slugs:
                 return False
@@ -751,17 +1939,26 @@ class SeleniumWorker:
             if not self._amount_in_range(amount):
                 logger.debug("Order %s amount=%s outside configured range, skipping", slug, amount)
                 return False
+            self._last_candidate_at = time.monotonic()
+            trace = TakeTrace(
+                slug, self._first_seen.setdefault(slug, self._rows_read_at or parsed_at), amount
+            )
+            trace.mark("parsed", parsed_at)
+            metrics.CANDIDATES.inc()
+            if self._tracer is not None:
+                self._tracer.begin("take", slug=slug)
 
             # Click the full-row anchor — React Router opens the order modal
             try:
                 anchor = row.find_element(By.CSS_SELECTOR, "a[href*='/trader/orders/']")
             except NoSuchElementException:
                 logger.warning("No anchor in row for slug %s", slug)
+                outcome = "no_anchor"
                 return False
 
             logger.info("Opening modal for order %s amount=%s", slug, amount)
             self._driver.execute_script("arguments[0].click();", anchor)
-            time.sleep(1.0)  # wait for modal/page load animation
+            self._sleep(1.0)  # wait for modal/page load animation
 
             # Early error-page check — if the site returned an error while loading the
             # order detail, bail out WITHOUT adding to _processed_slugs so the order
@@ -772,27 +1969,19 @@ class SeleniumWorker:
                     "NOT marking as processed (will retry after page recovery)",
                     slug,
                 )
+                outcome = "error_page"
                 return False
 
             # Also guard against session expiry during modal open
             if self._is_on_login_page():
                 logger.warning("Redirected to login while opening order %s modal", slug)
+                outcome = "login_redirect"
                 return False
+            trace.mark("modal_opened")
 
-            # Find "Взять"/"Take" button inside the modal (global search, any Russian/English variant)
-            take_xpath = (
-                "//button["
-                "normalize-space(.)='Взять' or "
-                "normalize-space(.)='Take' or "
-                "normalize-space(.)='Принять' or "
-                "normalize-space(.)='Accept' or "
-                "normalize-space(.)='Взять ордер'"
-                "]"
-            )
+            # Find "Взять"/"Take" button inside the modal
             try:
-                take_btn = self._wait(15).until(
-                    EC.element_to_be_clickable((By.XPATH, take_xpath))
-                )
+                take_btn = self._wait(15).until(EC.element_to_be_clickable(SEL_MODAL_TAKE_BUTTON))
             except TimeoutException:
                 # Check if it's a page error — if so, don't mark as processed
                 if self._is_error_page():
@@ -801,36 +1990,77 @@ class SeleniumWorker:
                         "NOT marking as processed (will retry after recovery)",
                         slug,
                     )
+                    outcome = "error_page"
                     return False
                 logger.warning("No Take button in modal for %s — already taken or not available", slug)
+                outcome = "no_take_button"
                 self._processed_slugs.add(slug)
+                self._snapshot("modal", slug=slug, amount=amount, outcome=outcome)
                 # Close modal with Escape and stay on orders page
                 self._driver.find_element(By.TAG_NAME, "body").send_keys(Keys.ESCAPE)
-                time.sleep(0.5)
+                self._sleep(0.5)
                 return False
+            trace.mark("take_clickable")
 
             logger.info("Clicking Take button for order %s", slug)
             self._driver.execute_script("arguments[0].click();", take_btn)
+            trace.mark("clicked")
             self._confirm_alert()
+            trace.mark("alert_accepted")
 
             logger.info("Order %s taken successfully (amount=%s)", slug, amount)
             self._processed_slugs.add(slug)
             self._on_order_taken(slug, amount)
+            trace.mark("callback_done")
+            outcome = "taken"
             return True
 
         except NoAlertPresentException:
             logger.warning("No confirm dialog for order %s", slug)
+            outcome = "no_alert"
             if slug:
                 self._processed_slugs.add(slug)
             self._on_order_failed(slug or "unknown", amount)
+            self._snapshot("modal", slug=slug, amount=amount, outcome=outcome)
             return False
         except StaleElementReferenceException:
             logger.debug("Stale element for order %s, skipping", slug)
+            outcome = "stale"
             return False
         except WebDriverException as exc:
             logger.error("WebDriverException taking order %s: %s", slug, exc)
+            outcome = "webdriver_error"
             self._on_order_failed(slug or "unknown", amount)
             return False
+        finally:
+            if trace is not None:
+                self._finish_trace(trace, outcome)
+
+    def _finish_trace(self, trace: TakeTrace, outcome: str) -> None:
+        """Record a finished candidate; retryable outcomes keep their first-seen time."""
+        trace.finish(outcome)
+        if self._ledger is not None:
+            self._ledger.set_outcome(trace.slug, outcome)
+        if trace.slug in self._processed_slugs:
+            self._first_seen.pop(trace.slug, None)
+        elif len(self._first_seen) > 500:
+            # Orders that left the table without a final outcome
+            cutoff = time.monotonic() - 3600
+            self._first_seen = {slug: at for slug, at in self._first_seen.items() if at > cutoff}
+        self.take_stats.add(trace)
+        round_trips = self._tracer.end("take") if self._tracer is not None else None
+        if round_trips:
+            logger.info(
+                "Take trace %s (%d WebDriver commands, %.0f ms)",
+                trace.describe(), round_trips["commands"], round_trips["webdriver_ms"],
+            )
+        else:
+            logger.info("Take trace %s", trace.describe())
+        if self._on_take_trace:
+            try:
+                self._on_take_trace(trace)
+            except Exception as exc:
+                logger.warning("on_take_trace callback failed for %s: %s", trace.slug, exc)
 
     def _confirm_alert(self) -> None:
         end_time = time.time() + ALERT_WAIT_TIMEOUT
@@ -840,12 +2070,12 @@ class SeleniumWorker:
                 alert.accept()
                 return
             except NoAlertPresentException:
-                time.sleep(0.1)
+                self._sleep(0.1)
         raise NoAlertPresentException("Alert did not appear within timeout")
 
     def _wait_for_table(self) -> None:
         try:
-            WebDriverWait(self._driver, PAGE_LOAD_TIMEOUT).until(
+            self._wait(PAGE_LOAD_TIMEOUT).until(
                 lambda d: d.execute_script("return document.readyState") == "complete"
             )
         except TimeoutException:
@@ -865,19 +2095,19 @@ class SeleniumWorker:
                 # Check: rows rendered OR loading spinner gone
                 inner = body.get_attribute("innerHTML") or ""
                 if "Loading" not in inner and len(inner) > 50:
-                    time.sleep(0.2)
+                    self._sleep(0.2)
                     return
             except NoSuchElementException:
                 pass
-            time.sleep(0.25)
+            self._sleep(0.25)
         logger.warning("Table did not finish rendering after waiting")
 
     def _wait_page_ready(self) -> None:
         try:
-            WebDriverWait(self._driver, PAGE_LOAD_TIMEOUT).until(
+            self._wait(PAGE_LOAD_TIMEOUT).until(
                 lambda d: d.execute_script("return document.readyState") == "complete"
             )
-            time.sleep(0.2)
+            self._sleep(0.2)
         except TimeoutException:
             pass
 
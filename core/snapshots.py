@@ -0,0 +1,176 @@
+"""Sanitized page snapshots for offline parser/selector checks (SNAPSHOT_CAPTURE=true).
+
+The worker calls capture() at four points:
+  - "table": at the end of a poll cycle, once its rows are handled;
+  - "modal": when taking an order failed with the modal open (no Take button,
+    or no confirm dialog after the click), never before the click;
+  - "filter": with the Amount filter filled in, before "Готово";
+  - "error": on entering error-page recovery.
+Each kind is captured at most once per SNAPSHOT_INTERVAL seconds, so the
+cost stays at one extra round trip now and then. Until a snapshot is due,
+capture() returns without touching the browser.
+
+The page is serialized in the browser from a clone of the document. Live
+form state (checked, value, selected option) is copied into attributes, and
+controls that are not rendered get data-c2c-hidden. Scripts, iframes and
+password values are dropped. Sanitizing and writing happen on a background
+thread: emails, the account login, long digit runs (cards, phones, accounts)
+and JWTs are masked.
+
+Files: SNAPSHOT_DIR/<kind>/<YYYYmmdd-HHMMSS>-<seq>.json.gz, holding
+{"meta": {...}, "text": body innerText, "html": outerHTML}. Replay them with
+bench/snapshot_replay.py.
+"""
+import gzip
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_KINDS = ("table", "modal", "filter", "error")
+
+_CAPTURE_JS = """
+var root = document.documentElement;
+var clone = root.cloneNode(true);
+var live = root.querySelectorAll('input, select, textarea, button');
+var copies = clone.querySelectorAll('input, select, textarea, button');
+for (var i = 0; i < live.length && i < copies.length; i++) {
+    var a = live[i], b = copies[i];
+    if (!a.offsetParent && a.getClientRects().length === 0) { b.setAttribute('data-c2c-hidden', ''); }
+    var tag = a.tagName;
+    if (tag === 'INPUT' && (a.type === 'checkbox' || a.type === 'radio')) {
+        if (a.checked) { b.setAttribute('checked', ''); } else { b.removeAttribute('checked'); }
+    } else if (tag === 'INPUT' && a.type === 'password') {
+        b.removeAttribute('value');
+    } else if (tag === 'INPUT' || tag === 'TEXTAREA') {
+        b.setAttribute('value', a.value);
+    } else if (tag === 'SELECT') {
+        for (var j = 0; j < a.options.length && j < b.options.length; j++) {
+            if (a.options[j].selected) { b.options[j].setAttribute('selected', ''); }
+            else { b.options[j].removeAttribute('selected'); }
+        }
+    }
+}
+var dropped = clone.querySelectorAll('script, noscript, iframe');
+for (var k = 0; k < dropped.length; k++) { dropped[k].parentNode.removeChild(dropped[k]); }
+return {
+    html: '<!DOCTYPE html>' + clone.outerHTML,
+    text: document.body ? document.body.innerText : '',
+    path: location.pathname
+};
+"""
+
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_JWT_RE = re.compile(r"eyJ[\w-]{8,}\.[\w-]{8,}\.[\w-]*")
+# 11+ digits with optional single space/dash separators; not inside slugs/hex ids
+_DIGITS_RE = re.compile(r"(?<![\w-])\+?\d(?:[ -]?\d){10,}(?![\w-])")
+
+
+def sanitize(text: str, redact: Sequence[str] = ()) -> str:
+    """Mask personal data in page HTML/text, keeping its shape for the parsers."""
+    for secret in redact:
+        if secret and len(secret) >= 4:   # shorter strings would mangle unrelated markup
+            text = text.replace(secret, "[redacted]")
+    text = _JWT_RE.sub("[jwt]", text)
+    text = _EMAIL_RE.sub("user@example.com", text)
+    return _DIGITS_RE.sub(lambda m: re.sub(r"\d", "0", m.group(0)), text)
+
+
+class SnapshotRecorder:
+    def __init__(self, directory: str, min_interval: float = 60.0, max_files: int = 5000) -> None:
+        self._directory = directory
+        self._min_interval = min_interval
+        self._last: Dict[str, float] = {}
+        stored = sum(1 for _ in iter_snapshot_files(directory))
+        self._seq = stored                  # file name suffix, unique across restarts
+        self._remaining = max_files - stored
+        self._queue: "queue.Queue[Optional[Tuple[str, dict, Tuple[str, ...]]]]" = queue.Queue(maxsize=32)
+        self._writer: Optional[threading.Thread] = None
+
+    def due(self, kind: str) -> bool:
+        if self._remaining <= 0:
+            return False
+        last = self._last.get(kind)
+        return last is None or time.monotonic() - last >= self._min_interval
+
+    def capture(self, driver, kind: str, redact: Sequence[str] = (), **meta) -> None:
+        """Serialize the current page if a `kind` snapshot is due (worker thread)."""
+        if not self.due(kind):
+            return
+        self._last[kind] = time.monotonic()
+        try:
+            page = driver.execute_script(_CAPTURE_JS)
+        except Exception as exc:
+            logger.debug("Snapshot capture (%s) failed: %s", kind, exc)
+            return
+        if not page:
+            return
+        self._remaining -= 1
+        page["meta"] = {"kind": kind, "captured_at": datetime.now().astimezone().isoformat(), **meta}
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, name="snapshots", daemon=True)
+            self._writer.start()
+        try:
+            self._queue.put_nowait((kind, page, tuple(redact)))
+        except queue.Full:
+            logger.debug("Snapshot writer busy, dropping %s snapshot", kind)
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Write out queued snapshots and stop the writer thread."""
+        if self._writer is None:
+            return
+        self._queue.put(None)
+        self._writer.join(timeout)
+        self._writer = None
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            kind, page, redact = item
+            try:
+                self._write(kind, page, redact)
+            except Exception as exc:
+                logger.warning("Could not write %s snapshot: %s", kind, exc)
+
+    def _write(self, kind: str, page: dict, redact: Tuple[str, ...]) -> None:
+        self._seq += 1
+        document = {
+            "meta": {**page["meta"], "path": sanitize(page.get("path") or "", redact)},
+            "text": sanitize(page.get("text") or "", redact),
+            "html": sanitize(page.get("html") or "", redact),
+        }
+        directory = os.path.join(self._directory, kind)
+        os.makedirs(directory, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{self._seq:04d}.json.gz"
+        tmp = os.path.join(directory, name + ".tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(document, f, ensure_ascii=False)
+        os.replace(tmp, os.path.join(directory, name))
+        logger.debug("Saved %s snapshot %s", kind, name)
+
+
+def iter_snapshot_files(directory: str) -> Iterator[str]:
+    """Paths of all stored snapshots under directory, oldest name first per kind."""
+    for kind in SNAPSHOT_KINDS:
+        kind_dir = os.path.join(directory, kind)
+        try:
+            names = sorted(os.listdir(kind_dir))
+        except OSError:
+            continue
+        for name in names:
+            if name.endswith(".json.gz"):
+                yield os.path.join(kind_dir, name)
+
+
+def load_snapshot(path: str) -> dict:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,181 @@
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Optional
+
+from config import (
+    RESTART_BACKOFF_BASE,
+    RESTART_BACKOFF_MAX,
+    SUPERVISOR_CHECK_INTERVAL,
+    SUPERVISOR_MAX_RESTARTS,
+    WORKER_HANG_TIMEOUT,
+    WORKER_STARTUP_TIMEOUT,
+)
+
+if TYPE_CHECKING:
+    from core.selenium_worker import SeleniumWorker
+
+logger = logging.getLogger(__name__)
+
+# A worker that has run this long since its last restart resets the backoff
+_BACKOFF_RESET_AFTER = 600.0
+
+
+class WorkerSupervisor:
+    """Watches a SeleniumWorker and relaunches it when it dies or hangs.
+
+    Detection:
+      - the worker thread is no longer alive (anything escaped _run);
+      - no poll cycle finished within WORKER_HANG_TIMEOUT (stalled WebDriver call,
+        dead geckodriver, endless error loop);
+      - no first poll cycle within WORKER_STARTUP_TIMEOUT of a launch.
+
+    Recovery kills the whole browser process tree, waits with exponential backoff
+    and calls worker.restart(), which keeps _processed_slugs and the amount filter.
+
+    Supervision ends (on_give_up, no more restarts) when the worker stopped with
+    fatal_error set, i.e. the site rejected the login and a relaunch would only
+    resubmit the same password, or after SUPERVISOR_MAX_RESTARTS restarts in a
+    row that never got healthy.
+    """
+
+    def __init__(
+        self,
+        worker: "SeleniumWorker",
+        on_down: Optional[Callable[[str], None]] = None,
+        on_restart: Optional[Callable[[str, float, int], None]] = None,
+        on_give_up: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        self._worker = worker
+        self._on_down = on_down
+        self._on_restart = on_restart
+        self._on_give_up = on_give_up
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.restarts: int = 0
+        self.downtime_total: float = 0.0
+        self.last_reason: str = ""
+        self._attempt: int = 0
+        self._last_restart_at: float = 0.0
+        self._failed_restarts: int = 0   # in a row, reset by a healthy restart
+
+    def start(self) -> None:
+        if self.is_active():
+            return
+        self._stop_event.clear()
+        self._failed_restarts = 0
+        self._thread = threading.Thread(target=self._monitor, daemon=True)
+        self._thread.start()
+        logger.info("WorkerSupervisor started")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=SUPERVISOR_CHECK_INTERVAL * 2)
+        logger.info("WorkerSupervisor stopped")
+
+    def is_active(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def stats(self) -> dict:
+        return {
+            "restarts": self.restarts,
+            "downtime_total": self.downtime_total,
+            "last_reason": self.last_reason,
+        }
+
+    def _check(self) -> Optional[str]:
+        """Return why the worker needs a restart, or None if it looks healthy."""
+        worker = self._worker
+        now = time.monotonic()
+        if not worker.is_running():
+            return "worker thread exited"
+        if worker.last_heartbeat:
+            stalled = now - worker.last_heartbeat
+            if stalled > WORKER_HANG_TIMEOUT:
+                return f"no poll cycle for {stalled:.0f}s"
+        elif now - worker.launched_at > WORKER_STARTUP_TIMEOUT:
+            return f"no first poll cycle {now - worker.launched_at:.0f}s after launch"
+        return None
+
+    def _monitor(self) -> None:
+        while not self._stop_event.wait(SUPERVISOR_CHECK_INTERVAL):
+            reason = self._check()
+            if reason is None:
+                continue
+            try:
+                self._recover(reason)
+            except Exception as exc:
+                logger.exception("Supervisor recovery failed: %s", exc)
+
+    def _recover(self, reason: str) -> None:
+        worker = self._worker
+        if worker.fatal_error:
+            self._give_up(worker.fatal_error)
+            return
+        # Downtime starts at the last sign of life, not at detection
+        down_since = worker.last_heartbeat or worker.launched_at or time.monotonic()
+        self.last_reason = reason
+        logger.error("Worker down (%s) — restarting", reason)
+        if self._on_down:
+            self._on_down(reason)
+
+        if time.monotonic() - self._last_restart_at > _BACKOFF_RESET_AFTER:
+            self._attempt = 0
+
+        while not self._stop_event.is_set():
+            if not worker.kill():
+                logger.error("Worker thread did not exit after kill — will retry")
+                if self._stop_event.wait(SUPERVISOR_CHECK_INTERVAL):
+                    return
+                continue
+            if worker.fatal_error:
+                self._give_up(worker.fatal_error)
+                return
+            if SUPERVISOR_MAX_RESTARTS and self._failed_restarts >= SUPERVISOR_MAX_RESTARTS:
+                self._give_up(f"{self._failed_restarts} restarts in a row failed, last: {reason}")
+                return
+
+            delay = min(RESTART_BACKOFF_BASE * (2 ** self._attempt), RESTART_BACKOFF_MAX)
+            self._attempt += 1
+            logger.info("Restarting worker in %.0fs (attempt %d)", delay, self._attempt)
+            if self._stop_event.wait(delay):
+                return
+            if not worker.restart():
+                continue
+            self._last_restart_at = time.monotonic()
+
+            if self._wait_healthy():
+                downtime = time.monotonic() - down_since
+                self._failed_restarts = 0
+                self.restarts += 1
+                self.downtime_total += downtime
+                logger.warning(
+                    "Worker recovered after %.1fs (restarts: %d, total downtime: %.0fs)",
+                    downtime, self.restarts, self.downtime_total,
+                )
+                if self._on_restart:
+                    self._on_restart(reason, downtime, self.restarts)
+                return
+            self._failed_restarts += 1
+            reason = self._check() or reason
+            logger.error("Restarted worker is not healthy (%s)", reason)
+
+    def _give_up(self, reason: str) -> None:
+        """Stop supervising for good; the worker stays down until the next start()."""
+        self.last_reason = reason
+        self._stop_event.set()   # ends _monitor after this recovery
+        self._worker.kill()
+        logger.critical("Worker not restarted any more: %s", reason)
+        if self._on_give_up:
+            self._on_give_up(reason)
+
+    def _wait_healthy(self) -> bool:
+        """Block until the relaunched worker finishes a poll cycle, dies, or times out."""
+        worker = self._worker
+        while not self._stop_event.wait(1.0):
+            if worker.last_heartbeat:
+                return True
+            if self._check() is not None:
+                return False
+        return False
@@ -0,0 +1,145 @@
+"""Timing of the take path for every candidate order.
+
+A TakeTrace follows one candidate from the poll cycle that first showed it in
+the table to the end of _on_order_taken. Stages are stored as monotonic
+timestamps and reported as cumulative milliseconds since first seen, so a
+trace reads like a waterfall:
+
+    parsed → modal_opened → take_clickable → clicked → alert_accepted → callback_done
+
+Traces that stop early say where we lost: "no_take_button" means the modal
+opened but somebody else had already taken the order.
+
+TakeStats keeps fixed-bucket histograms per stage in memory (constant size,
+safe to update from the worker thread and read from the bot).
+"""
+import bisect
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+STAGES: Tuple[str, ...] = (
+    "parsed",
+    "modal_opened",
+    "take_clickable",
+    "clicked",
+    "alert_accepted",
+    "callback_done",
+)
+
+STAGE_LABELS: Dict[str, str] = {
+    "parsed": "сумма прочитана",
+    "modal_opened": "модалка открыта",
+    "take_clickable": "кнопка доступна",
+    "clicked": "клик",
+    "alert_accepted": "подтверждение",
+    "callback_done": "обработано",
+}
+
+OUTCOME_LABELS: Dict[str, str] = {
+    "taken": "взят",
+    "no_take_button": "перехвачен (нет кнопки)",
+    "no_alert": "нет подтверждения",
+    "error_page": "страница ошибки",
+    "login_redirect": "сессия истекла",
+    "no_anchor": "нет ссылки",
+    "stale": "строка устарела",
+    "webdriver_error": "ошибка WebDriver",
+    "aborted": "прервано",
+}
+
+# Upper bounds of the histogram buckets, ms since first seen
+_BUCKETS_MS: Tuple[float, ...] = (
+    5, 10, 25, 50, 100, 250, 500, 750, 1000, 1500, 2000, 3000, 5000, 10000, 30000, float("inf"),
+)
+
+
+class TakeTrace:
+    __slots__ = ("slug", "amount", "first_seen", "marks", "outcome", "finished_at")
+
+    def __init__(self, slug: str, first_seen: float, amount: Optional[float] = None) -> None:
+        self.slug = slug
+        self.amount = amount
+        self.first_seen = first_seen
+        self.marks: Dict[str, float] = {}
+        self.outcome: str = "aborted"
+        self.finished_at: float = 0.0
+
+    def mark(self, stage: str, at: Optional[float] = None) -> None:
+        self.marks[stage] = time.monotonic() if at is None else at
+
+    def finish(self, outcome: str) -> None:
+        self.outcome = outcome
+        self.finished_at = time.monotonic()
+
+    def offsets_ms(self) -> Dict[str, Optional[float]]:
+        """Cumulative ms from first seen to each stage (None for stages not reached)."""
+        return {
+            stage: (self.marks[stage] - self.first_seen) * 1000 if stage in self.marks else None
+            for stage in STAGES
+        }
+
+    def last_stage(self) -> Optional[str]:
+        reached = [stage for stage in STAGES if stage in self.marks]
+        return reached[-1] if reached else None
+
+    def describe(self) -> str:
+        parts = [f"{stage}=+{ms:.0f}ms" for stage, ms in self.offsets_ms().items() if ms is not None]
+        return f"{self.slug} {self.outcome}: " + (" ".join(parts) or "no stages")
+
+
+class _Histogram:
+    __slots__ = ("counts", "total")
+
+    def __init__(self) -> None:
+        self.counts: List[int] = [0] * len(_BUCKETS_MS)
+        self.total = 0
+
+    def add(self, value_ms: float) -> None:
+        self.counts[bisect.bisect_left(_BUCKETS_MS, value_ms)] += 1
+        self.total += 1
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Estimate by linear interpolation inside the bucket holding the rank."""
+        if not self.total:
+            return None
+        rank = pct / 100 * self.total
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                low = _BUCKETS_MS[i - 1] if i else 0.0
+                high = _BUCKETS_MS[i]
+                if high == float("inf"):
+                    return low
+                return low + (high - low) * (rank - seen) / count
+            seen += count
+        return _BUCKETS_MS[-2]
+
+
+class TakeStats:
+    """Per-stage histograms (cumulative ms since first seen) and outcome counts."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stages: Dict[str, _Histogram] = {stage: _Histogram() for stage in STAGES}
+        self._outcomes: Dict[str, int] = {}
+
+    def add(self, trace: TakeTrace) -> None:
+        with self._lock:
+            self._outcomes[trace.outcome] = self._outcomes.get(trace.outcome, 0) + 1
+            for stage, ms in trace.offsets_ms().items():
+                if ms is not None:
+                    self._stages[stage].add(ms)
+
+    def summary(self, percentiles: Tuple[float, ...] = (50, 90, 99)) -> dict:
+        with self._lock:
+            return {
+                "outcomes": dict(self._outcomes),
+                "stages": {
+                    stage: {
+                        "count": hist.total,
+                        **{f"p{pct:g}": hist.percentile(pct) for pct in percentiles},
+                    }
+                    for stage, hist in self._stages.items()
+                },
+            }
@@ -0,0 +1,258 @@
+"""Opt-in tracer for WebDriver round trips (WEBDRIVER_TRACE=true).
+
+attach() wraps driver.command_executor.execute, the single point every
+WebDriver command goes through (find_element, get_attribute,
+execute_script, switch_to.alert, ...). Each call is recorded with:
+  - the wire command name;
+  - the SeleniumWorker method that issued it (nearest frame in selenium_worker.py);
+  - its duration;
+  - request/response payload sizes.
+
+Spans ("cycle", "take") group the commands. Every finished span is
+aggregated: command count, WebDriver time and bytes. The callers are also
+totalled over the process lifetime.
+
+Events go to a bounded ring buffer and are written as a Chrome trace
+(open in ui.perfetto.dev or chrome://tracing):
+  - on dump();
+  - after any cycle slower than WEBDRIVER_TRACE_SLOW_MS, so the file always
+    ends with the timeline of the last slow cycle. That write runs on a
+    background thread, so it never slows down the next cycle.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_WORKER_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "selenium_worker.py")
+_MAX_EVENTS = 200_000
+# Plumbing inside selenium_worker.py that is never the interesting caller
+_SKIPPED_CALLERS = frozenset({"until"})
+
+
+def _payload_size(value: Any) -> int:
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _caller() -> str:
+    """Name of the innermost selenium_worker.py method on the stack (lambdas and
+    wait loops are attributed to the method that started them)."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        code = frame.f_code
+        if (
+            code.co_filename == _WORKER_FILE
+            and not code.co_name.startswith("<")
+            and code.co_name not in _SKIPPED_CALLERS
+        ):
+            return code.co_name
+        frame = frame.f_back
+    return "?"
+
+
+class _Span:
+    __slots__ = ("name", "args", "started", "commands", "webdriver_seconds", "bytes")
+
+    def __init__(self, name: str, args: Dict[str, Any]) -> None:
+        self.name = name
+        self.args = args
+        self.started = time.perf_counter()
+        self.commands = 0
+        self.webdriver_seconds = 0.0
+        self.bytes = 0
+
+
+class WebDriverTracer:
+    def __init__(self, path: str, slow_cycle_ms: float = 2000.0) -> None:
+        self._path = path
+        self._slow_cycle_s = slow_cycle_ms / 1000
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._dump_lock = threading.Lock()   # one writer of the trace file at a time
+        self._dumping = False                 # background dump running
+        self._dump_again = False              # another slow cycle ended meanwhile
+        self._events: Deque[Dict[str, Any]] = deque(maxlen=_MAX_EVENTS)
+        self._local = threading.local()
+        self._thread_names: Dict[int, str] = {}
+        # Lifetime aggregates: per span kind and per calling method
+        self.span_totals: Dict[str, Dict[str, float]] = {}
+        self.caller_totals: Dict[str, Dict[str, float]] = {}
+
+    # ── Driver hook ─────────────────────────────────────────────────────────
+
+    def attach(self, driver) -> None:
+        """Route driver's commands through this tracer (re-attaching is safe)."""
+        executor = driver.command_executor
+        execute = getattr(executor, "_untraced_execute", None)
+        if execute is None:
+            execute = executor.execute
+            executor._untraced_execute = execute
+        tracer = self
+
+        def traced_execute(command, params):
+            started = time.perf_counter()
+            response = None
+            try:
+                response = execute(command, params)
+                return response
+            finally:
+                tracer._record(command, params, response, started, time.perf_counter())
+
+        executor.execute = traced_execute
+
+    def _record(self, command: str, params: Any, response: Any, started: float, ended: float) -> None:
+        caller = _caller()
+        duration = ended - started
+        sent = _payload_size(params)
+        received = _payload_size(response.get("value")) if isinstance(response, dict) else 0
+        for span in self._stack():
+            span.commands += 1
+            span.webdriver_seconds += duration
+            span.bytes += sent + received
+        totals = self.caller_totals.setdefault(caller, {"commands": 0, "seconds": 0.0})
+        totals["commands"] += 1
+        totals["seconds"] += duration
+        self._emit({
+            "name": command,
+            "cat": "webdriver",
+            "ph": "X",
+            "ts": (started - self._origin) * 1e6,
+            "dur": duration * 1e6,
+            "args": {"caller": caller, "sent_bytes": sent, "received_bytes": received},
+        })
+
+    # ── Spans ───────────────────────────────────────────────────────────────
+
+    def _stack(self) -> List[_Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+            self._thread_names[threading.get_ident()] = threading.current_thread().name
+        return stack
+
+    def begin(self, name: str, **args: Any) -> None:
+        self._stack().append(_Span(name, args))
+
+    def end(self, name: str) -> Optional[Dict[str, float]]:
+        """Close the innermost span called `name`; returns its aggregate."""
+        stack = self._stack()
+        for i in range(len(stack) - 1, -1, -1):
+            if stack[i].name == name:
+                span = stack.pop(i)
+                break
+        else:
+            return None
+        ended = time.perf_counter()
+        wall = ended - span.started
+        summary = {
+            "wall_ms": wall * 1000,
+            "commands": span.commands,
+            "webdriver_ms": span.webdriver_seconds * 1000,
+            "bytes": span.bytes,
+        }
+        totals = self.span_totals.setdefault(
+            name, {"count": 0, "commands": 0, "webdriver_seconds": 0.0, "wall_seconds": 0.0}
+        )
+        totals["count"] += 1
+        totals["commands"] += span.commands
+        totals["webdriver_seconds"] += span.webdriver_seconds
+        totals["wall_seconds"] += wall
+        self._emit({
+            "name": name,
+            "cat": "span",
+            "ph": "X",
+            "ts": (span.started - self._origin) * 1e6,
+            "dur": wall * 1e6,
+            "args": {**span.args, **summary},
+        })
+        if name == "cycle" and wall >= self._slow_cycle_s:
+            logger.warning(
+                "Slow poll cycle: %.0f ms, %d WebDriver commands (%.0f ms) — trace written to %s",
+                summary["wall_ms"], span.commands, summary["webdriver_ms"], self._path,
+            )
+            self._dump_in_background()
+        return summary
+
+    @contextmanager
+    def span(self, name: str, **args: Any) -> Iterator[None]:
+        self.begin(name, **args)
+        try:
+            yield
+        finally:
+            self.end(name)
+
+    # ── Output ──────────────────────────────────────────────────────────────
+
+    def _emit(self, event: Dict[str, Any]) -> None:
+        event["pid"] = self._pid
+        event["tid"] = threading.get_ident()
+        with self._lock:
+            self._events.append(event)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Average commands and WebDriver time per span kind."""
+        return {
+            name: {
+                "count": totals["count"],
+                "commands_avg": totals["commands"] / totals["count"],
+                "webdriver_ms_avg": totals["webdriver_seconds"] / totals["count"] * 1000,
+                "webdriver_share": (
+                    totals["webdriver_seconds"] / totals["wall_seconds"] if totals["wall_seconds"] else 0.0
+                ),
+            }
+            for name, totals in list(self.span_totals.items())
+            if totals["count"]
+        }
+
+    def _dump_in_background(self) -> None:
+        with self._lock:
+            if self._dumping:
+                self._dump_again = True
+                return
+            self._dumping = True
+        threading.Thread(target=self._dump_loop, name="webdriver-trace", daemon=True).start()
+
+    def _dump_loop(self) -> None:
+        while True:
+            self.dump()
+            with self._lock:
+                if not self._dump_again:
+                    self._dumping = False
+                    return
+                self._dump_again = False
+
+    def dump(self) -> None:
+        """Write the buffered timeline as a Chrome trace JSON file."""
+        with self._lock:
+            events = list(self._events)
+        # The worker thread keeps updating these while a background dump runs
+        callers = {name: dict(totals) for name, totals in list(self.caller_totals.items())}
+        metadata = [
+            {"name": "thread_name", "ph": "M", "pid": self._pid, "tid": tid, "args": {"name": name}}
+            for tid, name in list(self._thread_names.items())
+        ]
+        document = {
+            "traceEvents": metadata + events,
+            "displayTimeUnit": "ms",
+            "otherData": {"spans": self.summary(), "callers": callers},
+        }
+        try:
+            os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
+            with self._dump_lock:
+                tmp = self._path + ".tmp"
+                with open(tmp, "w") as f:
+                    json.dump(document, f)
+                os.replace(tmp, self._path)
+        except OSError as exc:
+            logger.warning("Could not write WebDriver trace to %s: %s", self._path, exc)
@@ -0,0 +1,310 @@
+"""SeleniumWorker in a separate process (WORKER_MODE=process).
+
+The bot keeps a ProcessWorker, which has the same control surface as
+SeleniumWorker (start/stop/prewarm/reconfigure/request_retry plus what
+WorkerSupervisor needs). The browser and the poll loop live in
+`python -m core.worker_process`, so Telegram bursts and DB work in the bot
+process no longer compete with the poll loop for the GIL, and a crash there
+cannot take the bot down.
+
+IPC is an AF_UNIX socket pair wrapped in multiprocessing Connections:
+commands go to the child as tuples, events (taken/failed/startup/trace/
+heartbeat) come back as tuples.
+"""
+import logging
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.connection import Connection
+from typing import Callable, List, Optional, Set
+
+from core import metrics
+from core.procinfo import kill_tree
+from core.take_trace import TakeStats, TakeTrace
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_INTERVAL = 1.0
+_PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ProcessWorker:
+    # Module run as the child (`python -m`); benchmarks swap in a fake browser through it
+    _CHILD_MODULE = "core.worker_process"
+
+    def __init__(
+        self,
+        on_order_taken: Callable[[str, Optional[float]], None],
+        on_order_failed: Callable[[str, Optional[float]], None],
+        on_startup_ok: Optional[Callable[[Optional[float], Optional[float], float, bool], None]] = None,
+        on_take_trace: Optional[Callable[[TakeTrace], None]] = None,
+        headless: bool = True,
+    ) -> None:
+        self._on_order_taken = on_order_taken
+        self._on_order_failed = on_order_failed
+        self._on_startup_ok = on_startup_ok
+        self._on_take_trace = on_take_trace
+        self._headless = headless
+        self._proc: Optional[subprocess.Popen] = None
+        self._conn: Optional[Connection] = None
+        self._send_lock = threading.Lock()
+        self.login: str = ""
+        self.password: str = ""
+        self.min_amount: Optional[float] = None
+        self.max_amount: Optional[float] = None
+        # Mirrors the child's processed slugs so a relaunched child can be seeded;
+        # written by the event reader thread, read by start()/restart()
+        self._processed_slugs: Set[str] = set()
+        self._slugs_lock = threading.Lock()
+        # _active: start() called and not stopped; _child_running: the child's
+        # worker thread is alive according to its last heartbeat.
+        self._active: bool = False
+        self._child_running: bool = False
+        self.last_heartbeat: float = 0.0
+        self.launched_at: float = 0.0
+        self.fatal_error: str = ""   # the child worker's, from its heartbeats
+        # Rebuilt from the child's traces, so it survives child relaunches
+        self.take_stats = TakeStats()
+
+    # ── Control surface (same as SeleniumWorker) ────────────────────────────
+
+    def start(self, login: str, password: str, min_amount: Optional[float], max_amount: Optional[float]) -> bool:
+        """Launch the child; whether its worker starts shows in the heartbeats."""
+        if self.is_running():
+            logger.warning("Worker already running")
+            return True
+        self.login, self.password = login, password
+        self.min_amount, self.max_amount = min_amount, max_amount
+        self._ensure_process()
+        self._mark_launched()
+        self._active = True
+        self._send("start", login, password, min_amount, max_amount, self._seed_slugs())
+        logger.info("ProcessWorker started (pid=%s)", self._proc.pid)
+        return True
+
+    def prewarm(self) -> None:
+        self._ensure_process()
+        self._send("prewarm")
+
+    def provide_credentials(
+        self, login: str, password: str, min_amount: Optional[float], max_amount: Optional[float]
+    ) -> None:
+        self.login, self.password = login, password
+        self.min_amount, self.max_amount = min_amount, max_amount
+        self._send("credentials", login, password, min_amount, max_amount)
+
+    def reconfigure(self, min_amount: Optional[float], max_amount: Optional[float]) -> None:
+        self.min_amount, self.max_amount = min_amount, max_amount
+        self._send("reconfigure", min_amount, max_amount)
+
+    def request_retry(self, slug: str) -> None:
+        with self._slugs_lock:
+            self._processed_slugs.discard(slug)
+        self._send("retry", slug)
+
+    def stop(self) -> None:
+        self._active = False
+        proc = self._proc
+        if proc is not None and proc.poll() is None:
+            self._send("shutdown")
+            try:
+                proc.wait(timeout=20)
+            except subprocess.TimeoutExpired:
+                logger.warning("Worker process did not exit — killing it")
+                kill_tree(proc.pid)
+        self._close()
+        logger.info("ProcessWorker stopped")
+
+    def is_running(self) -> bool:
+        return (
+            self._active
+            and self._proc is not None
+            and self._proc.poll() is None
+            and self._child_running
+        )
+
+    def kill(self, timeout: float = 15) -> bool:
+        """SIGKILL the worker process together with geckodriver and Firefox."""
+        proc = self._proc
+        if proc is not None and proc.poll() is None:
+            kill_tree(proc.pid)
+            try:
+                proc.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                return False
+        self._close()
+        return True
+
+    def restart(self) -> bool:
+        """Relaunch in a fresh process, keeping processed slugs and the filter."""
+        self._ensure_process()
+        self._mark_launched()
+        self._send(
+            "restart", self.login, self.password, self.min_amount, self.max_amount,
+            self._seed_slugs(),
+        )
+        logger.info("ProcessWorker restarted (pid=%s)", self._proc.pid)
+        return True
+
+    # ── Process and channel management ──────────────────────────────────────
+
+    def _mark_launched(self) -> None:
+        self.launched_at = time.monotonic()
+        self.last_heartbeat = 0.0
+        self.fatal_error = ""
+        self._child_running = True   # until a heartbeat says otherwise
+
+    def _seed_slugs(self) -> List[str]:
+        with self._slugs_lock:
+            return sorted(self._processed_slugs)
+
+    def _ensure_process(self) -> None:
+        if self._proc is not None and self._proc.poll() is None:
+            return
+        ours, theirs = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._proc = subprocess.Popen(
+            [sys.executable, "-m", self._CHILD_MODULE, str(theirs.fileno()),
+             "1" if self._headless else "0"],
+            pass_fds=(theirs.fileno(),),
+            cwd=_PROJECT_DIR,
+        )
+        theirs.close()
+        self._conn = Connection(ours.detach())
+        threading.Thread(target=self._read_events, args=(self._conn,), daemon=True).start()
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except OSError:
+                pass
+            self._conn = None
+        self._child_running = False
+
+    def _send(self, *command) -> None:
+        conn = self._conn
+        if conn is None:
+            logger.warning("Worker process not running — command %s dropped", command[0])
+            return
+        try:
+            with self._send_lock:
+                conn.send(command)
+        except (OSError, ValueError) as exc:
+            logger.warning("Could not send %s to worker process: %s", command[0], exc)
+
+    def _read_events(self, conn: Connection) -> None:
+        """Dispatch events from the child; runs on its own thread, like the worker callbacks did."""
+        while True:
+            try:
+                event = conn.recv()
+            except (EOFError, OSError):
+                break
+            name, args = event[0], event[1:]
+            try:
+                if name == "heartbeat":
+                    age, running, fatal_error, new_slugs, worker_metrics = args
+                    metrics.restore(worker_metrics)
+                    self.last_heartbeat = time.monotonic() - age if age is not None else 0.0
+                    self.fatal_error = fatal_error
+                    self._child_running = running
+                    # Only what the child itself marked processed: some failures
+                    # (webdriver_error, "unknown") are left retryable there
+                    with self._slugs_lock:
+                        self._processed_slugs.update(new_slugs)
+                elif name == "taken":
+                    self._on_order_taken(*args)
+                elif name == "failed":
+                    self._on_order_failed(*args)
+                elif name == "startup" and self._on_startup_ok:
+                    self._on_startup_ok(*args)
+                elif name == "trace":
+                    self.take_stats.add(args[0])
+                    if self._on_take_trace:
+                        self._on_take_trace(args[0])
+            except Exception as exc:
+                logger.exception("Handling worker event %s failed: %s", name, exc)
+        if conn is self._conn:
+            self._child_running = False
+        logger.info("Worker process channel closed")
+
+
+# ── Child process ───────────────────────────────────────────────────────────
+
+def _heartbeat_loop(worker, emit: Callable, stop: threading.Event, sent: Set[str]) -> None:
+    while not stop.wait(HEARTBEAT_INTERVAL):
+        new_slugs: List[str] = sorted(set(worker._processed_slugs) - sent)
+        sent.update(new_slugs)
+        age = time.monotonic() - worker.last_heartbeat if worker.last_heartbeat else None
+        emit("heartbeat", age, worker.is_running(), worker.fatal_error, new_slugs, metrics.snapshot())
+
+
+def _child_main(fd: int, headless: bool) -> None:
+    from config import LOG_LEVEL
+    from core.selenium_worker import SeleniumWorker
+
+    logging.basicConfig(
+        level=getattr(logging, LOG_LEVEL, logging.INFO),
+        format="%(asctime)s [%(levelname)s] worker/%(name)s: %(message)s",
+    )
+    conn = Connection(fd)
+    send_lock = threading.Lock()
+
+    def emit(*event) -> None:
+        try:
+            with send_lock:
+                conn.send(event)
+        except (OSError, ValueError) as exc:
+            logger.warning("Could not send %s event to bot process: %s", event[0], exc)
+
+    worker = SeleniumWorker(
+        on_order_taken=lambda slug, amount: emit("taken", slug, amount),
+        on_order_failed=lambda slug, amount: emit("failed", slug, amount),
+        on_startup_ok=lambda *args: emit("startup", *args),
+        on_take_trace=lambda trace: emit("trace", trace),
+        headless=headless,
+    )
+    stop = threading.Event()
+    sent_slugs: Set[str] = set()   # processed slugs already reported in a heartbeat
+    threading.Thread(target=_heartbeat_loop, args=(worker, emit, stop, sent_slugs), daemon=True).start()
+    try:
+        while True:
+            try:
+                command = conn.recv()
+            except (EOFError, OSError):
+                logger.warning("Bot process went away — shutting down")
+                break
+            name, args = command[0], command[1:]
+            if name == "start":
+                login, password, min_amount, max_amount, slugs = args
+                worker._processed_slugs.update(slugs)
+                worker.start(login, password, min_amount, max_amount)
+            elif name == "restart":
+                login, password, min_amount, max_amount, slugs = args
+                worker.login, worker.password = login, password
+                worker.min_amount, worker.max_amount = min_amount, max_amount
+                worker._processed_slugs.update(slugs)
+                worker.restart()
+            elif name == "prewarm":
+                worker.prewarm()
+            elif name == "credentials":
+                worker.provide_credentials(*args)
+            elif name == "reconfigure":
+                worker.reconfigure(*args)
+            elif name == "retry":
+                sent_slugs.discard(args[0])   # report it again if it gets processed again
+                worker.request_retry(*args)
+            elif name == "shutdown":
+                break
+            else:
+                logger.warning("Unknown command from bot process: %s", name)
+    finally:
+        stop.set()
+        worker.stop()
+        conn.close()
+
+
+if __name__ == "__main__":
+    _child_main(int(sys.argv[1]), sys.argv[2] == "1")
@@ -17,10 +17,12 @@ async_session_factory = async_sessionmaker(engine, expire_on_commit=False)
 async def init_db() -> None:
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
-        # Add columns introduced after initial schema (safe to run repeatedly)
+        # Add columns and indexes introduced after initial schema (safe to run repeatedly)
         for stmt in [
             "ALTER TABLE settings ADD COLUMN notify_taken BOOLEAN NOT NULL DEFAULT 1",
             "ALTER TABLE settings ADD COLUMN chat_id INTEGER",
+            "CREATE INDEX IF NOT EXISTS ix_order_log_taken_at_id ON order_log (taken_at, id)",
+            "CREATE INDEX IF NOT EXISTS ix_order_log_status_taken_at_id ON order_log (status, taken_at, id)",
         ]:
             try:
                 await conn.execute(text(stmt))
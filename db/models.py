@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Boolean, DateTime, Float, Integer, String
+from sqlalchemy import Boolean, DateTime, Float, Index, Integer, String
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -24,9 +24,45 @@ class Settings(Base):
 
 class OrderLog(Base):
     __tablename__ = "order_log"
+    __table_args__ = (
+        # Keyset pagination of the history view: newest first by (taken_at, id)
+        Index("ix_order_log_taken_at_id", "taken_at", "id"),
+        Index("ix_order_log_status_taken_at_id", "status", "taken_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     order_slug: Mapped[str] = mapped_column(String, nullable=False)
     amount: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
     status: Mapped[str] = mapped_column(String, nullable=False)
     taken_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class OrderLogDaily(Base):
+    """Per-day totals of order_log rows moved to the archive by retention (core/retention.py)."""
+
+    __tablename__ = "order_log_daily"
+
+    day: Mapped[str] = mapped_column(String, primary_key=True)   # UTC date, YYYY-MM-DD
+    status: Mapped[str] = mapped_column(String, primary_key=True)
+    orders: Mapped[int] = mapped_column(Integer, default=0)
+    volume: Mapped[float] = mapped_column(Float, default=0.0)
+    min_amount: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    max_amount: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+
+
+class TakeTraceLog(Base):
+    """Take-path timing of one candidate: cumulative ms since the order was first seen."""
+
+    __tablename__ = "take_trace"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    order_slug: Mapped[str] = mapped_column(String, nullable=False)
+    amount: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    outcome: Mapped[str] = mapped_column(String, nullable=False)
+    traced_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    parsed_ms: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    modal_opened_ms: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    take_clickable_ms: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    clicked_ms: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    alert_accepted_ms: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    callback_done_ms: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
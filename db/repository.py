@@ -1,10 +1,10 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
-from sqlalchemy import select, func
+from sqlalchemy import func, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from db.models import OrderLog, Settings
+from db.models import OrderLog, OrderLogDaily, Settings, TakeTraceLog
 
 
 class SettingsRepository:
@@ -49,19 +49,77 @@ class OrderLogRepository:
         return entry
 
     async def count_taken(self) -> int:
-        result = await self._session.execute(
-            select(func.count()).where(OrderLog.status == "taken")
-        )
-        return result.scalar_one()
+        return await self._count("taken")
 
     async def count_failed(self) -> int:
-        result = await self._session.execute(
-            select(func.count()).where(OrderLog.status == "failed")
+        return await self._count("failed")
+
+    async def _count(self, status: str) -> int:
+        """Live rows plus the ones retention has rolled up into order_log_daily."""
+        live = await self._session.execute(
+            select(func.count()).where(OrderLog.status == status)
         )
-        return result.scalar_one()
+        archived = await self._session.execute(
+            select(func.coalesce(func.sum(OrderLogDaily.orders), 0)).where(OrderLogDaily.status == status)
+        )
+        return live.scalar_one() + archived.scalar_one()
 
     async def last_entries(self, limit: int = 5) -> List[OrderLog]:
         result = await self._session.execute(
             select(OrderLog).order_by(OrderLog.taken_at.desc()).limit(limit)
         )
         return list(result.scalars().all())
+
+    async def page(
+        self,
+        limit: int = 10,
+        before: Optional[Tuple[datetime, int]] = None,
+        after: Optional[Tuple[datetime, int]] = None,
+        status: Optional[str] = None,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None,
+    ) -> Tuple[List[OrderLog], bool]:
+        """One page of history, newest first, by keyset on (taken_at, id) — no OFFSET.
+
+        `before` gives the entries older than that key, `after` the newer ones.
+        The flag says whether more entries lie beyond the page in that direction.
+        """
+        query = select(OrderLog)
+        if status is not None:
+            query = query.where(OrderLog.status == status)
+        if min_amount is not None:
+            query = query.where(OrderLog.amount >= min_amount)
+        if max_amount is not None:
+            query = query.where(OrderLog.amount <= max_amount)
+        key = tuple_(OrderLog.taken_at, OrderLog.id)
+        if after is not None:
+            query = query.where(key > tuple_(*after)).order_by(OrderLog.taken_at, OrderLog.id)
+        else:
+            if before is not None:
+                query = query.where(key < tuple_(*before))
+            query = query.order_by(OrderLog.taken_at.desc(), OrderLog.id.desc())
+        result = await self._session.execute(query.limit(limit + 1))
+        entries = list(result.scalars().all())
+        more = len(entries) > limit
+        entries = entries[:limit]
+        if after is not None:
+            entries.reverse()
+        return entries, more
+
+
+class TakeTraceRepository:
+    def __init__(self, session: AsyncSession) -> None:
+        self._session = session
+
+    async def outcome_counts(self) -> Dict[str, int]:
+        result = await self._session.execute(
+            select(TakeTraceLog.outcome, func.count()).group_by(TakeTraceLog.outcome)
+        )
+        return {outcome: count for outcome, count in result.all()}
+
+    async def last_entries(self, limit: int = 5, outcome: Optional[str] = None) -> List[TakeTraceLog]:
+        query = select(TakeTraceLog).order_by(TakeTraceLog.traced_at.desc()).limit(limit)
+        if outcome is not None:
+            query = query.where(TakeTraceLog.outcome == outcome)
+        result = await self._session.execute(query)
+        return list(result.scalars().all())
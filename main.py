@@ -1,15 +1,34 @@
 import asyncio
 import logging
+import secrets
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.enums import ParseMode
 from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
 
-from bot.handlers import control, main_menu, settings
+from bot.handlers import control, history, main_menu, settings
 from bot.middlewares.chat_registry import ChatRegistryMiddleware
-from config import BOT_TOKEN, LOG_LEVEL
+from config import (
+    BOT_MODE,
+    BOT_TOKEN,
+    LOG_LEVEL,
+    PREWARM,
+    RETENTION_DAYS,
+    TELEGRAM_API_URL,
+    WEBHOOK_BASE_URL,
+    WEBHOOK_HOST,
+    WEBHOOK_MAX_CONNECTIONS,
+    WEBHOOK_PATH,
+    WEBHOOK_PORT,
+    WEBHOOK_SECRET,
+)
 from core.order_processor import OrderProcessor
+from core.retention import RetentionJob, prepare_database
 from db.engine import init_db
 
 logging.basicConfig(
@@ -18,12 +37,76 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+bot = Bot(
+    token=BOT_TOKEN,
+    session=AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL)),
+    default=DefaultBotProperties(parse_mode=ParseMode.HTML),
+)
 processor = OrderProcessor(bot)
 
+ALLOWED_UPDATES = ["message", "callback_query"]
+
+
+async def run_webhook(dp: Dispatcher) -> bool:
+    """Serve updates through an embedded aiohttp server.
+
+    Returns False without serving if the server or the webhook registration
+    fails, so the caller can fall back to polling.
+    """
+    if not WEBHOOK_BASE_URL:
+        logger.error("BOT_MODE=webhook but WEBHOOK_BASE_URL is not set")
+        return False
+
+    # Without a secret anyone who can reach the port could post forged updates;
+    # a random one per run works because it is registered with Telegram below
+    secret = WEBHOOK_SECRET or secrets.token_urlsafe(32)
+    app = web.Application()
+    # handle_in_background: answer Telegram's POST at once and run the handler
+    # as a task, so a slow handler never delays the next delivery
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        handle_in_background=True,
+        secret_token=secret,
+    ).register(app, path=WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT).start()
+        await bot.set_webhook(
+            url=WEBHOOK_BASE_URL + WEBHOOK_PATH,
+            secret_token=secret,
+            max_connections=WEBHOOK_MAX_CONNECTIONS,
+            allowed_updates=ALLOWED_UPDATES,
+        )
+    except Exception as exc:
+        logger.error("Webhook setup failed (%s) — falling back to polling", exc)
+        await runner.cleanup()
+        return False
+
+    logger.info(
+        "Bot started (webhook %s%s, listening on %s:%s)",
+        WEBHOOK_BASE_URL, WEBHOOK_PATH, WEBHOOK_HOST, WEBHOOK_PORT,
+    )
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+    return True
+
 
 async def main() -> None:
+    if PREWARM:
+        # Firefox boots on the worker thread while the DB and dispatcher come up
+        processor.prewarm()
     await init_db()
+    if RETENTION_DAYS > 0:
+        await asyncio.to_thread(prepare_database)   # before anything writes order_log
+        RetentionJob().start()
+    if PREWARM:
+        await processor.prewarm_login()
 
     dp = Dispatcher(storage=MemoryStorage())
     dp.update.middleware(ChatRegistryMiddleware())
@@ -31,12 +114,23 @@ async def main() -> None:
     dp.include_router(main_menu.router)
     dp.include_router(settings.router)
     dp.include_router(control.router)
+    dp.include_router(history.router)
 
     loop = asyncio.get_running_loop()
     processor.set_loop(loop)
+    processor.start_metrics()
+
+    if BOT_MODE == "webhook" and await run_webhook(dp):
+        return
 
-    logger.info("Bot started")
-    await dp.start_polling(bot, allowed_updates=["message", "callback_query"])
+    # getUpdates is refused while a webhook is registered (e.g. left by a
+    # previous run in webhook mode)
+    try:
+        await bot.delete_webhook()
+    except Exception as exc:
+        logger.warning("deleteWebhook failed: %s", exc)
+    logger.info("Bot started (polling)")
+    await dp.start_polling(bot, allowed_updates=ALLOWED_UPDATES)
 
 
 if __name__ == "__main__":